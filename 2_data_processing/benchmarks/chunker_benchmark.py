@@ -0,0 +1,115 @@
+"""
+Header Chunker Micro-Benchmark
+Chunks synthetic template documents with chunker.chunk_by_headers (re.split, list
+of strings) and chunker.iter_chunks_by_headers (lazy, offset-backed), checks both
+agree, and reports time and peak allocations
+
+Documents are generated in memory from the template (no file I/O). Each chunk's
+header and content are read once, as the indexing pipeline does.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Add core modules to path
+PROCESSING_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROCESSING_ROOT / "core"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from chunker import chunk_by_headers, iter_chunks_by_headers
+from synthetic_corpus import CorpusConfig, generate_document, load_template_sections
+
+
+def build_documents(num_docs: int, records: int, seed: int) -> List[str]:
+    """Template documents without frontmatter (chunking sees the body only)"""
+
+    config = CorpusConfig(num_docs=num_docs, seed=seed, max_records=records, broken_yaml_rate=0.0)
+    sections = load_template_sections()
+    documents = []
+    for doc_index in range(num_docs):
+        text = generate_document(doc_index, sections, config)
+        documents.append(text.split('\n---\n', 1)[1].lstrip('\n'))
+    return documents
+
+
+def consume(chunker: Callable[[str], Iterable], documents: List[str]) -> int:
+    """Chunk every document, touching each header and content once"""
+
+    total = 0
+    for text in documents:
+        for chunk in chunker(text):
+            total += len(chunk.header) + len(chunk.content)
+    return total
+
+
+def measure(chunker: Callable[[str], Iterable], documents: List[str], repeats: int) -> Tuple[float, float]:
+    """(best wall time in ms, peak traced allocation in KB)"""
+
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        consume(chunker, documents)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for text in documents[:50]:
+        for chunk in chunker(text):
+            chunk.header, chunk.content
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024
+
+
+def check_equivalence(documents: List[str]):
+    for doc_index, text in enumerate(documents):
+        expected = [(c.header, c.content, c.chunk_index) for c in chunk_by_headers('\n' + text)]
+        actual = [(c.header, c.content, c.chunk_index) for c in iter_chunks_by_headers(text)]
+        if actual != expected:
+            raise AssertionError(f"Chunkers disagree on document {doc_index}")
+
+
+def main():
+    """Run the benchmark: chunker_benchmark.py [--docs 2000] [--records 3] [--repeats 5] [--output FILE]"""
+
+    arg_parser = argparse.ArgumentParser(description="Header chunking: re.split lists vs lazy offset chunks")
+    arg_parser.add_argument("--docs", type=int, default=2000, help="Number of synthetic documents")
+    arg_parser.add_argument("--records", type=int, default=3, help="Max ### records per filled section")
+    arg_parser.add_argument("--repeats", type=int, default=5, help="Runs per chunker (best is reported)")
+    arg_parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    arg_parser.add_argument("--output", "-o", type=Path, help="Write JSON report to this file")
+    args = arg_parser.parse_args()
+
+    documents = build_documents(args.docs, args.records, args.seed)
+    check_equivalence(documents)
+
+    size_mb = sum(len(text.encode('utf-8')) for text in documents) / (1024 * 1024)
+    chunkers: Dict[str, Callable[[str], Iterable]] = {
+        'chunk_by_headers': chunk_by_headers,
+        'iter_chunks_by_headers': iter_chunks_by_headers,
+    }
+
+    results: List[Dict] = []
+    print(f"  {len(documents)} documents, {size_mb:.1f} MB")
+    print(f"  {'Chunker':<26}{'Time ms':>10}{'Peak KB':>10}")
+
+    for name, chunker in chunkers.items():
+        elapsed_ms, peak_kb = measure(chunker, documents, args.repeats)
+        results.append({'chunker': name, 'time_ms': round(elapsed_ms, 2), 'peak_kb_50_docs': round(peak_kb, 1)})
+        print(f"  {name:<26}{elapsed_ms:>10.1f}{peak_kb:>10.1f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            config = {'docs': args.docs, 'records': args.records, 'repeats': args.repeats,
+                      'seed': args.seed, 'size_mb': round(size_mb, 2)}
+            json.dump({'config': config, 'results': results}, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
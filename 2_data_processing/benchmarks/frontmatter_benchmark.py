@@ -0,0 +1,113 @@
+"""
+Frontmatter Scanner Micro-Benchmark
+Splits multi-MB markdown texts into frontmatter + body with the former regex
+implementation and with parser.scan_frontmatter, checks both agree, and reports timings
+
+Texts are built in memory (no file I/O, no YAML parsing): this measures only
+finding the frontmatter and materializing the body.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Add core modules to path
+PROCESSING_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROCESSING_ROOT / "core"))
+
+from parser import scan_frontmatter
+
+FRONTMATTER = '---\ntitle: "היתר בנייה"\ncategory: "הנדסה"\npriority: "גבוהה"\n---\n\n'
+BODY_LINE = "- שם פרטי: יוסי | טלפון: 03-1234567 | הערה: טקסט לדוגמה בעברית\n"
+
+
+def legacy_split(text: str) -> Tuple[bool, str, str]:
+    """The regex implementation parser.py used before the scanner (reference)"""
+
+    wrapped_match = None
+    if text.startswith('```yml\n') or text.startswith('```yaml\n'):
+        text = re.sub(r'^```ya?ml\n', '', text)
+        wrapped_match = re.match(r'^(---\s*\n.*?\n---)\s*\n```\s*\n(.*)$', text, re.DOTALL)
+        if wrapped_match:
+            text = f"{wrapped_match.group(1)}\n\n{wrapped_match.group(2)}"
+
+    match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', text, re.DOTALL)
+    if not match:
+        return False, '', text
+    return True, match.group(1), match.group(2)
+
+
+def scanner_split(text: str) -> Tuple[bool, str, str]:
+    scan = scan_frontmatter(text)
+    return scan.found, scan.frontmatter, scan.body
+
+
+def build_cases(size_mb: float) -> Dict[str, str]:
+    """Texts of about size_mb each, covering the normal case and the quirks"""
+
+    body = BODY_LINE * max(1, int(size_mb * 1024 * 1024 / len(BODY_LINE.encode('utf-8'))))
+
+    return {
+        'frontmatter': FRONTMATTER + body,
+        'fenced_frontmatter': '```yaml\n' + FRONTMATTER.rstrip('\n') + '\n```\n\n' + body,
+        'no_frontmatter': '# כותרת\n\n' + body,
+        # Opening marker, never closed: the regex scans the whole body once per opening newline
+        'missing_closing_marker': '---\n\n\n\ntitle: x\n' + body,
+        # Horizontal rules that almost look like a closing marker
+        'near_miss_markers': '---\ntitle: x\n' + ('---x\n' + BODY_LINE * 20) * max(1, len(body) // (len(BODY_LINE) * 20)),
+    }
+
+
+def time_split(split: Callable[[str], Tuple], text: str, repeats: int) -> Tuple[float, Tuple]:
+    """Best of `repeats` wall times in ms"""
+
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = split(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    """Run the benchmark: frontmatter_benchmark.py [--size-mb 4] [--repeats 5] [--output FILE]"""
+
+    arg_parser = argparse.ArgumentParser(description="Frontmatter split: regex vs single-pass scanner")
+    arg_parser.add_argument("--size-mb", type=float, default=4.0, help="Approximate size of each test text")
+    arg_parser.add_argument("--repeats", type=int, default=5, help="Runs per case (best is reported)")
+    arg_parser.add_argument("--output", "-o", type=Path, help="Write JSON report to this file")
+    args = arg_parser.parse_args()
+
+    results: List[Dict] = []
+    print(f"  {'Case':<26}{'MB':>6}{'Regex ms':>12}{'Scanner ms':>12}{'Speedup':>9}")
+
+    for name, text in build_cases(args.size_mb).items():
+        legacy_ms, expected = time_split(legacy_split, text, args.repeats)
+        scanner_ms, actual = time_split(scanner_split, text, args.repeats)
+        if actual != expected:
+            raise AssertionError(f"Scanner and regex disagree on case '{name}'")
+
+        size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+        results.append({
+            'case': name,
+            'size_mb': round(size_mb, 2),
+            'regex_ms': round(legacy_ms, 3),
+            'scanner_ms': round(scanner_ms, 3),
+            'speedup': round(legacy_ms / scanner_ms, 1) if scanner_ms else None
+        })
+        print(f"  {name:<26}{size_mb:>6.1f}{legacy_ms:>12.2f}{scanner_ms:>12.2f}{legacy_ms / scanner_ms:>8.1f}x")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': {'size_mb': args.size_mb, 'repeats': args.repeats}, 'results': results}, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
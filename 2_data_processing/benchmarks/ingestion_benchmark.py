@@ -0,0 +1,231 @@
+"""
+End-to-End Ingestion Benchmark
+Runs YAML fixing → structure enforcement → parsing → chunking → validation → indexing
+on a deterministic synthetic Hebrew corpus and reports throughput as JSON.
+
+Fully offline: embeddings come from the deterministic `hash` provider.
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+# Add core modules and scripts to path
+PROCESSING_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROCESSING_ROOT / "core"))
+sys.path.insert(0, str(PROCESSING_ROOT / "scripts"))
+
+from yaml_fixer import YAMLFixer
+from parser import parse_markdown_with_frontmatter
+from parse_cache import disable_parse_cache
+from chunker import chunk_by_headers
+from validator import ChunkValidator
+from pipeline import build_chunk_text
+from batcher import ChunkBatcher
+from embeddings import HashEmbeddingProvider
+from memory_budget import peak_rss_mb
+from enforce_structure import enforce_structure, read_template_structure
+from synthetic_corpus import CorpusConfig, generate_corpus, TEMPLATE_PATH
+
+
+def _round(value, digits: int = 1):
+    return round(value, digits) if value is not None else None
+
+
+class StageTimer:
+    """Wall time and peak RSS after each stage"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict] = {}
+
+    def run(self, name: str, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[name] = {
+            'wall_seconds': round(time.perf_counter() - start, 4),
+            'peak_rss_mb': _round(peak_rss_mb())
+        }
+        return result
+
+
+def stage_yaml_fix(raw_files, fixed_dir: Path):
+    fixer = YAMLFixer()
+    fixed_dir.mkdir(parents=True, exist_ok=True)
+    corrections = 0
+    for path in raw_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            fixed, applied = fixer.fix_document(f.read())
+        corrections += len(applied)
+        with open(fixed_dir / path.name, 'w', encoding='utf-8') as f:
+            f.write(fixed)
+    return sorted(fixed_dir.glob("*.md")), corrections
+
+
+def stage_enforce(fixed_files, structured_dir: Path):
+    template_sections = read_template_structure(TEMPLATE_PATH)
+    structured_dir.mkdir(parents=True, exist_ok=True)
+    for path in fixed_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            structured, _ = enforce_structure(f.read(), template_sections)
+        with open(structured_dir / path.name, 'w', encoding='utf-8') as f:
+            f.write(structured)
+    return sorted(structured_dir.glob("*.md"))
+
+
+def stage_parse(files):
+    return [parse_markdown_with_frontmatter(path) for path in files]
+
+
+def stage_chunk(parsed_docs):
+    return [
+        chunk_by_headers(doc.content, doc.metadata.get('title', 'Overview'))
+        for doc in parsed_docs
+    ]
+
+
+def stage_validate(parsed_docs, chunked_docs):
+    validator = ChunkValidator()
+    prepared = []
+    for doc, chunks in zip(parsed_docs, chunked_docs):
+        for chunk, result in validator.validate_document(doc, chunks):
+            if result.is_valid:
+                prepared.append((
+                    f"{doc.filepath.stem}_chunk_{chunk.chunk_index}",
+                    build_chunk_text(chunk, result.document_metadata),
+                    result.enriched_metadata
+                ))
+    return prepared
+
+
+def stage_index(prepared, db_dir: Path, batch_size: int):
+    import chromadb
+    from chromadb.config import Settings
+
+    provider = HashEmbeddingProvider()
+    db_dir.mkdir(parents=True, exist_ok=True)
+    client = chromadb.PersistentClient(
+        path=str(db_dir),
+        settings=Settings(anonymized_telemetry=False)
+    )
+    collection = client.create_collection(
+        name="benchmark_docs",
+        metadata={"embedding_model": provider.model_id},
+        embedding_function=provider
+    )
+
+    with ChunkBatcher(collection, max_chunks=batch_size, embedding_function=provider) as batcher:
+        for chunk_id, text, metadata in prepared:
+            batcher.add(chunk_id, text, metadata)
+
+    return collection.count()
+
+
+def run_benchmark(config: CorpusConfig, work_dir: Path, batch_size: int, skip_index: bool) -> Dict:
+    timer = StageTimer()
+
+    raw_files = timer.run('generate_corpus', generate_corpus, work_dir / "raw", config)
+    fixed_files, corrections = timer.run('yaml_fix', stage_yaml_fix, raw_files, work_dir / "fixed")
+    structured_files = timer.run('enforce_structure', stage_enforce, fixed_files, work_dir / "structured")
+    parsed_docs = timer.run('parse', stage_parse, structured_files)
+    chunked_docs = timer.run('chunk', stage_chunk, parsed_docs)
+    prepared = timer.run('validate', stage_validate, parsed_docs, chunked_docs)
+
+    indexed = None
+    if not skip_index:
+        indexed = timer.run('index', stage_index, prepared, work_dir / "chroma", batch_size)
+
+    total_chunks = sum(len(chunks) for chunks in chunked_docs)
+    pipeline_seconds = sum(
+        stage['wall_seconds'] for name, stage in timer.stages.items() if name != 'generate_corpus'
+    )
+
+    return {
+        'config': {
+            'num_docs': config.num_docs,
+            'seed': config.seed,
+            'section_fill_rate': config.section_fill_rate,
+            'max_records': config.max_records,
+            'field_fill_rate': config.field_fill_rate,
+            'words_per_field': list(config.words_per_field),
+            'broken_yaml_rate': config.broken_yaml_rate,
+            'batch_size': batch_size,
+            'embedding_model': HashEmbeddingProvider().model_id
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'corpus_bytes': sum(path.stat().st_size for path in raw_files),
+        'docs': len(structured_files),
+        'chunks': total_chunks,
+        'valid_chunks': len(prepared),
+        'indexed_chunks': indexed,
+        'yaml_corrections': corrections,
+        'pipeline_seconds': round(pipeline_seconds, 4),
+        'docs_per_second': round(len(structured_files) / pipeline_seconds, 2) if pipeline_seconds else None,
+        'chunks_per_second': round(total_chunks / pipeline_seconds, 2) if pipeline_seconds else None,
+        'stages': timer.stages,
+        'peak_rss_mb': _round(peak_rss_mb())
+    }
+
+
+def main():
+    """Run the benchmark and print/save the JSON report"""
+
+    arg_parser = argparse.ArgumentParser(description="Offline ingestion pipeline benchmark")
+    arg_parser.add_argument("--docs", type=int, default=200, help="Number of synthetic documents")
+    arg_parser.add_argument("--seed", type=int, default=42, help="Corpus random seed")
+    arg_parser.add_argument("--section-fill-rate", type=float, default=0.8, help="Probability a section is filled")
+    arg_parser.add_argument("--max-records", type=int, default=3, help="Max ### records per filled section")
+    arg_parser.add_argument("--field-fill-rate", type=float, default=0.85, help="Probability a record field has a value")
+    arg_parser.add_argument("--min-words", type=int, default=2, help="Min words per field value")
+    arg_parser.add_argument("--max-words", type=int, default=12, help="Max words per field value")
+    arg_parser.add_argument("--broken-yaml-rate", type=float, default=0.2, help="Fraction of docs with broken YAML")
+    arg_parser.add_argument("--batch-size", type=int, default=256, help="Indexing batch size (chunks)")
+    arg_parser.add_argument("--skip-index", action="store_true", help="Skip the ChromaDB indexing stage")
+    arg_parser.add_argument("--work-dir", type=Path, help="Keep corpus and DB here (default: temp dir, deleted)")
+    arg_parser.add_argument("--output", "-o", type=Path, help="Write JSON report to this file")
+    arg_parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help="Use the on-disk parse cache (default: off, every run measures cold YAML parsing)"
+    )
+    args = arg_parser.parse_args()
+
+    if not args.parse_cache:
+        disable_parse_cache()
+
+    config = CorpusConfig(
+        num_docs=args.docs,
+        seed=args.seed,
+        section_fill_rate=args.section_fill_rate,
+        max_records=args.max_records,
+        field_fill_rate=args.field_fill_rate,
+        words_per_field=(args.min_words, args.max_words),
+        broken_yaml_rate=args.broken_yaml_rate
+    )
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="ingestion_benchmark_"))
+    try:
+        report = run_benchmark(config, work_dir, args.batch_size, args.skip_index)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report_json = json.dumps(report, ensure_ascii=False, indent=2)
+    print(report_json)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report_json + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Indexing Memory Benchmark
+Peak RSS of index_all_documents for growing synthetic corpora, in-memory vs --stream mode
+
+Each (size, mode) run happens in a fresh subprocess so peak RSS is per run.
+Chunks go to a counting sink instead of ChromaDB: this measures the pipeline's
+own memory (listing, manifest, batches, logging), not the vector index, whose
+size grows with the number of vectors in any mode.
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add core modules and scripts to path
+PROCESSING_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROCESSING_ROOT / "core"))
+sys.path.insert(0, str(PROCESSING_ROOT / "scripts"))
+
+from synthetic_corpus import CorpusConfig, generate_document, load_template_sections
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000]
+
+
+class NullCollection:
+    """Counts what would be written to ChromaDB and keeps nothing"""
+
+    name = "memory_benchmark"
+
+    def __init__(self):
+        self._count = 0
+
+    def add(self, ids, documents, metadatas, embeddings=None):
+        self._count += len(ids)
+
+    def delete(self, ids):
+        self._count -= len(ids)
+
+    def count(self) -> int:
+        return self._count
+
+
+def extend_corpus(corpus_dir: Path, num_docs: int, config: CorpusConfig, sections) -> int:
+    """Add documents until the corpus has num_docs (sizes are cumulative)"""
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    existing = sum(1 for _ in corpus_dir.glob("*.md"))
+
+    for doc_index in range(existing, num_docs):
+        path = corpus_dir / f"res_synthetic_doc_{doc_index:06d}.md"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_document(doc_index, sections, config))
+
+    return num_docs
+
+
+def run_child(corpus_dir: Path, work_dir: Path, mode: str, workers: int) -> Dict:
+    """Index corpus_dir once in this process and return the measurements"""
+
+    from indexing import index_all_documents
+    from manifest import IndexManifest, StreamingManifestWriter
+    from embeddings import HashEmbeddingProvider
+    from logger_config import StructuredLogger
+    from memory_budget import peak_rss_mb
+
+    stream = mode == 'stream'
+    manifest_path = work_dir / f"manifest_{mode}.json"
+    manifest = StreamingManifestWriter(manifest_path) if stream else IndexManifest(manifest_path)
+    structured_logger = StructuredLogger(work_dir / "logs", name=f"memory_{mode}", console_level='error')
+
+    start = time.perf_counter()
+    try:
+        stats = index_all_documents(
+            corpus_dir,
+            NullCollection(),
+            structured_logger,
+            manifest=manifest,
+            workers=workers,
+            embedding_function=HashEmbeddingProvider(),
+            stream=stream
+        )
+        manifest.save()
+    finally:
+        structured_logger.close()
+
+    return {
+        'mode': mode,
+        'docs': stats['total_files'],
+        'chunks': stats['indexed_chunks'],
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None
+    }
+
+
+def main():
+    """Run the benchmark: memory_benchmark.py [--sizes 1000,10000,...] [--output FILE]"""
+
+    arg_parser = argparse.ArgumentParser(description="Peak RSS of indexing vs corpus size")
+    arg_parser.add_argument(
+        "--sizes",
+        default=",".join(str(n) for n in DEFAULT_SIZES),
+        help="Comma-separated corpus sizes (e.g. 1000,10000,100000,500000; ~14 KB per document on disk)"
+    )
+    arg_parser.add_argument("--modes", default="batch,stream", help="Modes to compare: batch, stream")
+    arg_parser.add_argument("--workers", type=int, default=1, help="Processes for parse/chunk/validate")
+    arg_parser.add_argument("--seed", type=int, default=42, help="Corpus random seed")
+    arg_parser.add_argument("--work-dir", type=Path, help="Keep corpus here (default: temp dir, deleted)")
+    arg_parser.add_argument("--output", "-o", type=Path, help="Write JSON report to this file")
+    # Internal: one measurement in a fresh process
+    arg_parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--corpus-dir", type=Path, help=argparse.SUPPRESS)
+    arg_parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.corpus_dir, args.work_dir, args.mode, args.workers)))
+        return
+
+    # Children measure the pipeline, not warm parse-cache lookups
+    from parse_cache import disable_parse_cache
+    disable_parse_cache()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    modes = [mode.strip() for mode in args.modes.split(',')]
+    config = CorpusConfig(seed=args.seed)
+    sections = load_template_sections()
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="memory_benchmark_"))
+    corpus_dir = work_dir / "corpus"
+    results: List[Dict] = []
+
+    try:
+        for size in sizes:
+            extend_corpus(corpus_dir, size, config, sections)
+
+            for mode in modes:
+                completed = subprocess.run(
+                    [sys.executable, __file__, "--child", "--corpus-dir", str(corpus_dir),
+                     "--work-dir", str(work_dir), "--mode", mode, "--workers", str(args.workers)],
+                    capture_output=True, text=True, check=True
+                )
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(f"{size:>9} docs  {mode:<7} peak RSS {result['peak_rss_mb']:>8} MB  "
+                      f"({result['chunks']} chunks, {result['seconds']}s)")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'config': {'sizes': sizes, 'modes': modes, 'workers': args.workers, 'seed': args.seed},
+        'results': results
+    }
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Synthetic Corpus Generator
+Deterministic Hebrew handover documents following templates/input_template_hebrew.md
+"""
+
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+from dataclasses import dataclass
+
+# Paths
+PROCESSING_ROOT = Path(__file__).parent.parent
+TEMPLATE_PATH = PROCESSING_ROOT / "templates/input_template_hebrew.md"
+
+# Small fixed vocabulary - output depends only on the seed
+HEBREW_WORDS = [
+    "עירייה", "אגף", "מחלקה", "היתר", "בנייה", "רישוי", "עסק", "תקציב", "ועדה", "נוהל",
+    "תושבים", "פניות", "מערכת", "דוח", "חודשי", "שנתי", "אישור", "בקשה", "תיק", "מסמך",
+    "ספק", "חוזה", "מכרז", "הדרכה", "תכנית", "עבודה", "פיקוח", "תחזוקה", "מבנה", "תשתיות",
+    "חינוך", "רווחה", "תברואה", "ביטחון", "תנועה", "חניה", "גינון", "מים", "ביוב", "חשמל",
+    "מנהל", "רכז", "מהנדס", "יועץ", "משפטי", "כספים", "גבייה", "ארנונה", "הנחה", "ערעור",
+]
+FIRST_NAMES = ["דני", "מיכל", "יוסי", "רונית", "אבי", "שרה", "משה", "נועה", "איתי", "תמר"]
+LAST_NAMES = ["כהן", "לוי", "מזרחי", "פרץ", "ביטון", "אברהם", "פרידמן", "שפירא", "דהן", "גבאי"]
+CATEGORIES = ["רישוי והנדסה", "כספים", "חינוך", "רווחה", "תשתיות", "שירות לתושב"]
+PRIORITIES = ["גבוהה", "בינונית", "נמוכה"]
+FREQUENCIES = ["יומי", "שבועי", "חודשי", "שנתי"]
+
+
+@dataclass
+class TemplateSection:
+    """One ## section of the template with its ### record structure"""
+    name: str
+    record_label: str  # e.g. "איש קשר" (from "### איש קשר 1")
+    fields: List[str]
+
+
+@dataclass
+class CorpusConfig:
+    """Corpus shape (all values deterministic given the seed)"""
+    num_docs: int = 100
+    seed: int = 42
+    section_fill_rate: float = 0.8  # Probability a section has records
+    max_records: int = 3  # Records per filled section: 1..max_records
+    field_fill_rate: float = 0.85  # Probability a record field has a value
+    words_per_field: Tuple[int, int] = (2, 12)  # Min/max words per field value
+    broken_yaml_rate: float = 0.2  # Fraction of docs with YAML the fixer must repair
+
+
+def load_template_sections(template_path: Path = TEMPLATE_PATH) -> List[TemplateSection]:
+    """Read ## sections, ### record labels and '- field:' lines from the template"""
+
+    with open(template_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    body = re.sub(r'^---\s*\n.*?\n---\s*\n', '', content, flags=re.DOTALL)
+
+    sections = []
+    current = None
+    in_first_record = False
+
+    for line in body.split('\n'):
+        if line.startswith('## '):
+            name = line[3:].strip()
+            if name.startswith('['):
+                continue
+            current = TemplateSection(name=name, record_label='', fields=[])
+            sections.append(current)
+            in_first_record = False
+        elif line.startswith('### ') and current is not None:
+            label = re.sub(r'\s*\d+$', '', line[4:].strip())
+            if not current.record_label:
+                current.record_label = label
+                in_first_record = True
+            else:
+                in_first_record = False
+        elif line.startswith('- ') and line.rstrip().endswith(':') and current is not None and in_first_record:
+            current.fields.append(line[2:].rstrip()[:-1])
+
+    return sections
+
+
+def _words(rng: random.Random, low: int, high: int) -> str:
+    return ' '.join(rng.choice(HEBREW_WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _frontmatter(rng: random.Random, doc_index: int, title: str, broken: bool) -> str:
+    """English keys, Hebrew values - as produced by the generation prompt"""
+
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    email = f"user{doc_index}.{rng.randint(1, 99)}@city.gov.il"
+    related = f"res_synthetic_doc_{rng.randint(0, max(doc_index, 1)):03d}"
+
+    lines = [
+        f'title: "{title}"',
+        f'category: "{rng.choice(CATEGORIES)}"',
+        f'subcategory: "{_words(rng, 1, 2)}"',
+        f'priority: "{rng.choice(PRIORITIES)}"',
+        f'frequency: "{rng.choice(FREQUENCIES)}"',
+        f'cluster: "cluster_{rng.randint(1, 5)}"',
+        'shared_resources_in_this_cluster:',
+        '  contacts:',
+        f'    - name: "{first} {last}"',
+        f'      email: {email}',
+        f'related_docs: [{related}]',
+    ]
+    yaml_text = '\n'.join(lines)
+
+    if broken:
+        # Code-fence wrapper + markdown link: both repaired by YAMLFixer
+        yaml_text = yaml_text.replace(f'[{related}]', f'[{related}](http://docs/{related})')
+        return f"```yaml\n---\n{yaml_text}\n---\n```\n"
+
+    return f"---\n{yaml_text}\n---\n"
+
+
+def generate_document(doc_index: int, sections: List[TemplateSection], config: CorpusConfig) -> str:
+    """Generate one document (deterministic per seed + doc_index)"""
+
+    rng = random.Random(f"{config.seed}:{doc_index}")
+    title = f"{_words(rng, 2, 4)} {doc_index}"
+    broken = rng.random() < config.broken_yaml_rate
+
+    parts = [_frontmatter(rng, doc_index, title, broken), f"# {title}", ""]
+    low, high = config.words_per_field
+
+    for section in sections:
+        parts.append(f"## {section.name}")
+        parts.append("")
+
+        if rng.random() < config.section_fill_rate and section.fields:
+            for record_number in range(1, rng.randint(1, config.max_records) + 1):
+                parts.append(f"### {section.record_label} {record_number}")
+                for field_name in section.fields:
+                    value = _words(rng, low, high) if rng.random() < config.field_fill_rate else ""
+                    parts.append(f"- {field_name}: {value}".rstrip())
+                parts.append("")
+        else:
+            parts.append("[לא מולא]")
+            parts.append("")
+
+        parts.append("---")
+        parts.append("")
+
+    return '\n'.join(parts)
+
+
+def generate_corpus(output_dir: Path, config: CorpusConfig) -> List[Path]:
+    """Write config.num_docs documents to output_dir, returns file paths"""
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sections = load_template_sections()
+
+    paths = []
+    for doc_index in range(config.num_docs):
+        path = output_dir / f"res_synthetic_doc_{doc_index:06d}.md"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_document(doc_index, sections, config))
+        paths.append(path)
+
+    return paths
+
+
+def main():
+    """Generate a synthetic corpus: synthetic_corpus.py <output_dir> [num_docs] [seed]"""
+
+    if len(sys.argv) < 2:
+        print("Usage: python synthetic_corpus.py <output_dir> [num_docs] [seed]")
+        sys.exit(1)
+
+    config = CorpusConfig(
+        num_docs=int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        seed=int(sys.argv[3]) if len(sys.argv) > 3 else 42
+    )
+    paths = generate_corpus(Path(sys.argv[1]), config)
+    total_bytes = sum(p.stat().st_size for p in paths)
+
+    print(f"Generated {len(paths)} documents ({total_bytes / 1024 / 1024:.1f} MB) in {sys.argv[1]}")
+
+
+if __name__ == "__main__":
+    main()
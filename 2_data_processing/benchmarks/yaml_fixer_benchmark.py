@@ -0,0 +1,135 @@
+"""
+YAML Fixer Micro-Benchmark
+Runs YAMLFixer.fix_document over synthetic template documents (or a folder of
+markdown files) and reports the per-document cost, split into the fixer's steps
+
+Documents are held in memory (no file I/O). --pure-python forces PyYAML's
+Python parser and emitter, to compare with the libyaml bindings.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add core modules to path
+PROCESSING_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROCESSING_ROOT / "core"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import yaml
+import yaml_fixer
+from yaml_fixer import YAMLFixer
+from synthetic_corpus import CorpusConfig, generate_document, load_template_sections
+
+STEPS = ('extract_region', 'clean', 'parse', 'extract_fields')
+
+
+class TimedFixer(YAMLFixer):
+    """YAMLFixer that accumulates wall time per step (dump = the remainder)"""
+
+    def __init__(self):
+        super().__init__()
+        self.seconds: Dict[str, float] = {step: 0.0 for step in STEPS}
+
+    def _timed(self, step: str, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        self.seconds[step] += time.perf_counter() - start
+        return result
+
+    def _extract_yaml_region(self, content):
+        return self._timed('extract_region', super()._extract_yaml_region, content)
+
+    def _clean_yaml_text(self, yaml_text):
+        return self._timed('clean', super()._clean_yaml_text, yaml_text)
+
+    def _safe_parse_yaml(self, yaml_text):
+        return self._timed('parse', super()._safe_parse_yaml, yaml_text)
+
+    def _extract_all_fields(self, parsed, raw_yaml):
+        return self._timed('extract_fields', super()._extract_all_fields, parsed, raw_yaml)
+
+
+def load_documents(args) -> List[str]:
+    if args.input:
+        return [path.read_text(encoding='utf-8') for path in sorted(args.input.glob('*.md'))]
+
+    config = CorpusConfig(num_docs=args.docs, seed=args.seed, broken_yaml_rate=args.broken_rate)
+    sections = load_template_sections()
+    return [generate_document(doc_index, sections, config) for doc_index in range(args.docs)]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    """Run the benchmark: yaml_fixer_benchmark.py [--docs 2000] [--input DIR] [--pure-python] [--output FILE]"""
+
+    arg_parser = argparse.ArgumentParser(description="Per-document cost of YAMLFixer.fix_document")
+    arg_parser.add_argument("--docs", type=int, default=2000, help="Number of synthetic documents")
+    arg_parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    arg_parser.add_argument("--broken-rate", type=float, default=0.2, help="Fraction of synthetic docs with broken YAML")
+    arg_parser.add_argument("--input", type=Path, help="Benchmark these .md files instead of a synthetic corpus")
+    arg_parser.add_argument("--pure-python", action="store_true", help="Use PyYAML's Python parser/emitter (no libyaml)")
+    arg_parser.add_argument("--output", "-o", type=Path, help="Write JSON report to this file")
+    args = arg_parser.parse_args()
+
+    if args.pure_python:
+        yaml_fixer.SAFE_LOADER = yaml.SafeLoader
+        yaml_fixer.SAFE_DUMPER = yaml.SafeDumper
+
+    documents = load_documents(args)
+    if not documents:
+        arg_parser.error("No documents to fix")
+
+    fixer = TimedFixer()
+    per_document = []
+    corrections = 0
+    for content in documents:
+        start = time.perf_counter()
+        _, applied = fixer.fix_document(content)
+        per_document.append(time.perf_counter() - start)
+        corrections += len(applied)
+
+    total = sum(per_document)
+    steps = dict(fixer.seconds)
+    steps['dump'] = max(0.0, total - sum(steps.values()))
+
+    report = {
+        'config': {
+            'documents': len(documents),
+            'input': str(args.input) if args.input else 'synthetic',
+            'libyaml': yaml_fixer.SAFE_LOADER is not yaml.SafeLoader,
+        },
+        'total_seconds': round(total, 4),
+        'docs_per_second': round(len(documents) / total, 1) if total else None,
+        'per_document_us': {
+            'mean': round(total / len(documents) * 1e6, 1),
+            'p50': round(percentile(per_document, 0.50) * 1e6, 1),
+            'p95': round(percentile(per_document, 0.95) * 1e6, 1),
+            'max': round(max(per_document) * 1e6, 1),
+        },
+        'step_us_per_document': {step: round(seconds / len(documents) * 1e6, 1) for step, seconds in steps.items()},
+        'corrections': corrections,
+    }
+
+    print(f"  {len(documents)} documents, libyaml: {report['config']['libyaml']}")
+    print(f"  Per document: mean {report['per_document_us']['mean']} µs, "
+          f"p50 {report['per_document_us']['p50']} µs, p95 {report['per_document_us']['p95']} µs")
+    for step, micros in report['step_us_per_document'].items():
+        print(f"    {step:<16}{micros:>10.1f} µs")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
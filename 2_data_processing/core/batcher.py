@@ -0,0 +1,150 @@
+"""
+Chunk Batcher Module
+Gathers chunks across files into size-bounded batches before embedding and insert
+"""
+
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+
+class ChunkBatcher:
+    """
+    Buffers (id, document, metadata) triples and writes them to a ChromaDB
+    collection in batches. Metadata fields shared by many chunks (e.g. a
+    file's) can be passed separately and are merged in when the batch is built.
+
+    A batch is flushed when it reaches `max_chunks` chunks or `max_chars`
+    total document characters, whichever comes first. Use as a context
+    manager so the final partial batch is flushed at the end of the run,
+    and also when the run is interrupted by an error.
+
+    Counters:
+    - added_count: chunks handed to add()
+    - flushed_count: chunks successfully written to the collection
+    Chunks are written in the order they were added, so a caller can treat
+    everything added before position N as committed once flushed_count >= N.
+
+    If `embedding_function` is given (list of texts -> list of vectors), the
+    batch is embedded here and passed to collection.add(embeddings=...),
+    e.g. to serve vectors from an embedding cache.
+
+    last_timings holds the seconds spent embedding ('embed') and in
+    collection.add ('write') for the most recent batch; when ChromaDB embeds
+    itself, 'write' includes embedding.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_chunks: int = 256,
+        max_chars: int = 400_000,
+        on_flush: Optional[Callable[[List[str], List[str], List[Dict]], None]] = None,
+        embedding_function: Optional[Callable[[List[str]], List[List[float]]]] = None
+    ):
+        if max_chunks < 1:
+            raise ValueError("max_chunks must be >= 1")
+
+        self.collection = collection
+        self.max_chunks = max_chunks
+        self.max_chars = max_chars
+        self.on_flush = on_flush
+        self.embedding_function = embedding_function
+
+        self.added_count = 0
+        self.flushed_count = 0
+        self.batch_count = 0
+        self.last_timings: Dict[str, float] = {}
+
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Tuple[Optional[Mapping], Dict]] = []  # (shared, chunk's own)
+        self._chars = 0
+
+    def __len__(self) -> int:
+        """Number of chunks waiting to be flushed"""
+        return len(self._ids)
+
+    def add(self, chunk_id: str, document: str, metadata: Dict, shared_metadata: Optional[Mapping] = None):
+        """
+        Queue one chunk, flushing first if it would overflow the char budget
+        shared_metadata: fields written before metadata's (not copied until the flush)
+        """
+
+        if self._ids and self._chars + len(document) > self.max_chars:
+            self.flush()
+
+        self._ids.append(chunk_id)
+        self._documents.append(document)
+        self._metadatas.append((shared_metadata, metadata))
+        self._chars += len(document)
+        self.added_count += 1
+
+        if len(self._ids) >= self.max_chunks or self._chars >= self.max_chars:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all pending chunks in one collection.add call
+
+        Pending chunks are taken off the buffer before writing, so a failed
+        write is never retried by a later flush.
+
+        Returns: number of chunks written
+        """
+
+        if not self._ids:
+            return 0
+
+        ids, documents = self._ids, self._documents
+        metadatas = [{**shared, **own} if shared else own for shared, own in self._metadatas]
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._chars = 0
+
+        timings = {}
+
+        if self.embedding_function:
+            start = time.perf_counter()
+            embeddings = self.embedding_function(documents)
+            timings['embed'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            self.collection.add(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings
+            )
+        else:
+            start = time.perf_counter()
+            self.collection.add(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas
+            )
+        timings['write'] = time.perf_counter() - start
+        self.last_timings = timings
+
+        self.flushed_count += len(ids)
+        self.batch_count += 1
+
+        if self.on_flush:
+            self.on_flush(ids, documents, metadatas)
+
+        return len(ids)
+
+    def __enter__(self) -> "ChunkBatcher":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+            return False
+
+        # Flush whatever was fully prepared, even when the run failed midway - but a
+        # failing write (e.g. the same embedding outage) must not hide the original error
+        try:
+            self.flush()
+        except Exception as flush_error:
+            if hasattr(exc_value, 'add_note'):
+                exc_value.add_note(f"Flushing the final batch also failed: {flush_error!r}")
+        return False
@@ -0,0 +1,205 @@
+"""
+Checkpoint Journal Module
+Crash-safe record of the files already written to a collection under construction,
+so an interrupted full rebuild can resume instead of starting over
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal for one build
+
+    Format (one JSON object per line):
+    {"version": 2, "collection": "municipality_docs__...", "embedding_model": "...", "dedup_threshold": 0.9, "started": "..."}
+    {"file": "res_building_permit_001.md", "hash": "...", "chunk_ids": ["..."], "signatures": ["..."], "aliases": {...}}
+    {"event": "alias_metadata"}
+
+    File lines are buffered by record() and written + fsynced by commit(), which the
+    indexer calls after each batch is in the collection. A torn last line (crash
+    mid-write) is ignored on load. With dedup on, "signatures" holds the MinHash
+    (dedup.encode_signature) of each chunk in chunk_ids, so a resumed run can put
+    the skipped files' chunks back into its NearDuplicateIndex.
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: Path, collection: str, embedding_model: str, dedup_threshold: Optional[float] = None):
+        self.path = Path(path)
+        self.collection = collection
+        self.embedding_model = embedding_model
+        self.dedup_threshold = dedup_threshold
+        # Filled by load() only; entries recorded during a run are not kept in memory
+        self.entries: Dict[str, Dict] = {}
+        self.alias_metadata_applied = False
+        self._pending: List[str] = []
+        self._file = None
+
+    @classmethod
+    def start(cls, path: Path, collection: str, embedding_model: str,
+              dedup_threshold: Optional[float] = None) -> "CheckpointJournal":
+        """Begin a new journal (replaces any previous one)"""
+
+        journal = cls(path, collection, embedding_model, dedup_threshold)
+        journal.path.parent.mkdir(parents=True, exist_ok=True)
+        journal._file = open(journal.path, 'w', encoding='utf-8')
+        journal._pending.append(json.dumps({
+            'version': cls.VERSION,
+            'collection': collection,
+            'embedding_model': embedding_model,
+            'dedup_threshold': dedup_threshold,
+            'started': datetime.now().isoformat()
+        }, ensure_ascii=False))
+        journal.commit()
+        return journal
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["CheckpointJournal"]:
+        """Reopen an existing journal for appending (None if missing or unreadable)"""
+
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+
+        try:
+            header = json.loads(lines[0])
+        except (json.JSONDecodeError, IndexError):
+            return None
+        if header.get('version') != cls.VERSION:
+            return None
+
+        journal = cls(path, header['collection'], header.get('embedding_model', ''), header.get('dedup_threshold'))
+        valid_length = len(lines[0].encode('utf-8')) + 1
+
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break  # Torn write - everything after it is lost
+            valid_length += len(line.encode('utf-8')) + 1
+
+            if record.get('event') == 'alias_metadata':
+                journal.alias_metadata_applied = True
+            elif 'file' in record:
+                filename = record.pop('file')
+                journal.entries[filename] = record
+
+        # Drop the torn tail so appended lines start on a fresh line
+        size = os.path.getsize(path)
+        with open(path, 'r+b') as f:
+            f.truncate(min(valid_length, size))
+        journal._file = open(path, 'a', encoding='utf-8')
+        if valid_length > size:
+            journal._file.write('\n')
+        return journal
+
+    def record(self, filename: str, file_hash: str, chunk_ids: List[str], aliases: Optional[Dict[str, str]] = None,
+               signatures: Optional[List[Optional[str]]] = None):
+        """Buffer a file whose chunks have all been written (signatures: one per chunk ID, or None)"""
+
+        record = {'file': filename, 'hash': file_hash, 'chunk_ids': list(chunk_ids)}
+        if signatures is not None:
+            record['signatures'] = list(signatures)
+        if aliases:
+            record['aliases'] = dict(aliases)
+        self._pending.append(json.dumps(record, ensure_ascii=False))
+
+    def mark_alias_metadata(self):
+        """Record that near-duplicate metadata was written to the representatives"""
+        self._pending.append(json.dumps({'event': 'alias_metadata'}))
+        self.commit()
+
+    def commit(self):
+        """Write buffered lines and fsync (no-op if nothing is buffered)"""
+
+        if not self._pending:
+            return
+        self._file.write('\n'.join(self._pending) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = []
+
+    def close(self):
+        """Commit and close; the journal stays on disk for --resume"""
+        if self._file and not self._file.closed:
+            self.commit()
+            self._file.close()
+
+    def remove(self):
+        """Delete the journal (build finished and published)"""
+        if self._file and not self._file.closed:
+            self._file.close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+@dataclass
+class Reconciliation:
+    """Outcome of checking a journal against its collection"""
+    entries: Dict[str, Dict] = field(default_factory=dict)  # Verified: safe to skip
+    dropped_files: List[str] = field(default_factory=list)  # Journaled but incomplete in the collection
+    orphan_ids: List[str] = field(default_factory=list)  # In the collection, not journaled (deleted)
+
+
+def reconcile(collection, journal: CheckpointJournal, batch_size: int = 1000) -> Reconciliation:
+    """
+    Verify journaled files against the collection and remove unjournaled chunks
+
+    A file is kept only if all its chunk IDs are found by collection.get(ids=...)
+    and every representative its aliases point to is kept too. Chunks that are in
+    the collection without a kept journal entry (e.g. the batch written just before
+    the crash) are deleted, so re-indexing their files can add them again.
+    """
+
+    result = Reconciliation()
+    entries = dict(journal.entries)
+
+    all_ids = [chunk_id for entry in entries.values() for chunk_id in entry['chunk_ids']]
+    found = set()
+    for start in range(0, len(all_ids), batch_size):
+        found.update(collection.get(ids=all_ids[start:start + batch_size], include=[])['ids'])
+
+    kept_ids = set()
+    for filename in sorted(entries):
+        entry = entries[filename]
+        if all(chunk_id in found for chunk_id in entry['chunk_ids']):
+            kept_ids.update(entry['chunk_ids'])
+        else:
+            result.dropped_files.append(filename)
+            del entries[filename]
+
+    # Aliases of dropped representatives would point at chunks that are about to go
+    while True:
+        orphaned = [
+            filename for filename, entry in entries.items()
+            if any(rep not in kept_ids for rep in entry.get('aliases', {}).values())
+        ]
+        if not orphaned:
+            break
+        for filename in orphaned:
+            kept_ids.difference_update(entries.pop(filename)['chunk_ids'])
+            result.dropped_files.append(filename)
+
+    # Page through IDs only, then delete (deleting while paging shifts offsets)
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=batch_size, offset=offset)['ids']
+        if not page:
+            break
+        result.orphan_ids.extend(chunk_id for chunk_id in page if chunk_id not in kept_ids)
+        offset += len(page)
+
+    for start in range(0, len(result.orphan_ids), batch_size):
+        collection.delete(ids=result.orphan_ids[start:start + batch_size])
+
+    result.entries = entries
+    return result
@@ -1,10 +1,14 @@
 """
 Document Chunker Module
-Splits markdown content into semantic chunks by headers
+Splits markdown content into semantic chunks by headers, or (chunk_by_tokens)
+into size-aware chunks within a token budget, or (chunk_hierarchy) into
+"###" record chunks linked to their "##" parent section, or (chunk_records)
+into one compact chunk per "- field: value" template record
 """
 
 import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple, Union
 from dataclasses import dataclass
 
 
@@ -15,6 +19,9 @@ class Chunk:
     content: str
     chunk_index: int
     chunk_type: str = "section"
+    header_path: str = ""  # "Title > Section > Subsection" (chunk_by_tokens, chunk_hierarchy)
+    parent_index: Optional[int] = None  # chunk_index of the parent chunk (chunk_hierarchy children)
+    fields: Optional[Dict[str, str]] = None  # Filled "- field: value" lines (chunk_records records)
 
 
 def chunk_by_headers(markdown_content: str, default_header: str = "Overview") -> List[Chunk]:
@@ -89,6 +96,625 @@ def chunk_by_headers(markdown_content: str, default_header: str = "Overview") ->
     return chunks
 
 
+# Same split as chunk_by_headers; a header on the very first line is matched separately
+# (an "\A" alternative would stop the regex engine from searching for the "\n" literal).
+# Kept as a regex rather than a line-by-line scan: "\s+" can run across blank lines
+# ("#\n\nfoo" is one header) and each match consumes the newline a directly following
+# header would need, so a line scanner has to re-implement both to give the same
+# chunks - and a Python loop over lines is ~4x slower than finditer's C-level search.
+HEADER_SPLIT_PATTERN = re.compile(r'\n(#{1,3}\s+.+)\n')
+FIRST_LINE_HEADER_PATTERN = re.compile(r'(#{1,3}\s+.+)\n')
+
+
+class LazyChunk:
+    """
+    Chunk backed by (start, end) offsets into the source text
+    Same attributes as Chunk; header/content strings are built on first access.
+    """
+
+    __slots__ = ('source', 'header_span', 'content_span', 'chunk_index', 'chunk_type', '_header', '_content')
+
+    header_path = ""
+    parent_index = None
+    fields = None
+
+    def __init__(
+        self,
+        source: str,
+        header_span: Optional[Tuple[int, int]],
+        content_span: Tuple[int, int],
+        chunk_index: int,
+        default_header: str
+    ):
+        self.source = source
+        self.header_span = header_span  # None: default header (content before the first header)
+        self.content_span = content_span
+        self.chunk_index = chunk_index
+        self.chunk_type = 'section'
+        self._header = default_header if header_span is None else None
+        self._content = None
+
+    @property
+    def header(self) -> str:
+        if self._header is None:
+            self._header = self.source[self.header_span[0]:self.header_span[1]]
+        return self._header
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = self.source[self.content_span[0]:self.content_span[1]]
+        return self._content
+
+    def to_chunk(self) -> Chunk:
+        return Chunk(header=self.header, content=self.content, chunk_index=self.chunk_index, chunk_type=self.chunk_type)
+
+    def __repr__(self) -> str:
+        return f"LazyChunk(chunk_index={self.chunk_index}, header_span={self.header_span}, content_span={self.content_span})"
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Offsets of text[start:end].strip()"""
+
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def iter_chunks_by_headers(markdown_content: str, default_header: str = "Overview") -> Iterator[LazyChunk]:
+    """
+    Lazily chunk markdown content by headers, without copying it
+
+    Yields the same chunks as chunk_by_headers (including its quirks, e.g. a
+    section starting with "#" is taken as a header), except that a header on the
+    first line is recognized - chunk_by_headers("\n" + markdown_content).
+    """
+
+    text = markdown_content
+    header_span = None
+    pending = None  # Content span waiting for the next header
+    chunk_index = 0
+    position = 0
+
+    def pieces():
+        # (start, end) of what re.split would return: text, header, text, header, ..., text
+        nonlocal position
+        first = FIRST_LINE_HEADER_PATTERN.match(text)
+        if first:
+            yield first.span(1)
+            position = first.end()
+        for match in HEADER_SPLIT_PATTERN.finditer(text, position):
+            yield position, match.start()
+            yield match.span(1)
+            position = match.end()
+        yield position, len(text)
+
+    for start, end in pieces():
+        start, end = _strip_span(text, start, end)
+        if start == end:
+            continue
+
+        if text[start] == '#':
+            if pending:
+                yield LazyChunk(text, header_span, pending, chunk_index, default_header)
+                chunk_index += 1
+                pending = None
+            header_span = (start, end)
+        else:
+            # Pieces alternate, so at most one content piece is pending
+            pending = (start, end)
+
+    if pending:
+        yield LazyChunk(text, header_span, pending, chunk_index, default_header)
+
+
+# Size-aware chunking
+
+HEADER_LINE_PATTERN = re.compile(r'^(#{1,3})\s+(.+?)\s*$')
+LIST_ITEM_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s')
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+CHUNKING_HEADERS = "headers"  # Collection metadata value for chunk_by_headers
+CHUNKING_HIERARCHY = "hierarchy"  # ... for chunk_hierarchy
+CHUNKING_RECORDS = "records"  # ... for chunk_records
+
+TokenCounter = Callable[[str], int]
+
+# (level, header line, header text)
+HeaderPathEntry = Tuple[int, str, str]
+
+
+def approximate_token_count(text: str) -> int:
+    """Words + punctuation marks (no model needed; close to subword counts for prose)"""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+_token_counters: Dict[str, TokenCounter] = {}
+
+
+def load_token_counter(spec: str = "approx", cache_size: int = 65536) -> TokenCounter:
+    """
+    Token counting function, loaded once per process and memoized per text
+    (template boilerplate repeats across documents)
+
+    spec:
+    - "approx": approximate_token_count
+    - "hf:<model>": the model's Hugging Face tokenizer (transformers, installed
+      with sentence-transformers), e.g. "hf:intfloat/multilingual-e5-small"
+    """
+
+    counter = _token_counters.get(spec)
+    if counter is not None:
+        return counter
+
+    if spec == "approx":
+        count = approximate_token_count
+    elif spec.startswith("hf:"):
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(spec[3:])
+
+        def count(text: str) -> int:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+    else:
+        raise ValueError(f"Unknown tokenizer '{spec}' (use 'approx' or 'hf:<model>')")
+
+    counter = _token_counters[spec] = lru_cache(maxsize=cache_size)(count)
+    return counter
+
+
+@dataclass(frozen=True)
+class ChunkBudget:
+    """Token budget for chunk_by_tokens (picklable, passed to worker processes)"""
+    target_tokens: int = 350
+    min_tokens: int = 80  # Smaller sections are merged with their neighbours
+    max_tokens: int = 512  # Hard limit (embedding model input size)
+    overlap_tokens: int = 0  # Repeated between consecutive parts of a split section
+    tokenizer: str = "approx"
+
+    def __post_init__(self):
+        if not 0 < self.min_tokens <= self.target_tokens <= self.max_tokens:
+            raise ValueError("Chunk budget needs 0 < min <= target <= max tokens")
+        if not 0 <= self.overlap_tokens < self.target_tokens:
+            raise ValueError("Chunk overlap must be smaller than the target size")
+
+    def describe(self) -> str:
+        """Stable descriptor, stored in the collection metadata"""
+        return (f"tokens:{self.target_tokens}/{self.min_tokens}/{self.max_tokens}/"
+                f"{self.overlap_tokens}:{self.tokenizer}")
+
+    @classmethod
+    def parse(cls, descriptor: Optional[str]) -> Optional["ChunkBudget"]:
+        """Inverse of describe(); None for header chunking (or no descriptor)"""
+
+        if not descriptor or descriptor == CHUNKING_HEADERS:
+            return None
+        sizes, tokenizer = descriptor[len("tokens:"):].split(':', 1)
+        target, minimum, maximum, overlap = (int(value) for value in sizes.split('/'))
+        return cls(target, minimum, maximum, overlap, tokenizer)
+
+
+@dataclass(frozen=True)
+class HierarchyChunking:
+    """Select chunk_hierarchy (no settings)"""
+
+    def describe(self) -> str:
+        return CHUNKING_HIERARCHY
+
+
+@dataclass(frozen=True)
+class RecordChunking:
+    """Select chunk_records (no settings)"""
+
+    def describe(self) -> str:
+        return CHUNKING_RECORDS
+
+
+# None = chunk_by_headers
+Chunking = Union[ChunkBudget, HierarchyChunking, RecordChunking]
+
+
+def chunking_descriptor(chunking: Optional[Chunking]) -> str:
+    return chunking.describe() if chunking else CHUNKING_HEADERS
+
+
+def parse_chunking(descriptor: Optional[str]) -> Optional[Chunking]:
+    """Chunking from a collection metadata descriptor (None = by headers)"""
+
+    if descriptor == CHUNKING_HIERARCHY:
+        return HierarchyChunking()
+    if descriptor == CHUNKING_RECORDS:
+        return RecordChunking()
+    return ChunkBudget.parse(descriptor)
+
+
+@dataclass
+class _Section:
+    """Blocks (paragraphs, lists, code blocks) under one header"""
+    path: Tuple[HeaderPathEntry, ...]  # Headers from the top level down to this section
+    blocks: List[str]
+
+
+@dataclass
+class _Unit:
+    """One or more sections (or one part of a split section) that become one chunk"""
+    path: Tuple[HeaderPathEntry, ...]  # Common header path of all members
+    members: List[_Section]
+    tokens: int
+    chunk_type: str
+
+
+def _parse_sections(markdown_content: str) -> List[_Section]:
+    """Split into sections at # - ### header lines (not inside code fences)"""
+
+    sections = [_Section((), [])]
+    paragraph: List[str] = []
+    in_fence = False
+
+    def end_paragraph():
+        text = '\n'.join(paragraph).strip()
+        if text:
+            sections[-1].blocks.append(text)
+        paragraph.clear()
+
+    for line in markdown_content.split('\n'):
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+
+        match = None if in_fence else HEADER_LINE_PATTERN.match(line)
+        if match:
+            end_paragraph()
+            level = len(match.group(1))
+            path = tuple(entry for entry in sections[-1].path if entry[0] < level)
+            sections.append(_Section(path + ((level, line.strip(), match.group(2)),), []))
+        elif not line.strip() and not in_fence:
+            end_paragraph()
+        else:
+            paragraph.append(line)
+
+    end_paragraph()
+    return sections
+
+
+def _split_block(block: str, count: TokenCounter, limit: int) -> List[str]:
+    """Split a block over limit tokens at list items, then lines, then words"""
+
+    if count(block) <= limit:
+        return [block]
+
+    lines = block.split('\n')
+    if len(lines) > 1:
+        is_list = any(LIST_ITEM_PATTERN.match(line) for line in lines)
+        items: List[str] = []
+        for line in lines:
+            # Continuation lines stay with their list item
+            if items and is_list and not LIST_ITEM_PATTERN.match(line):
+                items[-1] += '\n' + line
+            else:
+                items.append(line)
+        if len(items) > 1:
+            return [piece for item in items for piece in _split_block(item, count, limit)]
+
+    pieces: List[str] = []
+    words: List[str] = []
+    tokens = 0
+    for word in block.split(' '):
+        word_tokens = count(word)
+        if words and tokens + word_tokens > limit:
+            pieces.append(' '.join(words))
+            words, tokens = [], 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        pieces.append(' '.join(words))
+    return pieces
+
+
+def _common_path(a: Tuple, b: Tuple) -> Tuple:
+    length = 0
+    while length < min(len(a), len(b)) and a[length] == b[length]:
+        length += 1
+    return a[:length]
+
+
+def _section_units(section: _Section, budget: ChunkBudget, count: TokenCounter) -> List[_Unit]:
+    """The whole section, or parts of about target_tokens if it is over max_tokens"""
+
+    header_tokens = count(section.path[-1][1]) if section.path else 0
+    block_tokens = [count(block) for block in section.blocks]
+    total = header_tokens + sum(block_tokens)
+    if total <= budget.max_tokens:
+        return [_Unit(section.path, [section], total, 'section')]
+
+    limit = max(budget.max_tokens - header_tokens, 1)
+    target = max(budget.target_tokens - header_tokens, 1)
+    items = []
+    for block, tokens in zip(section.blocks, block_tokens):
+        if tokens <= limit:
+            items.append((block, tokens))
+        else:
+            items.extend((piece, count(piece)) for piece in _split_block(block, count, limit))
+
+    parts: List[List[Tuple[str, int]]] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    for block, tokens in items:
+        if current and current_tokens + tokens > target:
+            parts.append(current)
+            # Start the next part with the previous part's last blocks (up to overlap_tokens)
+            overlap: List[Tuple[str, int]] = []
+            overlap_tokens = 0
+            for previous in reversed(current[1:]):
+                if overlap_tokens + previous[1] > budget.overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_tokens += previous[1]
+            if overlap_tokens + tokens > limit:
+                overlap, overlap_tokens = [], 0
+            current, current_tokens = overlap, overlap_tokens
+        current.append((block, tokens))
+        current_tokens += tokens
+    if current:
+        parts.append(current)
+
+    return [
+        _Unit(section.path, [_Section(section.path, [block for block, _ in part])],
+              header_tokens + sum(tokens for _, tokens in part), 'part')
+        for part in parts
+    ]
+
+
+def _merged(unit: _Unit, other: _Unit, budget: ChunkBudget, count: TokenCounter) -> Optional[_Unit]:
+    """unit + other as one chunk under their common parent header, or None if not allowed"""
+
+    # Parts of a split section are already full; only a small section may join the last one
+    if other.chunk_type == 'part' or (unit.chunk_type == 'part' and other.tokens >= budget.min_tokens):
+        return None
+
+    small = unit.tokens < budget.min_tokens or other.tokens < budget.min_tokens
+    path = _common_path(unit.path, other.path)
+    if not path and not small:
+        return None  # Different top-level sections
+
+    # The common parent header becomes the chunk header; count it unless it is a member's own
+    tokens = unit.tokens + other.tokens
+    if path and path not in (member.path for member in unit.members):
+        tokens += count(path[-1][1])
+
+    if tokens > budget.max_tokens or (tokens > budget.target_tokens and not small):
+        return None
+    return _Unit(path, unit.members + other.members, tokens, 'merged')
+
+
+def chunk_by_tokens(
+    markdown_content: str,
+    default_header: str = "Overview",
+    budget: Optional[ChunkBudget] = None,
+    count_tokens: Optional[TokenCounter] = None
+) -> List[Chunk]:
+    """
+    Chunk markdown content into chunks of about budget.target_tokens
+
+    - Adjacent sections are merged while the result fits the target (small
+      sections, under min_tokens, up to max_tokens), under their common parent
+      header; merged subsections keep their header lines in the content
+    - Sections over max_tokens are split at paragraph / list item boundaries
+      (lines, then words, if a single block is too large), each part repeating
+      up to overlap_tokens of the previous part's last blocks
+    - header_path records the full header hierarchy of each chunk
+
+    Args:
+        markdown_content: The markdown text to chunk
+        default_header: Header to use for content before first header
+        budget: Token budget (default: ChunkBudget())
+        count_tokens: Token counting function (default: load_token_counter(budget.tokenizer))
+    """
+
+    budget = budget or ChunkBudget()
+    count = count_tokens or load_token_counter(budget.tokenizer)
+
+    units: List[_Unit] = []
+    for section in _parse_sections(markdown_content):
+        if not section.blocks and not section.path:
+            continue
+        for unit in _section_units(section, budget, count):
+            merged = _merged(units[-1], unit, budget, count) if units else None
+            if merged:
+                units[-1] = merged
+            else:
+                units.append(unit)
+
+    chunks = []
+    for unit in units:
+        parts = []
+        for member in unit.members:
+            # Headers below the chunk header stay in the content
+            if member.path != unit.path:
+                parts.append(member.path[-1][1])
+            parts.extend(member.blocks)
+
+        content = '\n\n'.join(parts)
+        if not content:
+            continue
+
+        chunks.append(Chunk(
+            header=unit.path[-1][1] if unit.path else default_header,
+            content=content,
+            chunk_index=len(chunks),
+            chunk_type=unit.chunk_type,
+            header_path=' > '.join(entry[2] for entry in unit.path)
+        ))
+
+    return chunks
+
+
+
+def chunk_hierarchy(markdown_content: str, default_header: str = "Overview") -> List[Chunk]:
+    """
+    Chunk markdown content into records linked to their section
+
+    A "##" section with "###" subsections (e.g. "### איש קשר 1" records) becomes:
+    - a 'parent' chunk: the whole section, for context at query time
+    - a 'child' chunk per "###" record (plus one for text before the first
+      record), with parent_index pointing at the parent chunk
+    Everything else becomes a 'section' chunk, as in chunk_by_headers.
+    Children are what queries should match; parents are fetched by ID to expand them.
+    """
+
+    chunks: List[Chunk] = []
+
+    def add(section: _Section, chunk_type: str, content: str, parent_index: Optional[int] = None):
+        if not content:
+            return None
+        chunks.append(Chunk(
+            header=section.path[-1][1] if section.path else default_header,
+            content=content,
+            chunk_index=len(chunks),
+            chunk_type=chunk_type,
+            header_path=' > '.join(entry[2] for entry in section.path),
+            parent_index=parent_index
+        ))
+        return len(chunks) - 1
+
+    sections = _parse_sections(markdown_content)
+    i = 0
+    while i < len(sections):
+        section = sections[i]
+        depth = len(section.path)
+
+        # Subsections of a "##" section follow it, with its path as prefix
+        end = i + 1
+        if section.path and section.path[-1][0] == 2:
+            while end < len(sections) and sections[end].path[:depth] == section.path and len(sections[end].path) > depth:
+                end += 1
+
+        children = sections[i + 1:end]
+        if not children:
+            add(section, 'section', '\n\n'.join(section.blocks))
+            i += 1
+            continue
+
+        parts = list(section.blocks)
+        for child in children:
+            parts.append(child.path[-1][1])
+            parts.extend(child.blocks)
+        parent_index = add(section, 'parent', '\n\n'.join(parts))
+
+        add(section, 'child', '\n\n'.join(section.blocks), parent_index)
+        for child in children:
+            add(child, 'child', '\n\n'.join(child.blocks), parent_index)
+        i = end
+
+    return chunks
+
+
+# Template records
+
+# "- field: value" at the start of a line ("- see http://..." is not a field)
+RECORD_FIELD_PATTERN = re.compile(r'^[-*+]\s+([^:\n]+?)\s*:(?!//)\s*(.*?)\s*$')
+# Unfilled template text: "[לא מולא]", "[חזור על המבנה...]", "[Repeat structure...]"
+PLACEHOLDER_PATTERN = re.compile(r'^\[[^\[\]]*\]$')
+THEMATIC_BREAK_PATTERN = re.compile(r'^(?:-{3,}|\*{3,}|_{3,})$')
+RECORD_LABEL_PATTERN = re.compile(r'^(.*?)\s*(\d+)$')
+
+
+def _record_content(blocks: List[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Compact text and filled fields of a section's blocks
+
+    Fields without a value, placeholders and horizontal rules are dropped.
+    Indented or list lines after a field continue its value (e.g. numbered steps);
+    other text is kept as is.
+    """
+
+    lines: List[str] = []
+    fields: Dict[str, str] = {}
+    field_name = None
+
+    for line in '\n'.join(blocks).split('\n'):
+        stripped = line.strip()
+        if not stripped or PLACEHOLDER_PATTERN.match(stripped) or THEMATIC_BREAK_PATTERN.match(stripped):
+            continue
+
+        match = RECORD_FIELD_PATTERN.match(line)
+        if match:
+            field_name, value = match.groups()
+            if value and not PLACEHOLDER_PATTERN.match(value):
+                fields[field_name] = value
+                lines.append(f"{field_name}: {value}")
+        elif field_name and (line[0].isspace() or LIST_ITEM_PATTERN.match(line)):
+            # "- steps:" with the value on the following lines
+            if field_name not in fields:
+                fields[field_name] = stripped
+                lines.append(f"{field_name}:")
+            else:
+                fields[field_name] += '\n' + stripped
+            lines.append(line.rstrip())
+        else:
+            field_name = None
+            lines.append(line.rstrip())
+
+    return '\n'.join(lines), fields
+
+
+def record_label(header: str) -> Tuple[str, Optional[int]]:
+    """("איש קשר", 1) from "### איש קשר 1"; (label, None) when unnumbered"""
+
+    label = header.lstrip('#').strip()
+    match = RECORD_LABEL_PATTERN.match(label)
+    if match and match.group(1):
+        return match.group(1), int(match.group(2))
+    return label, None
+
+
+def chunk_records(markdown_content: str, default_header: str = "Overview") -> List[Chunk]:
+    """
+    Chunk template documents into one chunk per record
+
+    A "###" section with "- field: value" lines (e.g. "### איש קשר 1") becomes a
+    'record' chunk holding only its filled fields ("field: value" lines), with the
+    fields in chunk.fields. Other sections become 'section' chunks. Empty fields,
+    placeholders ("[לא מולא]") and horizontal rules are dropped, and so are
+    sections left with nothing.
+    """
+
+    chunks: List[Chunk] = []
+
+    for section in _parse_sections(markdown_content):
+        content, fields = _record_content(section.blocks)
+        if not content:
+            continue
+
+        is_record = bool(fields) and bool(section.path) and section.path[-1][0] == 3
+        chunks.append(Chunk(
+            header=section.path[-1][1] if section.path else default_header,
+            content=content,
+            chunk_index=len(chunks),
+            chunk_type='record' if is_record else 'section',
+            header_path=' > '.join(entry[2] for entry in section.path),
+            fields=fields if is_record else None
+        ))
+
+    return chunks
+
+
+def chunk_document(
+    markdown_content: str,
+    default_header: str,
+    chunking: Optional[Chunking] = None
+) -> Iterable[Union[Chunk, LazyChunk]]:
+    """Chunk with the selected strategy (None = by headers, lazily: iter_chunks_by_headers)"""
+
+    if isinstance(chunking, HierarchyChunking):
+        return chunk_hierarchy(markdown_content, default_header)
+    if isinstance(chunking, RecordChunking):
+        return chunk_records(markdown_content, default_header)
+    if isinstance(chunking, ChunkBudget):
+        return chunk_by_tokens(markdown_content, default_header, chunking)
+    return iter_chunks_by_headers(markdown_content, default_header)
+
+
 def main():
     """Test the chunker on sample markdown"""
     import sys
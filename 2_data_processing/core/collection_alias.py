@@ -0,0 +1,190 @@
+"""
+Collection Alias Module
+Blue/green ChromaDB collections behind a stable alias name
+
+Indexing builds into a new versioned collection (e.g. municipality_docs__20241118_190000_000000),
+validates it, then atomically repoints the alias. Readers resolve the alias, so they
+never see a half-built collection. Writers that update the live collection in place
+hold AliasLock, so a rebuild can't switch the alias or delete a generation under them.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+ALIAS_FILENAME = "collection_aliases.json"
+LOCK_FILENAME = "collection_aliases.lock"
+GENERATION_SEPARATOR = "__"
+
+
+def generation_name(alias: str, timestamp: Optional[datetime] = None) -> str:
+    """
+    Versioned collection name for a new build, e.g. municipality_docs__20241118_190000_000000
+    Names sort chronologically; microseconds keep back-to-back builds distinct.
+    """
+    timestamp = timestamp or datetime.now()
+    return f"{alias}{GENERATION_SEPARATOR}{timestamp.strftime('%Y%m%d_%H%M%S_%f')}"
+
+
+def _alias_path(db_path: Path) -> Path:
+    return Path(db_path) / ALIAS_FILENAME
+
+
+def _read_aliases(db_path: Path) -> dict:
+    path = _alias_path(db_path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def read_alias(db_path: Path, alias: str) -> Optional[str]:
+    """Collection name the alias points to, or None if the alias was never set"""
+    entry = _read_aliases(db_path).get(alias)
+    return entry.get('collection') if entry else None
+
+
+def resolve_collection_name(db_path: Path, alias: str) -> str:
+    """
+    Collection to read for an alias
+
+    Falls back to the alias itself for databases indexed before aliases existed.
+    """
+    return read_alias(db_path, alias) or alias
+
+
+def write_alias(db_path: Path, alias: str, collection_name: str):
+    """Point alias at collection_name (atomic: temp file + fsync + rename)"""
+
+    aliases = _read_aliases(db_path)
+    previous = aliases.get(alias, {}).get('collection')
+
+    aliases[alias] = {
+        'collection': collection_name,
+        'previous': previous,
+        'updated': datetime.now().isoformat()
+    }
+
+    path = _alias_path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(aliases, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+class AliasLock:
+    """
+    Exclusive, blocking lock file next to the alias file (shared by processes)
+
+    Held by full rebuilds while they switch the alias and delete old generations,
+    and by in-place writers (incremental runs, watch batches) from reading the
+    alias until their writes are done. Re-entrant within one AliasLock object;
+    released automatically if the process dies.
+    """
+
+    def __init__(self, db_path: Path):
+        self.path = Path(db_path) / LOCK_FILENAME
+        self._file = None
+        self._depth = 0
+
+    def acquire(self):
+        self._depth += 1
+        if self._depth > 1:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue  # LK_LOCK gives up after ~10 s: keep waiting
+        except BaseException:
+            self._file.close()
+            self._file = None
+            self._depth = 0
+            raise
+
+    def release(self):
+        """Release one acquire() (no-op if not held)"""
+
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth:
+            return
+
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._depth > 0
+
+    def __enter__(self) -> "AliasLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+def list_generations(client, alias: str) -> List[str]:
+    """All versioned collections for an alias, oldest first"""
+
+    prefix = f"{alias}{GENERATION_SEPARATOR}"
+    names = [collection.name for collection in client.list_collections()]
+    return sorted(name for name in names if name.startswith(prefix))
+
+
+def garbage_collect_generations(client, alias: str, keep: List[str]) -> List[str]:
+    """
+    Delete every generation of an alias except the ones in `keep`
+
+    Callers keep the live collection and usually the previously live one
+    (readers that resolved the alias before the switch can finish, and the
+    previous build stays available for rollback). Leftovers of failed builds
+    and a legacy collection named exactly like the alias are removed.
+
+    Returns: names of deleted collections
+    """
+
+    doomed = [name for name in list_generations(client, alias) if name not in keep]
+
+    names = [collection.name for collection in client.list_collections()]
+    if alias in names and alias not in keep:
+        doomed.append(alias)
+
+    for name in doomed:
+        client.delete_collection(name=name)
+
+    return doomed
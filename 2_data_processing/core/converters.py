@@ -0,0 +1,326 @@
+"""
+Document Converters Module
+Streams PDF and DOCX handover files into chunks - PDFs page by page, DOCX
+paragraph by paragraph - so a large file is never loaded whole
+
+- PDF (pypdf, optional): outline (bookmark) entries become headers; pages
+  without a text layer (scans) yield nothing
+- DOCX (standard library): word/document.xml is read incrementally with
+  iterparse; Heading/Title paragraph styles become headers, table rows become
+  "cell | cell" lines
+
+Headers use the markdown chunker's conventions: levels 1-3 start a new chunk
+("## Header"), deeper headings stay in the content.
+"""
+
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from parser import ParsedDocument
+from chunker import Chunk
+
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+
+CONVERTIBLE_SUFFIXES = ('.pdf', '.docx')
+
+MAX_SECTION_CHARS = 4000  # Longer sections are split into several chunks (same header)
+PDF_PAGES_PER_CACHE = 50  # pypdf caches every object it parses: drop the cache every N pages
+
+# (heading level, text) - level 0 is body text
+Block = Tuple[int, str]
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DC_TITLE = '{http://purl.org/dc/elements/1.1/}title'
+HEADING_STYLE_PATTERN = re.compile(r'^heading\s*(\d)$', re.IGNORECASE)
+
+
+def is_convertible(filepath: Path) -> bool:
+    return filepath.suffix.lower() in CONVERTIBLE_SUFFIXES
+
+
+def chunks_from_blocks(blocks: Iterator[Block], default_header: str = "Overview") -> Iterator[Chunk]:
+    """
+    Group text blocks into chunks, starting a new chunk at each level 1-3 heading
+    or when a section reaches MAX_SECTION_CHARS
+    """
+
+    header = default_header
+    parts: List[str] = []
+    size = 0
+    chunk_index = 0
+
+    for level, text in blocks:
+        text = text.strip()
+        if not text:
+            continue
+
+        if 1 <= level <= 3 or (parts and size + len(text) > MAX_SECTION_CHARS):
+            if parts:
+                yield Chunk(header=header, content='\n\n'.join(parts), chunk_index=chunk_index)
+                chunk_index += 1
+                parts, size = [], 0
+            if 1 <= level <= 3:
+                header = f"{'#' * level} {text}"
+                continue
+
+        if level > 3:
+            text = f"{'#' * min(level, 6)} {text}"
+        parts.append(text)
+        size += len(text) + 2
+
+    if parts:
+        yield Chunk(header=header, content='\n\n'.join(parts), chunk_index=chunk_index)
+
+
+# PDF
+
+def _pdf_outline(reader) -> Dict[int, List[Tuple[int, str]]]:
+    """Page index -> [(level, title)] of the outline entries starting on that page"""
+
+    headings: Dict[int, List[Tuple[int, str]]] = {}
+
+    def walk(items, level):
+        for item in items:
+            # A nested list holds the children of the entry before it
+            if isinstance(item, list):
+                walk(item, level + 1)
+                continue
+            try:
+                page = reader.get_destination_page_number(item)
+            except Exception:
+                continue  # Broken destination - not worth failing the file for
+            title = (getattr(item, 'title', '') or '').strip()
+            if page is not None and page >= 0 and title:
+                headings.setdefault(page, []).append((level, title))
+
+    try:
+        walk(reader.outline, 1)
+    except Exception:
+        return {}
+    return headings
+
+
+def _pdf_blocks(pdf_file, reader, page_count: int, headings: Dict[int, List[Tuple[int, str]]],
+                parsed_doc: ParsedDocument) -> Iterator[Block]:
+    """Page texts, split at outline headings found on the page (closes pdf_file when done)"""
+
+    text_pages = 0
+    failed_pages = 0
+
+    try:
+        for page_index in range(page_count):
+            if page_index and page_index % PDF_PAGES_PER_CACHE == 0:
+                # Parsed content streams, fonts etc. of the pages done so far - pypdf
+                # reads an object back from the file if it is needed again
+                reader.resolved_objects.clear()
+            try:
+                text = reader.pages[page_index].extract_text() or ''
+            except Exception:
+                failed_pages += 1
+                continue
+            if text.strip():
+                text_pages += 1
+
+            for level, title in headings.get(page_index, ()):
+                position = text.find(title)
+                if position >= 0:
+                    yield 0, text[:position]
+                    text = text[position + len(title):]
+                yield level, title
+            yield 0, text
+    finally:
+        pdf_file.close()
+
+    if failed_pages:
+        parsed_doc.parse_error = f"Text extraction failed on {failed_pages} of {page_count} pages"
+    if page_count and not text_pages:
+        parsed_doc.parse_success = False
+        parsed_doc.parse_error = "No text layer in any page (scanned PDF - needs OCR)"
+
+
+def convert_pdf(filepath: Path) -> Tuple[ParsedDocument, Iterator[Chunk]]:
+    metadata = {'title': filepath.stem}
+    parsed_doc = ParsedDocument(filepath, filepath.name, metadata, '', True)
+
+    if not PYPDF_AVAILABLE:
+        parsed_doc.parse_success = False
+        parsed_doc.parse_error = "pypdf not installed (pip install pypdf)"
+        return parsed_doc, iter(())
+
+    pdf_file = None
+    try:
+        # Given a path, pypdf reads the whole file into memory; given an open file
+        # it seeks to the objects it needs (cross-reference table and outline here,
+        # each page's objects as it is extracted)
+        pdf_file = open(filepath, 'rb')
+        reader = PdfReader(pdf_file)
+        page_count = len(reader.pages)
+        info = reader.metadata
+        if info and info.title and info.title.strip():
+            metadata['title'] = info.title.strip()
+        headings = _pdf_outline(reader)
+    except Exception as e:
+        if pdf_file is not None:
+            pdf_file.close()
+        parsed_doc.parse_success = False
+        parsed_doc.parse_error = f"Unreadable PDF: {e}"
+        return parsed_doc, iter(())
+
+    blocks = _pdf_blocks(pdf_file, reader, page_count, headings, parsed_doc)
+    return parsed_doc, chunks_from_blocks(blocks, metadata['title'])
+
+
+# DOCX
+
+def _docx_heading_styles(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Paragraph style ID -> heading level (Title, Heading N, or an outline level)"""
+
+    try:
+        root = ET.fromstring(archive.read('word/styles.xml'))
+    except (KeyError, ET.ParseError):
+        return {}
+
+    levels: Dict[str, int] = {}
+    based_on: Dict[str, str] = {}
+
+    for style in root.iter(f'{W}style'):
+        if style.get(f'{W}type') != 'paragraph':
+            continue
+        style_id = style.get(f'{W}styleId')
+        name = style.find(f'{W}name')
+        name = name.get(f'{W}val', '') if name is not None else ''
+        outline = style.find(f'{W}pPr/{W}outlineLvl')
+        parent = style.find(f'{W}basedOn')
+
+        match = HEADING_STYLE_PATTERN.match(name)
+        if outline is not None and outline.get(f'{W}val', '').isdigit() and int(outline.get(f'{W}val')) < 9:
+            levels[style_id] = int(outline.get(f'{W}val')) + 1
+        elif match:
+            levels[style_id] = int(match.group(1))
+        elif name.lower() == 'title':
+            levels[style_id] = 1
+        elif parent is not None:
+            based_on[style_id] = parent.get(f'{W}val')
+
+    # Custom styles based on a heading style are headings too
+    for style_id, parent in based_on.items():
+        for _ in range(10):
+            if parent in levels:
+                levels[style_id] = levels[parent]
+                break
+            parent = based_on.get(parent)
+            if parent is None:
+                break
+
+    return levels
+
+
+def _paragraph_text(paragraph) -> str:
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == f'{W}t':
+            parts.append(element.text or '')
+        elif element.tag == f'{W}tab':
+            parts.append('\t')
+        elif element.tag in (f'{W}br', f'{W}cr'):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _paragraph_level(paragraph, heading_styles: Dict[str, int]) -> int:
+    outline = paragraph.find(f'{W}pPr/{W}outlineLvl')
+    if outline is not None and outline.get(f'{W}val', '').isdigit():
+        level = int(outline.get(f'{W}val')) + 1
+        return level if level <= 9 else 0
+    style = paragraph.find(f'{W}pPr/{W}pStyle')
+    return heading_styles.get(style.get(f'{W}val'), 0) if style is not None else 0
+
+
+def _docx_blocks(filepath: Path, heading_styles: Dict[str, int], parsed_doc: ParsedDocument) -> Iterator[Block]:
+    """Paragraphs in document order; processed elements are dropped from the tree"""
+
+    try:
+        with zipfile.ZipFile(filepath) as archive, archive.open('word/document.xml') as stream:
+            depth = 0
+            body = None
+            cell_depth = 0
+            cell_parts: List[str] = []
+            row: List[str] = []
+
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if element.tag == f'{W}body':
+                        body = element
+                    elif element.tag == f'{W}tc':
+                        cell_depth += 1
+                    continue
+
+                depth -= 1
+                if element.tag == f'{W}p':
+                    text = _paragraph_text(element)
+                    if cell_depth:
+                        cell_parts.append(text.strip())
+                    else:
+                        yield _paragraph_level(element, heading_styles), text
+                    element.clear()
+                elif element.tag == f'{W}tc':
+                    cell_depth -= 1
+                    row.append(' '.join(part for part in cell_parts if part))
+                    cell_parts = []
+                elif element.tag == f'{W}tr':
+                    yield 0, ' | '.join(cell for cell in row if cell)
+                    row = []
+
+                # A top-level paragraph or table is done: drop it from the tree
+                if body is not None and depth == 2:
+                    body.clear()
+    except (KeyError, zipfile.BadZipFile, ET.ParseError) as e:
+        parsed_doc.parse_success = False
+        parsed_doc.parse_error = f"Unreadable DOCX: {e}"
+
+
+def convert_docx(filepath: Path) -> Tuple[ParsedDocument, Iterator[Chunk]]:
+    metadata = {'title': filepath.stem}
+    parsed_doc = ParsedDocument(filepath, filepath.name, metadata, '', True)
+
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            heading_styles = _docx_heading_styles(archive)
+            try:
+                title = ET.fromstring(archive.read('docProps/core.xml')).find(DC_TITLE)
+                if title is not None and title.text and title.text.strip():
+                    metadata['title'] = title.text.strip()
+            except (KeyError, ET.ParseError):
+                pass
+    except (OSError, zipfile.BadZipFile) as e:
+        parsed_doc.parse_success = False
+        parsed_doc.parse_error = f"Unreadable DOCX: {e}"
+        return parsed_doc, iter(())
+
+    blocks = _docx_blocks(filepath, heading_styles, parsed_doc)
+    return parsed_doc, chunks_from_blocks(blocks, metadata['title'])
+
+
+def convert_document(filepath: Path) -> Tuple[ParsedDocument, Iterator[Chunk]]:
+    """
+    Open a PDF or DOCX file for streaming conversion
+
+    Returns (parsed_doc, chunks): parsed_doc holds the document title (content is
+    empty); chunks is a lazy iterator that reads the file as it is consumed.
+    parse_success / parse_error are final once chunks is exhausted.
+    """
+
+    if filepath.suffix.lower() == '.pdf':
+        return convert_pdf(filepath)
+    if filepath.suffix.lower() == '.docx':
+        return convert_docx(filepath)
+    raise ValueError(f"Unsupported file type: {filepath.suffix}")
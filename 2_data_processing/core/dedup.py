@@ -0,0 +1,195 @@
+"""
+Near-Duplicate Detection Module
+MinHash signatures + LSH banding to find near-identical chunks before embedding
+
+Signatures use one-permutation MinHash: each word 3-shingle is hashed once
+(blake2b, deterministic across processes) into one of NUM_BINS bins, keeping
+the minimum per bin. Jaccard similarity is estimated from matching bins.
+"""
+
+import base64
+import hashlib
+import re
+import struct
+from typing import Dict, List, Mapping, Optional, Tuple
+
+
+SHINGLE_WORDS = 3
+NUM_BINS = 64
+BANDS = 16  # LSH: 16 bands x 4 bins; near-certain candidate at J=0.9
+DEFAULT_THRESHOLD = 0.9  # Min estimated Jaccard similarity to count as duplicate
+
+EMPTY_BIN = -1
+WORD_PATTERN = re.compile(r'\w+')
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    """Word n-grams of the lowercased text (whole text if shorter than one shingle)"""
+
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text: str, num_bins: int = NUM_BINS) -> Signature:
+    """One-permutation MinHash signature (EMPTY_BIN where no shingle landed)"""
+
+    signature = [EMPTY_BIN] * num_bins
+
+    for shingle in shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        bin_index = value % num_bins
+        value //= num_bins
+        if signature[bin_index] == EMPTY_BIN or value < signature[bin_index]:
+            signature[bin_index] = value
+
+    return tuple(signature)
+
+
+def encode_signature(signature: Signature) -> str:
+    """Compact text form of a signature (base64 of little-endian int64s) for JSON files"""
+    return base64.b64encode(struct.pack(f'<{len(signature)}q', *signature)).decode('ascii')
+
+
+def decode_signature(text: str) -> Signature:
+    data = base64.b64decode(text)
+    return struct.unpack(f'<{len(data) // 8}q', data)
+
+
+def estimate_jaccard(a: Signature, b: Signature) -> float:
+    """Fraction of matching bins among bins filled in either signature"""
+
+    filled = matching = 0
+    for x, y in zip(a, b):
+        if x == EMPTY_BIN and y == EMPTY_BIN:
+            continue
+        filled += 1
+        if x == y:
+            matching += 1
+    return matching / filled if filled else 0.0
+
+
+class NearDuplicateIndex:
+    """
+    In-memory LSH index of representative chunks for one indexing run
+
+    find_or_add(chunk_id, signature) returns the representative a chunk
+    duplicates, or registers the chunk as a new representative and returns None.
+    Memory grows with the number of representatives.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, bands: int = BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.representatives = 0
+        self.duplicates = 0
+        self._signatures: Dict[str, Signature] = {}
+        self._buckets: Dict[Tuple, List[str]] = {}
+
+    def _band_keys(self, signature: Signature) -> List[Tuple]:
+        rows = len(signature) // self.bands
+        keys = []
+        for band in range(self.bands):
+            values = signature[band * rows:(band + 1) * rows]
+            # All-empty bands would put every short chunk in one bucket
+            if any(value != EMPTY_BIN for value in values):
+                keys.append((band,) + values)
+        return keys
+
+    def find_or_add(self, chunk_id: str, signature: Signature) -> Optional[str]:
+        keys = self._band_keys(signature)
+        if not keys:
+            # Nothing to compare (no words) - always unique
+            return None
+
+        checked = set()
+        for key in keys:
+            for candidate in self._buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if estimate_jaccard(signature, self._signatures[candidate]) >= self.threshold:
+                    self.duplicates += 1
+                    return candidate
+
+        self._register(chunk_id, signature, keys)
+        return None
+
+    def add(self, chunk_id: str, signature: Signature):
+        """Register a known representative without searching (e.g. from a checkpoint)"""
+        keys = self._band_keys(signature)
+        if keys:
+            self._register(chunk_id, signature, keys)
+
+    def _register(self, chunk_id: str, signature: Signature, keys: List[Tuple]):
+        self._signatures[chunk_id] = signature
+        for key in keys:
+            self._buckets.setdefault(key, []).append(chunk_id)
+        self.representatives += 1
+
+
+# Representative metadata: `duplicate_count` (exact) and `duplicate_ids` /
+# `duplicate_files` (comma-separated, first MAX_LISTED_ALIASES aliases)
+MAX_LISTED_ALIASES = 50
+
+
+def apply_alias_metadata(
+    collection,
+    added: Dict[str, List[str]],
+    removed: Dict[str, List[str]],
+    alias_files: Mapping[str, str],
+    batch_size: int = 256
+) -> int:
+    """
+    Record near-duplicate aliases on their representatives' metadata
+    (ChromaDB metadata values are scalars, so lists are comma-separated)
+
+    Args:
+        added: representative chunk ID -> alias chunk IDs found in this run
+        removed: representative chunk ID -> alias chunk IDs that no longer exist
+        alias_files: alias chunk ID -> source filename, for every alias still listed
+                     (IndexManifest.alias_files); unknown ones are left out of duplicate_files
+
+    Returns: number of representatives updated (missing ones are skipped)
+    """
+
+    representative_ids = sorted(set(added) | set(removed))
+    updated = 0
+
+    for start in range(0, len(representative_ids), batch_size):
+        batch = representative_ids[start:start + batch_size]
+        existing = collection.get(ids=batch, include=['metadatas'])
+
+        ids, metadatas = [], []
+        for chunk_id, metadata in zip(existing['ids'], existing['metadatas']):
+            metadata = dict(metadata or {})
+            listed = [alias for alias in (metadata.get('duplicate_ids') or '').split(',') if alias]
+            count = metadata.get('duplicate_count', 0)
+
+            for alias in removed.get(chunk_id, []):
+                count = max(count - 1, 0)
+                if alias in listed:
+                    listed.remove(alias)
+
+            for alias in added.get(chunk_id, []):
+                count += 1
+                if len(listed) < MAX_LISTED_ALIASES and alias not in listed:
+                    listed.append(alias)
+
+            metadata['duplicate_count'] = count
+            metadata['duplicate_ids'] = ','.join(listed)
+            metadata['duplicate_files'] = ','.join(dict.fromkeys(
+                alias_files[alias] for alias in listed if alias in alias_files
+            ))
+
+            ids.append(chunk_id)
+            metadatas.append(metadata)
+
+        if ids:
+            collection.update(ids=ids, metadatas=metadatas)
+            updated += len(ids)
+
+    return updated
@@ -0,0 +1,212 @@
+"""
+Embedding Cache Module
+Persistent SQLite cache of embeddings keyed by (model id, sha256 of chunk text)
+"""
+
+import hashlib
+import sqlite3
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+
+def text_hash(text: str) -> str:
+    """sha256 hex digest of the exact chunk text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded LRU cache of embedding vectors stored in SQLite
+
+    - Key: (model id, sha256 of text)
+    - Value: float32 vector blob
+    - Eviction: least recently used rows are deleted once the total vector
+      size exceeds `max_bytes` (down to 90% of the budget)
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 1024 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        self._total_bytes = row[0]
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for texts (None for misses) and refresh their LRU position"""
+
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+
+        # SQLite limits bound parameters per statement
+        for start in range(0, len(hashes), 500):
+            part = hashes[start:start + 500]
+            placeholders = ','.join('?' * len(part))
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [model, *part]
+            ).fetchall()
+            for digest, blob in rows:
+                found[digest] = blob
+
+        if found:
+            now = time.time_ns()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(now, model, digest) for digest in found]
+            )
+            self._conn.commit()
+
+        results = []
+        for digest in hashes:
+            blob = found.get(digest)
+            if blob is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                results.append(array('f', blob).tolist())
+
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store vectors for texts, then evict if over budget"""
+
+        now = time.time_ns()
+        rows = {}
+        for text, vector in zip(texts, vectors):
+            blob = array('f', vector).tobytes()
+            digest = text_hash(text)
+            rows[digest] = (model, digest, blob, len(blob), now)
+        rows = list(rows.values())
+
+        # Account for rows being replaced
+        for model_id, digest, _, size, _ in rows:
+            old = self._conn.execute(
+                "SELECT size FROM embeddings WHERE model = ? AND text_hash = ?",
+                (model_id, digest)
+            ).fetchone()
+            self._total_bytes += size - (old[0] if old else 0)
+
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self._conn.commit()
+
+        if self._total_bytes > self.max_bytes:
+            self._evict(int(self.max_bytes * 0.9))
+
+    def _evict(self, target_bytes: int):
+        """Delete least recently used rows until total size <= target_bytes"""
+
+        while self._total_bytes > target_bytes:
+            rows = self._conn.execute(
+                "SELECT rowid, size FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+
+            victims = []
+            for rowid, size in rows:
+                victims.append((rowid,))
+                self._total_bytes -= size
+                if self._total_bytes <= target_bytes:
+                    break
+
+            self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+            self._conn.commit()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedEmbeddingFunction:
+    """
+    Wraps an embedding function (list of texts -> list of vectors) with an
+    EmbeddingCache. Only cache misses are sent to the wrapped function,
+    in one call per batch.
+    """
+
+    def __init__(self, embed_fn: Callable, model_id: str, cache: EmbeddingCache):
+        self.embed_fn = embed_fn
+        self.model_id = model_id
+        self.cache = cache
+
+    def __call__(self, texts: Sequence[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(self.model_id, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            # Round to float32 so fresh and cached vectors are identical
+            computed = [array('f', map(float, v)).tolist() for v in self.embed_fn(missing_texts)]
+            self.cache.put_many(self.model_id, missing_texts, computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+
+        return vectors
+
+
+def main():
+    """Test the cache with a fake embedding function"""
+    import sys
+    import tempfile
+
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(len(texts))
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(Path(tmp) / "cache.sqlite", max_bytes=10_000)
+        embed = CachedEmbeddingFunction(fake_embed, "fake-model", cache)
+
+        texts = ["alpha", "beta", "gamma"]
+        first = embed(texts)
+        second = embed(texts + ["delta"])
+
+        print(f"First call:  {first}")
+        print(f"Second call: {second}")
+        print(f"Backend calls (texts per call): {calls}")
+        print(f"Hits: {cache.hits}, Misses: {cache.misses}, Bytes: {cache.total_bytes}")
+
+        ok = first == second[:3] and calls == [3, 1]
+        cache.close()
+
+    print("[OK]" if ok else "[FAIL]")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
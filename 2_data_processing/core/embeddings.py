@@ -0,0 +1,266 @@
+"""
+Embedding Provider Module
+Pluggable, batched embedding backends shared by indexing and querying
+"""
+
+import hashlib
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import yaml
+
+
+# Global config (repo root)
+MODELS_CONFIG_PATH = Path(__file__).parent.parent.parent / "models_config.yaml"
+
+
+class EmbeddingProvider:
+    """
+    Base class for embedding backends
+
+    - model_id: Stable identifier ("<provider>:<model>"), stored in the
+      collection metadata and used as the embedding cache key
+    - embed(texts): Embed documents in batches of `batch_size`
+    - embed_query(text): Embed a single query string
+
+    Also usable as a ChromaDB embedding function (`__call__(input)`).
+    """
+
+    provider_name = "base"
+
+    def __init__(
+        self,
+        model: str,
+        batch_size: int = 32,
+        document_prefix: str = "",
+        query_prefix: str = ""
+    ):
+        self.model = model
+        self.batch_size = batch_size
+        self.document_prefix = document_prefix
+        self.query_prefix = query_prefix
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.provider_name}:{self.model}"
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed documents, batch_size texts per backend call"""
+
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [self.document_prefix + text for text in texts[start:start + self.batch_size]]
+            vectors.extend(self._embed_batch(batch))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query"""
+        return self._embed_batch([self.query_prefix + text])[0]
+
+    def __call__(self, input: Sequence[str]) -> List[List[float]]:
+        # Signature matches ChromaDB's EmbeddingFunction protocol
+        return self.embed(input)
+
+
+class OllamaEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from a local Ollama server (POST /api/embed, batched input)"""
+
+    provider_name = "ollama"
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:11434",
+        batch_size: int = 64,
+        timeout: float = 120.0,
+        **kwargs
+    ):
+        super().__init__(model, batch_size=batch_size, **kwargs)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        import requests
+
+        response = requests.post(
+            f"{self.base_url}/api/embed",
+            json={"model": self.model, "input": texts, "truncate": True},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        embeddings = response.json().get('embeddings')
+        if not embeddings or len(embeddings) != len(texts):
+            raise RuntimeError(
+                f"Ollama returned {len(embeddings or [])} embeddings for {len(texts)} texts "
+                f"(is '{self.model}' an embedding model? Run: ollama pull {self.model})"
+            )
+        return embeddings
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    In-process CPU embeddings via sentence-transformers
+
+    `threads` sets torch intra-op threads (None = torch default).
+    """
+
+    provider_name = "local"
+
+    def __init__(
+        self,
+        model: str,
+        batch_size: int = 32,
+        threads: Optional[int] = None,
+        device: str = "cpu",
+        **kwargs
+    ):
+        super().__init__(model, batch_size=batch_size, **kwargs)
+        self.threads = threads
+        self.device = device
+        self._model = None
+
+    def _load(self):
+        if self._model is None:
+            try:
+                import torch
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError(
+                    "Local embedding provider requires sentence-transformers: "
+                    "pip install sentence-transformers"
+                )
+
+            if self.threads:
+                torch.set_num_threads(self.threads)
+
+            self._model = SentenceTransformer(self.model, device=self.device)
+        return self._model
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._load().encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        # sentence-transformers batches internally
+        if not texts:
+            return []
+        return self._embed_batch([self.document_prefix + text for text in texts])
+
+
+class ChromaDefaultEmbeddingProvider(EmbeddingProvider):
+    """ChromaDB's built-in all-MiniLM-L6-v2 (ONNX) - the previous implicit default"""
+
+    provider_name = "chroma-default"
+
+    def __init__(self, model: str = "all-MiniLM-L6-v2", batch_size: int = 32, **kwargs):
+        super().__init__(model, batch_size=batch_size, **kwargs)
+        self._function = None
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if self._function is None:
+            from chromadb.utils import embedding_functions
+            self._function = embedding_functions.DefaultEmbeddingFunction()
+        return [list(map(float, v)) for v in self._function(texts)]
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic offline stand-in (feature hashing of word tokens)
+
+    No model download or server needed - for benchmarks and pipeline tests,
+    not for real retrieval quality.
+    """
+
+    provider_name = "hash"
+
+    def __init__(self, model: str = "hash", dim: int = 384, batch_size: int = 256, **kwargs):
+        super().__init__(f"{model}-{dim}", batch_size=batch_size, **kwargs)
+        self.dim = dim
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            for token in text.lower().split():
+                digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                vector[value % self.dim] += 1.0 if (value >> 63) else -1.0
+
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+
+        return vectors
+
+
+PROVIDERS = {
+    'ollama': OllamaEmbeddingProvider,
+    'local': LocalEmbeddingProvider,
+    'chroma-default': ChromaDefaultEmbeddingProvider,
+    'hash': HashEmbeddingProvider,
+}
+
+
+def load_embedding_config(config_path: Path = MODELS_CONFIG_PATH) -> Dict:
+    """Read the `embedding` section of models_config.yaml"""
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+
+    embedding_config = config.get('embedding')
+    if not embedding_config:
+        raise ValueError(f"No 'embedding' section in {config_path}")
+
+    return embedding_config
+
+
+def create_embedding_provider(embedding_config: Dict) -> EmbeddingProvider:
+    """
+    Build a provider from an `embedding` config section:
+
+    embedding:
+      provider: "ollama"
+      ollama: {model: "bge-m3", base_url: "...", batch_size: 64}
+      local: {model: "...", batch_size: 32, threads: 4}
+    """
+
+    provider_name = embedding_config.get('provider')
+    if provider_name not in PROVIDERS:
+        raise ValueError(
+            f"Unknown embedding provider '{provider_name}' "
+            f"(options: {', '.join(PROVIDERS)})"
+        )
+
+    options = dict(embedding_config.get(provider_name) or {})
+    return PROVIDERS[provider_name](**options)
+
+
+def load_embedding_provider(config_path: Path = MODELS_CONFIG_PATH) -> EmbeddingProvider:
+    """Provider selected in models_config.yaml (same for indexing and querying)"""
+    return create_embedding_provider(load_embedding_config(config_path))
+
+
+def main():
+    """Embed a sample text with the configured provider"""
+    import sys
+
+    provider = load_embedding_provider()
+    texts = sys.argv[1:] or ["היתר בנייה", "building permit"]
+
+    print(f"Provider: {provider.model_id} (batch size {provider.batch_size})")
+    vectors = provider.embed(texts)
+    for text, vector in zip(texts, vectors):
+        print(f"  {text}: dim={len(vector)} first={vector[:3]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Structured Logger Module
+Buffered JSONL + text logging for the indexing pipeline
+
+Per-chunk events are cheap for the caller: records are handed to a background
+writer thread that serializes and writes them in batches. High-volume detail
+events can be sampled or dropped by level, while summary counters stay exact.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Union
+
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+
+# Fraction of *routine* (below warning) detail events written to the JSONL log.
+# Warnings and errors are always written.
+DEFAULT_SAMPLE_RATES = {
+    'chunk_validation': 0.1,
+    'chunk_indexed': 0.01,
+}
+
+# Writer thread batching
+FLUSH_INTERVAL_SECONDS = 1.0
+FLUSH_MAX_RECORDS = 2000
+QUEUE_MAX_RECORDS = 10_000  # Callers block (never drop) when the writer falls this far behind
+
+# Size-based rotation (per file)
+MAX_LOG_BYTES = 50 * 1024 * 1024
+BACKUP_COUNT = 5
+
+_STOP = object()
+
+
+class RotatingFile:
+    """
+    Append-only text file rotated by size: name -> name.1 -> ... -> name.<backup_count>
+    Only used from the writer thread.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = MAX_LOG_BYTES, backup_count: int = BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = open(path, 'a', encoding='utf-8')
+        self._size = path.stat().st_size
+
+    def write(self, text: str):
+        size = len(text.encode('utf-8'))
+        if self.max_bytes and self._size and self._size + size > self.max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._size += size
+
+    def _rotate(self):
+        self._file.close()
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+
+        if self.backup_count:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class StructuredLogger:
+    """
+    Pipeline logger writing:
+    - <name>_<timestamp>.jsonl: one JSON record per event (detail events sampled)
+    - <name>_<timestamp>.log: human-readable info+ messages
+    - console: messages at or above `console_level` (chunk-level events stay off the console)
+
+    Filtering, per record:
+    1. `event_levels` (event type -> min level) and `file_level` drop events below threshold
+    2. `sample_rates` (event type -> fraction) keep a deterministic every-Nth subset
+       of routine events; warnings and errors are never sampled out
+
+    `counters` counts every event (written or not) and the chunk/file totals,
+    `dropped` counts events filtered or sampled out per event type.
+
+    Call from one thread (the pipeline's writer); close() flushes and stops the writer.
+    """
+
+    def __init__(
+        self,
+        log_dir: Path,
+        name: str = "indexing",
+        console_level: str = 'info',
+        file_level: str = 'debug',
+        sample_rates: Optional[Dict[str, float]] = None,
+        event_levels: Optional[Dict[str, str]] = None,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        flush_max_records: int = FLUSH_MAX_RECORDS,
+        max_bytes: int = MAX_LOG_BYTES,
+        backup_count: int = BACKUP_COUNT
+    ):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.jsonl_path = self.log_dir / f"{name}_{timestamp}.jsonl"
+        self.text_path = self.log_dir / f"{name}_{timestamp}.log"
+
+        self.console_level = LEVELS[console_level]
+        self.file_level = LEVELS[file_level]
+        self.sample_rates = dict(DEFAULT_SAMPLE_RATES if sample_rates is None else sample_rates)
+        self.event_levels = {event: LEVELS[level] for event, level in (event_levels or {}).items()}
+        self.flush_interval = flush_interval
+        self.flush_max_records = flush_max_records
+
+        self.counters: Counter = Counter()
+        self.dropped: Counter = Counter()
+        self._seen: Counter = Counter()  # Per event type, for sampling
+
+        self._jsonl = RotatingFile(self.jsonl_path, max_bytes, backup_count)
+        self._text = RotatingFile(self.text_path, max_bytes, backup_count)
+        self._queue: queue.Queue = queue.Queue(maxsize=QUEUE_MAX_RECORDS)
+        self._writer = threading.Thread(target=self._write_loop, name="structured-logger", daemon=True)
+        self._writer.start()
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # Filtering / sampling (caller thread)
+
+    def _should_write(self, event_type: str, level: int) -> bool:
+        if level < self.event_levels.get(event_type, self.file_level):
+            return False
+
+        rate = self.sample_rates.get(event_type)
+        if rate is None or rate >= 1.0 or level >= LEVELS['warning']:
+            return True
+        if rate <= 0.0:
+            return False
+
+        # Deterministic: keep exactly floor(n * rate) of the first n events
+        self._seen[event_type] += 1
+        n = self._seen[event_type]
+        return int(n * rate) != int((n - 1) * rate)
+
+    def _emit(self, event_type: str, level: str, message: str, fields: Union[Dict, Callable[[], Dict]],
+              console: bool = True):
+        # fields may be a function: only called for records that are written (not sampled out)
+        level_value = LEVELS[level]
+        self.counters[f"events.{event_type}"] += 1
+
+        if console and level_value >= self.console_level:
+            print(f"{datetime.now():%H:%M:%S} | {level.upper():<8} | {message}")
+
+        if not self._should_write(event_type, level_value):
+            self.dropped[event_type] += 1
+            return
+
+        record = {
+            'timestamp': time.time(),
+            'event_type': event_type,
+            'level': level,
+            'message': message,
+            **(fields() if callable(fields) else fields)
+        }
+        # Serialization happens on the writer thread
+        self._queue.put((record, level_value >= LEVELS['info']))
+
+    # ------------------------------------------------------------------
+    # Public API
+
+    def log_structured(self, event_type: str, level: str, message: str, **fields):
+        """Log a pipeline event (extra keyword fields go into the JSON record)"""
+        self._emit(event_type, level, message, fields)
+
+    def log_file_parsing(
+        self,
+        filename: str,
+        parse_success: bool,
+        parse_error: Optional[str] = None,
+        metadata_fields: int = 0
+    ):
+        """One record per parsed file (metadata_fields: number of frontmatter fields)"""
+
+        self.counters['files_parsed'] += 1
+        if not parse_success:
+            self.counters['parse_failures'] += 1
+
+        self._emit(
+            'file_parsing',
+            'info' if parse_success else 'error',
+            f"Parsed {filename}" if parse_success else f"Failed to parse {filename}: {parse_error}",
+            {
+                'filename': filename,
+                'parse_success': parse_success,
+                'parse_error': parse_error,
+                'metadata_fields': metadata_fields
+            },
+            console=not parse_success
+        )
+
+    def log_chunk_validation(
+        self,
+        filename: str,
+        chunk_index: int,
+        header: str,
+        is_valid: bool,
+        severity: str,
+        issues: List[str],
+        metadata: Optional[Dict] = None,
+        document_metadata: Optional[Mapping] = None
+    ):
+        """
+        One record per validated chunk (routine ones are sampled)
+        The record's metadata is document_metadata + metadata, merged only if it is written.
+        """
+
+        self.counters['chunks_validated'] += 1
+        if is_valid:
+            self.counters['chunks_valid'] += 1
+        if severity == 'warning':
+            self.counters['validation_warnings'] += 1
+        elif severity == 'critical':
+            self.counters['validation_errors'] += 1
+
+        level = {'warning': 'warning', 'critical': 'error'}.get(severity, 'debug')
+        self._emit(
+            'chunk_validation',
+            level,
+            f"{filename} chunk {chunk_index} ({header}): {severity}"
+            + (f" - {'; '.join(issues)}" if issues else ""),
+            lambda: {
+                'filename': filename,
+                'chunk_index': chunk_index,
+                'header': header,
+                'is_valid': is_valid,
+                'severity': severity,
+                'issues': issues,
+                'metadata': {**(document_metadata or {}), **(metadata or {})}
+            },
+            console=False
+        )
+
+    def log_chunk_indexed(self, filename: str, chunk_index: int, chunk_id: str):
+        """One record per chunk written to the collection (sampled)"""
+
+        self.counters['chunks_indexed'] += 1
+        self._emit(
+            'chunk_indexed',
+            'debug',
+            f"Indexed {chunk_id}",
+            {'filename': filename, 'chunk_index': chunk_index, 'chunk_id': chunk_id},
+            console=False
+        )
+
+    def log_summary(
+        self,
+        total_files: int,
+        total_chunks: int,
+        indexed_chunks: int,
+        warnings: int,
+        errors: int,
+        **fields
+    ):
+        """Write the run summary (always written, with exact counters) and print it"""
+
+        summary = {
+            'total_files': total_files,
+            'total_chunks': total_chunks,
+            'indexed_chunks': indexed_chunks,
+            'warnings': warnings,
+            'errors': errors,
+            **fields
+        }
+
+        record = {
+            'timestamp': time.time(),
+            'event_type': 'summary',
+            'level': 'info',
+            'message': "Indexing summary",
+            **summary,
+            'counters': dict(self.counters),
+            'dropped_events': dict(self.dropped)
+        }
+        self._queue.put((record, True))
+
+        print()
+        print("="*80)
+        print("INDEXING SUMMARY")
+        print("="*80)
+        print(f"  Total files:     {total_files}")
+        print(f"  Total chunks:    {total_chunks}")
+        print(f"  Indexed chunks:  {indexed_chunks}")
+        print(f"  Warnings:        {warnings}")
+        print(f"  Errors:          {errors}")
+        if self.dropped:
+            dropped = ', '.join(f"{event}: {count}" for event, count in sorted(self.dropped.items()))
+            print(f"  Sampled out:     {dropped} (counts above are exact)")
+        print("="*80)
+
+    def flush(self):
+        """Block until everything logged so far is written to disk"""
+        self._queue.join()
+
+    def close(self):
+        """Flush pending records and stop the writer thread"""
+
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._jsonl.close()
+        self._text.close()
+
+    def __enter__(self) -> "StructuredLogger":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    # ------------------------------------------------------------------
+    # Writer thread
+
+    def _write_loop(self):
+        stopping = False
+
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            # Drain what is already queued, up to one batch
+            while len(items) < self.flush_max_records:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                for item in items:
+                    if item is _STOP:
+                        stopping = True
+                        continue
+                    self._write(*item)
+                self._jsonl.flush()
+                self._text.flush()
+            except Exception as e:
+                # Never take the pipeline down because a log write failed
+                print(f"[logger] write failed: {e}", file=sys.stderr)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _write(self, record: Dict, text: bool):
+        self._jsonl.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+        if text:
+            timestamp = datetime.fromtimestamp(record['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+            self._text.write(f"{timestamp} | {record['level'].upper():<8} | {record['message']}\n")
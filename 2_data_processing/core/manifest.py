@@ -0,0 +1,255 @@
+"""
+Index Manifest Module
+Tracks indexed source files by content hash so re-indexing only touches what changed
+"""
+
+import json
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Iterable, Optional
+from dataclasses import dataclass, field
+
+
+def hash_file(filepath: Path) -> str:
+    """Return the sha256 hex digest of a file's bytes"""
+
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry(file_hash: str, chunk_ids: List[str], aliases: Optional[Dict[str, str]]) -> Dict:
+    entry = {'hash': file_hash, 'chunk_ids': list(chunk_ids)}
+    if aliases:
+        entry['aliases'] = dict(aliases)
+    return entry
+
+
+@dataclass
+class ManifestDiff:
+    """Result of comparing source files against the manifest"""
+    new: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def to_index(self) -> List[Path]:
+        """Files that need to be parsed and embedded, in sorted order"""
+        return sorted(self.new + self.changed)
+
+
+class IndexManifest:
+    """
+    JSON manifest of file hash -> chunk IDs for one ChromaDB collection
+
+    Format:
+    {
+      "version": 1,
+      "collection": "municipality_docs",
+      "files": {
+        "res_building_permit_001.md": {"hash": "...", "chunk_ids": ["..."]},
+        "res_building_permit_002.md": {"hash": "...", "chunk_ids": ["..."],
+                                       "aliases": {"<dropped chunk id>": "<representative chunk id>"}}
+      }
+    }
+
+    `aliases` (optional) lists near-duplicate chunks of the file that were not
+    written themselves, with the chunk (usually in another file) that represents them.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, collection: str = ""):
+        self.path = Path(path)
+        self.collection = collection
+        self.files: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "IndexManifest":
+        """Load manifest from disk, or return an empty one if missing/unreadable"""
+
+        manifest = cls(path)
+
+        if not manifest.path.exists():
+            return manifest
+
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return manifest
+
+        if data.get('version') != cls.VERSION:
+            return manifest
+
+        manifest.collection = data.get('collection', '')
+        manifest.files = data.get('files', {})
+        return manifest
+
+    def diff(self, files: Iterable[Path]) -> ManifestDiff:
+        """Compare source files with the manifest (keyed by filename)"""
+
+        result = ManifestDiff()
+        seen = set()
+
+        for filepath in sorted(files):
+            filename = filepath.name
+            seen.add(filename)
+            file_hash = hash_file(filepath)
+            result.hashes[filename] = file_hash
+
+            entry = self.files.get(filename)
+            if entry is None:
+                result.new.append(filepath)
+            elif entry.get('hash') != file_hash:
+                result.changed.append(filepath)
+            else:
+                result.unchanged.append(filepath)
+
+        result.removed = sorted(name for name in self.files if name not in seen)
+        return result
+
+    def diff_paths(self, paths: Iterable[Path]) -> ManifestDiff:
+        """
+        Compare only the given paths with the manifest (e.g. files reported by a
+        directory watcher). Paths that no longer exist count as removed; files
+        not listed are left out of the diff entirely.
+        """
+
+        result = ManifestDiff()
+
+        for filepath in sorted(set(paths)):
+            filename = filepath.name
+            try:
+                file_hash = hash_file(filepath)
+            except FileNotFoundError:
+                if filename in self.files:
+                    result.removed.append(filename)
+                continue
+
+            result.hashes[filename] = file_hash
+
+            entry = self.files.get(filename)
+            if entry is None:
+                result.new.append(filepath)
+            elif entry.get('hash') != file_hash:
+                result.changed.append(filepath)
+            else:
+                result.unchanged.append(filepath)
+
+        return result
+
+    def chunk_ids(self, filename: str) -> List[str]:
+        """Chunk IDs recorded for a file (empty if unknown)"""
+        return list(self.files.get(filename, {}).get('chunk_ids', []))
+
+    def record(self, filename: str, file_hash: str, chunk_ids: List[str], aliases: Optional[Dict[str, str]] = None):
+        """Record the chunks written for a file (and its near-duplicate aliases)"""
+        self.files[filename] = _entry(file_hash, chunk_ids, aliases)
+
+    def aliases(self, filename: str) -> Dict[str, str]:
+        """Alias chunk ID -> representative chunk ID for a file (empty if none)"""
+        return dict(self.files.get(filename, {}).get('aliases', {}))
+
+    def alias_files(self) -> Dict[str, str]:
+        """Alias chunk ID -> the file it belongs to, for every recorded alias"""
+        return {alias: filename for filename, entry in self.files.items() for alias in entry.get('aliases', {})}
+
+    def dependent_files(self, chunk_ids: Iterable[str]) -> List[str]:
+        """Files with aliases represented by any of the given chunks"""
+
+        chunk_ids = set(chunk_ids)
+        return sorted(
+            filename for filename, entry in self.files.items()
+            if chunk_ids.intersection(entry.get('aliases', {}).values())
+        )
+
+    def remove(self, filename: str) -> List[str]:
+        """Forget a file, returning the chunk IDs it had"""
+        entry = self.files.pop(filename, None)
+        return list(entry.get('chunk_ids', [])) if entry else []
+
+    def clear(self):
+        """Drop all entries (used when the collection is rebuilt from scratch)"""
+        self.files = {}
+
+    def save(self):
+        """Write manifest atomically (temp file + rename)"""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.VERSION,
+                'collection': self.collection,
+                'files': self.files
+            }, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+
+
+class StreamingManifestWriter:
+    """
+    Write-only manifest for streaming full rebuilds
+
+    Entries are appended to a spill file as they are recorded instead of being
+    kept in memory; save() streams them into the regular manifest JSON format
+    (readable by IndexManifest.load) and replaces the manifest atomically.
+    """
+
+    def __init__(self, path: Path, collection: str = ""):
+        self.path = Path(path)
+        self.collection = collection
+        self.file_count = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._spill_path = self.path.with_suffix(self.path.suffix + '.spill')
+        self._spill = open(self._spill_path, 'w', encoding='utf-8')
+
+    def record(self, filename: str, file_hash: str, chunk_ids: List[str], aliases: Optional[Dict[str, str]] = None):
+        """Append the chunks written for a file"""
+        self._spill.write(json.dumps(
+            [filename, _entry(file_hash, chunk_ids, aliases)],
+            ensure_ascii=False
+        ) + '\n')
+        self.file_count += 1
+
+    def save(self):
+        """Build the manifest from the spill file (temp file + rename), then delete the spill file"""
+
+        self._spill.close()
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+
+        with open(self._spill_path, 'r', encoding='utf-8') as spill, \
+                open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{"version": %d, "collection": %s, "files": {'
+                    % (IndexManifest.VERSION, json.dumps(self.collection, ensure_ascii=False)))
+            for index, line in enumerate(spill):
+                filename, entry = json.loads(line)
+                if index:
+                    f.write(',')
+                f.write('\n %s: %s' % (
+                    json.dumps(filename, ensure_ascii=False),
+                    json.dumps(entry, ensure_ascii=False)
+                ))
+            f.write('\n}}\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+        self._spill_path.unlink()
+
+    def discard(self):
+        """Drop recorded entries (run failed; the previous manifest stays in place)"""
+        if not self._spill.closed:
+            self._spill.close()
+        if self._spill_path.exists():
+            self._spill_path.unlink()
@@ -0,0 +1,92 @@
+"""
+Memory Budget Module
+Resident-memory checks for streaming indexing runs
+"""
+
+import gc
+import os
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size in MB (None where /proc is unavailable)"""
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far in MB (None without the resource module)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """Raised when RSS stays above the budget even after buffers were flushed"""
+
+
+class MemoryBudget:
+    """
+    Hard RSS limit for a run
+
+    RSS is sampled on the first call to check() and then every `check_every`
+    calls; once a sample reaches `close_fraction` of the budget, on every call,
+    so a burst of large files can't run past the limit between samples.
+
+    Over the soft limit (`soft_fraction` of the budget) the caller's relief
+    callback runs (e.g. flush the pending batch) followed by gc.collect().
+    If RSS is still above the budget, MemoryBudgetExceeded is raised so the
+    run stops cleanly instead of being OOM-killed.
+    """
+
+    def __init__(self, limit_mb: float, soft_fraction: float = 0.8, check_every: int = 32,
+                 close_fraction: float = 0.5):
+        self.limit_mb = limit_mb
+        self.soft_limit_mb = limit_mb * soft_fraction
+        self.close_limit_mb = limit_mb * close_fraction
+        self.check_every = check_every
+        self.relief_count = 0
+        self.max_rss_mb = 0.0  # Highest sampled RSS (peak_rss_mb() has the true peak)
+        self._calls = 0
+        self._close = False
+
+    def check(self, relieve=None):
+        self._calls += 1
+        if not self._close and (self._calls - 1) % self.check_every:
+            return
+
+        rss = current_rss_mb()
+        if rss is None:
+            return
+        self.max_rss_mb = max(self.max_rss_mb, rss)
+        self._close = rss >= self.close_limit_mb
+
+        if rss < self.soft_limit_mb:
+            return
+
+        self.relief_count += 1
+        if relieve:
+            relieve()
+        gc.collect()
+
+        rss = current_rss_mb()
+        if rss >= self.limit_mb:
+            raise MemoryBudgetExceeded(
+                f"RSS {rss:.0f} MB exceeds the {self.limit_mb:.0f} MB budget after flushing; "
+                f"lower --batch-size/--batch-max-chars/--workers or raise --memory-budget-mb"
+            )
@@ -0,0 +1,206 @@
+"""
+Parse Cache Module
+Persistent SQLite cache of frontmatter parse results, so each file's YAML is
+parsed once across preprocessing validation, indexing and re-runs
+
+- Content key: sha256 of the file bytes (+ PARSER_VERSION) -> metadata (pickled,
+  keeps YAML dates etc. exact), body offset (+ body join for fenced frontmatter
+  whose body is not a suffix of the text), parse_success / parse_error
+- Path key: path -> (size, mtime_ns, sha256), so the hash of an unchanged file
+  is not recomputed
+
+The cache is shared by worker processes and threads (SQLite WAL); each thread
+opens its own connection on first use. Writes are buffered and committed every
+COMMIT_EVERY files, and when the process exits (worker processes included), so
+a crash loses at most the last few entries. Set PARSE_CACHE=off to disable it,
+or to a path to use another cache file (inherited by worker processes).
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+from multiprocessing import util as multiprocessing_util
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+# Bump when parser.py changes what it extracts - old entries are then ignored
+PARSER_VERSION = 2
+
+DEFAULT_PATH = Path(__file__).parent.parent / "database/parse_cache.sqlite"
+ENV_VAR = "PARSE_CACHE"
+
+COMMIT_EVERY = 200  # Buffered puts per transaction
+
+# (metadata, body_offset, body_join, parse_success, parse_error) - body_join: see parser.FrontmatterScan
+CachedParse = Tuple[Dict, int, Optional[Tuple[int, int]], bool, Optional[str]]
+
+
+class ParseCache:
+    """SQLite store of parse results keyed by content hash"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        # Not yet committed: content hash -> parses row, path -> paths row
+        self._pending_parses: Dict[str, Tuple] = {}
+        self._pending_paths: Dict[str, Tuple] = {}
+        self._pending_puts = 0
+        # Used by its own thread, and by the exit flush (which may run on another)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Several worker processes may write at once
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(parses)")]
+        if columns and 'body_join' not in columns:
+            # Written by an older version of this module: entries are only a cache
+            self._conn.execute("DROP TABLE parses")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS parses (
+                content_hash TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                metadata BLOB NOT NULL,
+                body_offset INTEGER NOT NULL,
+                body_join TEXT,
+                parse_success INTEGER NOT NULL,
+                parse_error TEXT,
+                PRIMARY KEY (content_hash, version)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS paths (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        # Runs at exit, in worker processes too (multiprocessing finalizers, unlike atexit)
+        multiprocessing_util.Finalize(self, self.close, exitpriority=10)
+
+    def content_hash(self, filepath: Path, raw: bytes, stat: os.stat_result) -> Tuple[str, bool]:
+        """
+        sha256 of the file bytes, taken from the path table if size and mtime are unchanged
+        Returns (hash, known) - known: the path table already has it
+        """
+
+        path = os.path.abspath(filepath)
+        with self._lock:
+            row = self._pending_paths.get(path)
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT path, size, mtime_ns, content_hash FROM paths WHERE path = ?", (path,)
+                ).fetchone()
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+            return row[3], True
+        return hashlib.sha256(raw).hexdigest(), False
+
+    def get(self, content_hash: str) -> Optional[CachedParse]:
+        with self._lock:
+            row = self._pending_parses.get(content_hash)
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT * FROM parses WHERE content_hash = ? AND version = ?",
+                    (content_hash, PARSER_VERSION)
+                ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        _, _, metadata, body_offset, body_join, parse_success, parse_error = row
+        if body_join is not None:
+            body_join = tuple(int(offset) for offset in body_join.split(','))
+        return pickle.loads(metadata), body_offset, body_join, bool(parse_success), parse_error
+
+    def put(self, filepath: Path, stat: os.stat_result, content_hash: str, result: Optional[CachedParse]):
+        """Remember the file's hash, and its parse result (None if already stored)"""
+
+        with self._lock:
+            if result is not None:
+                metadata, body_offset, body_join, parse_success, parse_error = result
+                self._pending_parses[content_hash] = (
+                    content_hash, PARSER_VERSION, pickle.dumps(metadata, pickle.HIGHEST_PROTOCOL), body_offset,
+                    ','.join(map(str, body_join)) if body_join is not None else None,
+                    int(parse_success), parse_error
+                )
+            path = os.path.abspath(filepath)
+            self._pending_paths[path] = (path, stat.st_size, stat.st_mtime_ns, content_hash)
+            self._pending_puts += 1
+            if self._pending_puts >= COMMIT_EVERY:
+                self._commit()
+
+    def flush(self):
+        """Commit buffered entries"""
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        if not self._pending_puts:
+            return
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO parses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   list(self._pending_parses.values()))
+            self._conn.executemany("INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)",
+                                   list(self._pending_paths.values()))
+        self._pending_parses.clear()
+        self._pending_paths.clear()
+        self._pending_puts = 0
+
+    def clear(self):
+        with self._lock:
+            self._pending_parses.clear()
+            self._pending_paths.clear()
+            self._pending_puts = 0
+            self._conn.execute("DELETE FROM parses")
+            self._conn.execute("DELETE FROM paths")
+            self._conn.commit()
+
+    def close(self):
+        """Commit buffered entries and close (a no-op if already closed)"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._commit()
+            except sqlite3.Error:
+                pass  # Only a cache: the entries are parsed again next time
+            self._conn.close()
+            self._conn = None
+
+
+# SQLite connections can't be shared across threads (parse_many) or forked processes
+_local = threading.local()
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """This thread's cache (opened on first use), or None when disabled or unusable"""
+
+    setting = os.environ.get(ENV_VAR, "")
+    if setting.lower() in ("off", "0", "false", "no"):
+        return None
+
+    if getattr(_local, 'cache', None) is None or _local.pid != os.getpid():
+        try:
+            _local.cache = ParseCache(Path(setting) if setting else DEFAULT_PATH)
+        except (sqlite3.Error, OSError):
+            # Read-only checkout, locked file... parsing still works without it
+            os.environ[ENV_VAR] = "off"
+            return None
+        _local.pid = os.getpid()
+
+    return _local.cache
+
+
+def disable_parse_cache():
+    """Turn the cache off for this process and worker processes started after this call"""
+    os.environ[ENV_VAR] = "off"
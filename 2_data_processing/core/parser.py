@@ -3,12 +3,21 @@ Document Parser Module
 Extracts YAML frontmatter and markdown content from files
 """
 
-import re
+import mmap
+import os
 import yaml
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 from dataclasses import dataclass
 
+from parse_cache import get_parse_cache
+
+
+# Files at least this large are memory-mapped instead of read into a bytes object
+MMAP_THRESHOLD = 1024 * 1024
+
 
 @dataclass
 class ParsedDocument:
@@ -21,51 +30,265 @@ class ParsedDocument:
     parse_error: Optional[str] = None
 
 
-def _strip_code_block_wrapper(content: str) -> tuple[str, bool]:
+FENCE_OPENINGS = ('```yml\n', '```yaml\n')
+
+
+@dataclass(frozen=True)
+class FrontmatterScan:
+    """
+    Frontmatter location in a file's text, as offsets (strings built on demand)
+
+    Same results as the former regex implementation, including its quirks:
+    - "```yml" / "```yaml" fenced frontmatter: fence lines are skipped; if the
+      frontmatter closes before the fenced block ends, the body is the rest of
+      the block + "\n\n" + the text after the fence (body_join)
+    - Blank lines after the closing --- are not part of the body
+    - Fenced block with whitespace-only frontmatter and a later closing --- after
+      the fence: the block's closing --- starts the frontmatter, which runs on
+      past the fence to that later --- (frontmatter_join)
+    """
+    text: str
+    wrapped: bool = False
+    frontmatter_start: int = -1  # -1: no frontmatter found
+    frontmatter_end: int = -1
+    body_start: int = 0
+    body_join: Optional[Tuple[int, int]] = None  # (end of fenced block, start of text after fence)
+    # (start of text after fence, closing newline there); closing = start - 1: the text
+    # after the fence starts with the closing ---
+    frontmatter_join: Optional[Tuple[int, int]] = None
+
+    @property
+    def found(self) -> bool:
+        return self.frontmatter_start >= 0
+
+    @property
+    def frontmatter(self) -> str:
+        if not self.found:
+            return ''
+        frontmatter = self.text[self.frontmatter_start:self.frontmatter_end]
+        if self.frontmatter_join is None:
+            return frontmatter
+        after_fence, closing = self.frontmatter_join
+        return frontmatter + ('\n\n' + self.text[after_fence:closing] if closing >= after_fence else '\n')
+
+    @property
+    def body(self) -> str:
+        return body_from_offsets(self.text, self.body_start, self.body_join)
+
+
+def body_from_offsets(text: str, body_start: int, body_join: Optional[Tuple[int, int]] = None) -> str:
+    """Body of a file's text from FrontmatterScan offsets (as stored by the parse cache)"""
+
+    if body_join is None:
+        return text[body_start:]
+    block_end, after_fence = body_join
+    return text[body_start:block_end] + '\n\n' + text[after_fence:]
+
+
+def _whitespace_run(text: str, pos: int) -> Tuple[int, int, int]:
     """
-    Strip code block wrappers from YAML frontmatter if present
-
-    Handles cases like:
-    ```yml
-    ---
-    title: ...
-    ---
-    ```
-    # Content
-
-    Returns:
-        (stripped_content, was_wrapped)
+    Whitespace run starting at pos
+    Returns (end of run, last newline in it, second-to-last newline); -1 = none
     """
 
-    # Check if content starts with code block
-    if content.startswith('```yml\n') or content.startswith('```yaml\n'):
-        # Remove opening code block
-        content = re.sub(r'^```ya?ml\n', '', content)
+    last = second = -1
+    end = len(text)
+    while pos < end and text[pos].isspace():
+        if text[pos] == '\n':
+            second, last = last, pos
+        pos += 1
+    return pos, last, second
 
-        # Find and remove closing ``` after YAML frontmatter
-        # Pattern: --- YAML --- followed by ``` then rest of content
-        pattern = r'^(---\s*\n.*?\n---)\s*\n```\s*\n(.*)$'
-        match = re.match(pattern, content, re.DOTALL)
 
-        if match:
-            yaml_part = match.group(1)
-            markdown_part = match.group(2)
-            return f"{yaml_part}\n\n{markdown_part}", True
+def _closing_at(text: str, q: int, fenced: bool) -> int:
+    """
+    Body start if the "\n---" at q closes the frontmatter, else -1
 
-        # Fallback: just remove opening ``` if pattern doesn't match
-        return content, True
+    Unfenced: whitespace containing a newline must follow "---".
+    Fenced: whitespace ending in a newline, "```", then whitespace containing a newline.
+    """
 
-    # No wrapper found
-    return content, False
+    run_end, last, _ = _whitespace_run(text, q + 4)
+    if last < 0:
+        return -1
+    if not fenced:
+        return last + 1
+
+    if last != run_end - 1 or not text.startswith('```', run_end):
+        return -1
+    _, last, _ = _whitespace_run(text, run_end + 3)
+    return last + 1 if last >= 0 else -1
+
+
+def _find_closing(text: str, pos: int, limit: int, fenced: bool) -> Optional[Tuple[int, int]]:
+    """First "\n---" from pos (before limit) that closes the frontmatter: (its newline, body start)"""
+
+    while True:
+        q = text.find('\n---', pos, limit)
+        if q < 0:
+            return None
+        body_start = _closing_at(text, q, fenced)
+        if body_start >= 0:
+            return q, body_start
+        pos = q + 1
+
+
+def _find_frontmatter(
+    text: str,
+    start: int,
+    limit: int,
+    fenced: bool,
+    blank_frontmatter: bool = True
+) -> Optional[Tuple[int, int, int]]:
+    """
+    Locate "---<ws>\n<frontmatter>\n---<closing>" at start, with the closing "\n---"
+    before limit. Returns (frontmatter start, closing newline, body start).
 
+    Linear time: each "\n---" candidate is checked once.
+    """
 
-def parse_markdown_with_frontmatter(filepath: Path) -> ParsedDocument:
+    if not text.startswith('---', start):
+        return None
+    _, last, second = _whitespace_run(text, start + 3)
+    if last < 0:
+        return None
+
+    frontmatter_start = last + 1
+    closing = _find_closing(text, frontmatter_start, limit, fenced)
+    if closing is not None:
+        return (frontmatter_start,) + closing
+
+    # Whitespace-only frontmatter: the closing --- starts right after the opening's blank lines
+    if blank_frontmatter and second >= 0 and last + 4 <= limit and text.startswith('---', last + 1):
+        body_start = _closing_at(text, last, fenced)
+        if body_start >= 0:
+            return second + 1, last, body_start
+
+    return None
+
+
+def scan_frontmatter(text: str) -> FrontmatterScan:
+    """Find YAML frontmatter and body in a file's text without copying it"""
+
+    fence = next((opening for opening in FENCE_OPENINGS if text.startswith(opening)), None)
+    if fence is None:
+        found = _find_frontmatter(text, 0, len(text), fenced=False)
+        if found is None:
+            return FrontmatterScan(text)
+        frontmatter_start, closing, body_start = found
+        return FrontmatterScan(text, False, frontmatter_start, closing, body_start)
+
+    # Fenced: the block ends at the first closing --- followed by ```
+    start = len(fence)
+    block = _find_frontmatter(text, start, len(text), fenced=True)
+    if block is None:
+        # No closing fence: only the opening fence line is dropped
+        found = _find_frontmatter(text, start, len(text), fenced=False)
+        if found is None:
+            return FrontmatterScan(text, wrapped=True, body_start=start)
+        frontmatter_start, closing, body_start = found
+        return FrontmatterScan(text, True, frontmatter_start, closing, body_start)
+
+    block_start, block_closing, after_fence = block
+
+    # The frontmatter itself may close earlier, inside the block (the block's own
+    # closing always qualifies, so it wins over a whitespace-only frontmatter)
+    found = _find_frontmatter(text, start, block_closing, fenced=False, blank_frontmatter=False)
+    if found is None:
+        # Whitespace-only frontmatter: the former regex ran on the block joined to the
+        # text after the fence ("---" + "\n\n" + rest), and its greedy whitespace match
+        # took the block's closing --- as the first frontmatter line. A closing ---
+        # after the fence then ends the frontmatter.
+        if text.startswith('---', start) and _whitespace_run(text, start + 3)[0] == block_closing + 1:
+            # The text after the fence may itself start with the closing ---
+            body_start = _closing_at(text, after_fence - 1, False) if text.startswith('---', after_fence) else -1
+            if body_start >= 0:
+                closing = after_fence - 1, body_start
+            else:
+                closing = _find_closing(text, after_fence, len(text), False)
+            if closing is not None:
+                return FrontmatterScan(text, True, block_closing + 1, block_closing + 4, closing[1],
+                                       frontmatter_join=(after_fence, closing[0]))
+        return FrontmatterScan(text, True, block_start, block_closing, after_fence)
+
+    frontmatter_start, closing, body_start = found
+    return FrontmatterScan(text, True, frontmatter_start, closing, body_start, (block_closing + 4, after_fence))
+
+
+def _parse_text(raw_content: str):
+    """
+    Split and parse frontmatter of a file's text
+    Returns (metadata, scan, parse_success, parse_error) - the body is scan.body
+    """
+
+    scan = scan_frontmatter(raw_content)
+
+    if not scan.found:
+        # No frontmatter found - return content only
+        error_msg = "No YAML frontmatter found (missing --- markers)"
+        if scan.wrapped:
+            error_msg += " (code block wrapper was stripped)"
+
+        return {}, scan, False, error_msg
+
+    # Try to parse YAML
+    try:
+        metadata = yaml.safe_load(scan.frontmatter)
+
+        if not metadata or not isinstance(metadata, dict):
+            return {}, scan, False, "YAML parsed but is empty or not a dictionary"
+
+        return metadata, scan, True, None
+
+    except yaml.YAMLError as e:
+        return {}, scan, False, f"YAML parsing error: {str(e)}"
+
+
+def _parse_buffer(filepath: Path, raw, stat: os.stat_result) -> ParsedDocument:
+    """Parse a file's bytes (bytes or mmap), through the parse cache"""
+
+    # Same text as open(..., 'r') would give (universal newlines)
+    raw_content = str(raw, 'utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+    cache = get_parse_cache()
+    cached = None
+    if cache:
+        content_hash, path_known = cache.content_hash(filepath, raw, stat)
+        cached = cache.get(content_hash)
+
+    if cached:
+        metadata, body_start, body_join, parse_success, parse_error = cached
+        content = body_from_offsets(raw_content, body_start, body_join)
+    else:
+        metadata, scan, parse_success, parse_error = _parse_text(raw_content)
+        content = scan.body
+
+    if cache and not (cached and path_known):
+        # Only offsets into the file text are stored, the body is rebuilt from them
+        result = None if cached else (metadata, scan.body_start, scan.body_join, parse_success, parse_error)
+        cache.put(filepath, stat, content_hash, result)
+
+    return ParsedDocument(
+        filepath=filepath,
+        filename=filepath.name,
+        metadata=metadata,
+        content=content,
+        parse_success=parse_success,
+        parse_error=parse_error
+    )
+
+
+def parse_markdown_with_frontmatter(filepath: Path, mmap_threshold: int = MMAP_THRESHOLD) -> ParsedDocument:
     """
     Parse markdown file with YAML frontmatter
 
     Handles cases where YAML is wrapped in code blocks (```yml or ```yaml)
     and automatically strips them.
 
+    Results are kept in the on-disk parse cache (parse_cache.py): a file whose
+    content was parsed before is only read, not parsed again.
+    Files of mmap_threshold bytes or more are memory-mapped instead of read.
+
     Returns ParsedDocument with:
     - metadata: dict (empty if parsing fails)
     - content: str (always extracted)
@@ -73,67 +296,90 @@ def parse_markdown_with_frontmatter(filepath: Path) -> ParsedDocument:
     - parse_error: str or None
     """
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        raw_content = f.read()
+    with open(filepath, 'rb') as f:
+        stat = os.fstat(f.fileno())
 
-    # Auto-fix: Strip code block wrappers if present
-    # Handles: ```yml\n---\n...---\n```
-    stripped_content, was_wrapped = _strip_code_block_wrapper(raw_content)
+        if stat.st_size >= mmap_threshold > 0:
+            # Decoded and hashed straight from the mapping, no intermediate bytes copy
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _parse_buffer(filepath, mapped, stat)
 
-    # Try to extract YAML frontmatter
-    # Pattern: starts with ---, YAML content, ends with ---
-    frontmatter_match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', stripped_content, re.DOTALL)
+        return _parse_buffer(filepath, f.read(), stat)
 
-    if not frontmatter_match:
-        # No frontmatter found - return content only
-        error_msg = "No YAML frontmatter found (missing --- markers)"
-        if was_wrapped:
-            error_msg += " (code block wrapper was stripped)"
-
-        return ParsedDocument(
-            filepath=filepath,
-            filename=filepath.name,
-            metadata={},
-            content=stripped_content,
-            parse_success=False,
-            parse_error=error_msg
-        )
-
-    frontmatter_text = frontmatter_match.group(1)
-    markdown_body = frontmatter_match.group(2)
-
-    # Try to parse YAML
-    try:
-        metadata = yaml.safe_load(frontmatter_text)
 
-        if not metadata or not isinstance(metadata, dict):
-            return ParsedDocument(
-                filepath=filepath,
-                filename=filepath.name,
-                metadata={},
-                content=markdown_body,
-                parse_success=False,
-                parse_error="YAML parsed but is empty or not a dictionary"
-            )
-
-        return ParsedDocument(
-            filepath=filepath,
-            filename=filepath.name,
-            metadata=metadata,
-            content=markdown_body,
-            parse_success=True,
-            parse_error=None
-        )
+def parse_many(
+    paths: Iterable[Path],
+    workers: int = 8,
+    ordered: bool = True,
+    mmap_threshold: int = MMAP_THRESHOLD,
+    max_pending: Optional[int] = None,
+    passthrough: Optional[Callable[[Path], bool]] = None
+) -> Iterator[Optional[ParsedDocument]]:
+    """
+    Parse many files with a thread pool, so file reads overlap
+    (helps most on network file systems, where per-file latency dominates)
+
+    Args:
+        paths: Files to parse (consumed lazily, in this thread)
+        workers: Reader threads (0 = parse one file at a time in this thread)
+        ordered: Yield in input order; False = as soon as each file is parsed
+        mmap_threshold: Files of this many bytes or more are memory-mapped
+        max_pending: Max files submitted but not yet yielded. Default: 4 per thread.
+        passthrough: Paths it returns True for are not parsed; None is yielded in
+                     their place (ordered only). They still count towards max_pending,
+                     so a caller can start its own work on them as they are pulled.
+
+    YAML parsing still holds the GIL; the gain is in waiting for I/O concurrently.
+    """
 
-    except yaml.YAMLError as e:
-        return ParsedDocument(
-            filepath=filepath,
-            filename=filepath.name,
-            metadata={},
-            content=markdown_body,
-            parse_success=False,
-            parse_error=f"YAML parsing error: {str(e)}"
-        )
+    if passthrough is not None and not ordered:
+        raise ValueError("passthrough needs ordered=True")
+
+    if workers < 1:
+        for filepath in paths:
+            if passthrough and passthrough(filepath):
+                yield None
+            else:
+                yield parse_markdown_with_frontmatter(filepath, mmap_threshold)
+        return
+
+    max_pending = max_pending or workers * 4
+    pending = deque() if ordered else set()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse") as pool:
+        try:
+            for filepath in paths:
+                if passthrough and passthrough(filepath):
+                    future = None
+                else:
+                    future = pool.submit(parse_markdown_with_frontmatter, filepath, mmap_threshold)
+
+                if ordered:
+                    pending.append(future)
+                    # Back-pressure: wait for the oldest file before submitting more
+                    if len(pending) >= max_pending:
+                        future = pending.popleft()
+                        yield future.result() if future is not None else None
+                else:
+                    pending.add(future)
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for finished in done:
+                            yield finished.result()
+
+            if ordered:
+                while pending:
+                    future = pending.popleft()
+                    yield future.result() if future is not None else None
+            else:
+                for finished in as_completed(pending):
+                    yield finished.result()
+                pending = set()
+        finally:
+            # Caller stopped early (error or generator closed) - drop queued work
+            for future in pending:
+                if future is not None:
+                    future.cancel()
 
 
 def main():
@@ -0,0 +1,358 @@
+"""
+Document Preparation Pipeline Module
+Runs parse → chunk → validate for one file (convert → validate for PDF/DOCX),
+optionally across a process pool
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+from parser import ParsedDocument, parse_many, parse_markdown_with_frontmatter
+from chunker import Chunk, Chunking, chunk_document
+from validator import ChunkValidator
+from dedup import minhash_signature
+from converters import CONVERTIBLE_SUFFIXES, convert_document, is_convertible
+
+
+SOURCE_SUFFIXES = ('.md',) + CONVERTIBLE_SUFFIXES
+
+
+@dataclass
+class PreparedChunk:
+    """A validated chunk ready for embedding"""
+    chunk_id: str
+    text: str
+    metadata: Dict  # The chunk's own fields
+    # Fields of the whole file: one dict shared by its chunks (pickled once), merged
+    # with metadata when the ChromaDB batch is built
+    document_metadata: Dict = field(default_factory=dict)
+    signature: Optional[Tuple[int, ...]] = None  # MinHash of the chunk content (near-duplicate detection)
+
+
+@dataclass
+class PreparedDocument:
+    """Everything the indexing writer needs for one file (picklable)"""
+    filepath: Path
+    filename: str
+    parse_success: bool
+    parse_error: Optional[str]
+    metadata_fields: int
+    total_chunks: int
+    validations: List[Dict] = field(default_factory=list)  # One entry per chunk, for logging
+    chunks: List[PreparedChunk] = field(default_factory=list)  # Valid chunks only
+    timings: Dict[str, float] = field(default_factory=dict)  # Stage -> seconds (parse/chunk/validate)
+
+
+# One validator per process (workers reuse it across files)
+_validator: Optional[ChunkValidator] = None
+
+
+def _get_validator() -> ChunkValidator:
+    global _validator
+    if _validator is None:
+        _validator = ChunkValidator()
+    return _validator
+
+
+def build_chunk_text(chunk: Chunk, metadata: Dict) -> str:
+    """
+    Build the text that gets embedded for a chunk
+
+    Enriches chunk text with Tier 2 metadata for better embedding.
+    This makes contacts, emails, systems searchable via semantic search.
+    """
+
+    metadata_context = []
+
+    if metadata.get('contact_names'):
+        metadata_context.append(f"Contacts: {metadata['contact_names']}")
+    if metadata.get('contact_emails'):
+        metadata_context.append(f"Emails: {metadata['contact_emails']}")
+    if metadata.get('system_names'):
+        metadata_context.append(f"Systems: {metadata['system_names']}")
+    if metadata.get('related_doc_ids'):
+        metadata_context.append(f"Related: {metadata['related_doc_ids']}")
+
+    # Combine: header + content + metadata context
+    chunk_text = f"{chunk.header}\n\n{chunk.content}"
+    if metadata_context:
+        chunk_text += "\n\n[Metadata: " + " | ".join(metadata_context) + "]"
+
+    return chunk_text
+
+
+def prepare_document(
+    filepath: Path,
+    signatures: bool = False,
+    parsed_doc: Optional[ParsedDocument] = None,
+    chunking: Optional[Chunking] = None
+) -> PreparedDocument:
+    """
+    Parse, chunk and validate a single markdown file (or convert a PDF/DOCX file)
+
+    Pure CPU work with no side effects, so it can run in a worker process.
+    With signatures=True each valid chunk also gets a MinHash signature.
+    parsed_doc: already parsed file (e.g. from parse_many), parsing is skipped
+    chunking: markdown chunking strategy (ChunkBudget / HierarchyChunking / RecordChunking); None = one chunk per header
+    """
+
+    validator = _get_validator()
+    timings = {}
+    converted = parsed_doc is None and is_convertible(filepath)
+
+    if converted:
+        # PDF/DOCX: pages/paragraphs are read while the chunks are validated
+        start = time.perf_counter()
+        parsed_doc, chunks = convert_document(filepath)
+        chunk_seconds = time.perf_counter() - start
+        # Chunk IDs keep the extension (report.pdf and report.md may both exist)
+        doc_key = filepath.name
+    else:
+        # Step 1: Parse
+        if parsed_doc is None:
+            start = time.perf_counter()
+            parsed_doc = parse_markdown_with_frontmatter(filepath)
+            timings['parse'] = time.perf_counter() - start
+
+        # Step 2: Chunk (lazily - chunks are produced as the loop below asks for them)
+        start = time.perf_counter()
+        chunks = chunk_document(
+            parsed_doc.content,
+            parsed_doc.metadata.get('title', 'Overview'),
+            chunking
+        )
+        chunk_seconds = time.perf_counter() - start
+        doc_key = filepath.stem
+
+    def timed(chunks):
+        # Chunks are produced lazily: time each next() as chunking, not validation
+        nonlocal chunk_seconds
+        chunks = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            chunk_seconds += time.perf_counter() - start
+            if chunk is None:
+                return
+            yield chunk
+
+    validations = []
+    prepared_chunks = []
+    document_metadata = shared_metadata = None
+    start = time.perf_counter()
+    chunk_seconds_before = chunk_seconds
+
+    # Step 3: Validate each chunk (document-level checks run once, see validate_document)
+    for chunk, validation_result in validator.validate_document(parsed_doc, timed(chunks)):
+        if validation_result.document_metadata is not document_metadata:
+            # One plain (picklable) dict per document validation, shared by its chunks
+            document_metadata = validation_result.document_metadata
+            shared_metadata = dict(document_metadata)
+
+        # Hierarchical chunks: children link to their parent section (expanded at query time)
+        validation_result.chunk_metadata['parent_id'] = (
+            f"{doc_key}_chunk_{chunk.parent_index}" if chunk.parent_index is not None else ''
+        )
+
+        validations.append({
+            'chunk_index': chunk.chunk_index,
+            'header': chunk.header,
+            'is_valid': validation_result.is_valid,
+            'severity': validation_result.severity,
+            'issues': validation_result.issues,
+            'metadata': validation_result.chunk_metadata,
+            'document_metadata': shared_metadata
+        })
+
+        # Skip invalid chunks
+        if validation_result.is_valid:
+            prepared_chunks.append(PreparedChunk(
+                chunk_id=f"{doc_key}_chunk_{chunk.chunk_index}",
+                text=build_chunk_text(chunk, shared_metadata),
+                metadata=validation_result.chunk_metadata,
+                document_metadata=shared_metadata,
+                # Parents repeat their children's text: never aliased to another file's parent
+                signature=minhash_signature(chunk.content) if signatures and chunk.chunk_type != 'parent' else None
+            ))
+
+    timings['convert' if converted else 'chunk'] = chunk_seconds
+    timings['validate'] = time.perf_counter() - start - (chunk_seconds - chunk_seconds_before)
+
+    return PreparedDocument(
+        filepath=filepath,
+        filename=parsed_doc.filename,
+        parse_success=parsed_doc.parse_success,
+        parse_error=parsed_doc.parse_error,
+        metadata_fields=len(parsed_doc.metadata),
+        total_chunks=len(validations),
+        validations=validations,
+        chunks=prepared_chunks,
+        timings=timings
+    )
+
+
+def is_source_file(name: str) -> bool:
+    """Markdown or convertible (PDF/DOCX) file, by name"""
+    return name.lower().endswith(SOURCE_SUFFIXES)
+
+
+def list_source_files(docs_dir: Path) -> List[Path]:
+    """Sorted source files of a directory"""
+    return sorted(path for path in docs_dir.iterdir() if is_source_file(path.name) and path.is_file())
+
+
+def iter_source_files(docs_dir: Path) -> Iterator[Path]:
+    """
+    Lazily yield the source files of a directory (directory order, not sorted)
+    Nothing is collected up front, so memory doesn't grow with the file count.
+    """
+
+    with os.scandir(docs_dir) as entries:
+        for entry in entries:
+            if is_source_file(entry.name) and entry.is_file():
+                yield Path(entry.path)
+
+
+
+def _finish_prepared(
+    filepath: Path,
+    parsed_doc: Optional[ParsedDocument],
+    future: Optional[Future],
+    signatures: bool,
+    chunking: Optional[Chunking]
+) -> PreparedDocument:
+    """Complete a file queued by _iter_prepared_serially"""
+
+    if future is None:
+        return prepare_document(filepath, signatures, parsed_doc, chunking)
+
+    # Converted in a worker process
+    start = time.perf_counter()
+    prepared = future.result()
+    prepared.timings['convert_wait'] = time.perf_counter() - start
+    return prepared
+
+
+def _iter_prepared_serially(
+    files: Iterable[Path],
+    signatures: bool,
+    io_threads: int,
+    convert_workers: int,
+    max_pending: Optional[int],
+    chunking: Optional[Chunking]
+) -> Iterator[PreparedDocument]:
+    """
+    Markdown files are chunked and validated in this process (read ahead on
+    io_threads threads by parse_many); PDF/DOCX files are converted ahead in a
+    process pool, within the same read-ahead window
+    """
+
+    if io_threads < 1 and convert_workers < 1:
+        for filepath in files:
+            yield prepare_document(filepath, signatures, chunking=chunking)
+        return
+
+    max_pending = max_pending or 4 * max(io_threads, convert_workers, 1)
+    queued = deque()  # (filepath, conversion future or None = prepare here), in input order
+    processes: List[ProcessPoolExecutor] = []  # Started with the first PDF/DOCX file
+
+    def pull_files() -> Iterator[Path]:
+        """Files as parse_many pulls them - conversions start as they enter the window"""
+        for filepath in files:
+            future = None
+            if convert_workers >= 1 and is_convertible(filepath):
+                if not processes:
+                    processes.append(ProcessPoolExecutor(max_workers=convert_workers))
+                future = processes[0].submit(prepare_document, filepath, signatures)
+            queued.append((filepath, future))
+            yield filepath
+
+    # PDF/DOCX files pass through unparsed; without io_threads markdown does too
+    # (parsed here), and the window only runs conversions ahead - no thread is started
+    passthrough = is_convertible if io_threads >= 1 else (lambda filepath: True)
+    read_ahead = parse_many(pull_files(), max(io_threads, 1), max_pending=max_pending, passthrough=passthrough)
+
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                parsed_doc = next(read_ahead)
+            except StopIteration:
+                break
+            waited = time.perf_counter() - start
+
+            filepath, future = queued.popleft()
+            prepared = _finish_prepared(filepath, parsed_doc, future, signatures, chunking)
+            if parsed_doc is not None:
+                prepared.timings['parse_wait'] = waited
+            yield prepared
+    finally:
+        # Writer stopped early (error or generator closed) - drop queued work
+        read_ahead.close()
+        for _, future in queued:
+            if future is not None:
+                future.cancel()
+        for pool in processes:
+            pool.shutdown()
+
+
+def iter_prepared_documents(
+    files: Iterable[Path],
+    workers: int = 1,
+    max_pending: Optional[int] = None,
+    signatures: bool = False,
+    io_threads: int = 0,
+    convert_workers: int = 0,
+    chunking: Optional[Chunking] = None
+) -> Iterator[PreparedDocument]:
+    """
+    Yield PreparedDocuments in input order
+
+    Args:
+        files: Files to prepare (order is preserved in the output)
+        workers: Worker processes. 1 = run serially in this process,
+                 0 = one worker per CPU core.
+        max_pending: Max files submitted but not yet consumed (bounded queue
+                     between the pool and the single writer). Default: 4 per worker.
+        signatures: Compute MinHash signatures for chunks (in the workers)
+        io_threads: Serial path only - read and parse markdown files ahead in this many
+                    threads (parse_many; 0 = no read-ahead); 'parse_wait' then times
+                    waiting for the next parsed file
+        convert_workers: Serial path only - convert PDF/DOCX files ahead in a pool of
+                         this many processes (0 = convert in this process)
+        chunking: Markdown chunking strategy (None = one chunk per header)
+
+    Output is identical to the serial path: each file is prepared by the same
+    pure function and results are consumed strictly in submission order.
+    """
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        yield from _iter_prepared_serially(files, signatures, io_threads, convert_workers, max_pending, chunking)
+        return
+
+    max_pending = max_pending or workers * 4
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            for filepath in files:
+                pending.append(pool.submit(prepare_document, filepath, signatures, None, chunking))
+
+                # Back-pressure: wait for the oldest file before submitting more
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Writer stopped early (error or generator closed) - drop queued work
+            for future in pending:
+                future.cancel()
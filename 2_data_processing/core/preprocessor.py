@@ -0,0 +1,246 @@
+"""
+Preprocessor Module
+Runs YAMLFixer.fix_document over a folder of markdown files in a process pool,
+skipping sources that are unchanged since the last run
+
+- State file (JSON): source filename -> sha256 of the source bytes it was fixed
+  from, plus the FIXER_VERSION used; a source is skipped when its hash matches
+  and its target still exists
+- Targets are written atomically (temp file + rename), so indexing never reads
+  a half-written file
+- Targets whose source is gone are removed (only ones recorded in the state),
+  and so is the previous target of a source that fails to fix
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from manifest import hash_file
+from yaml_fixer import FIXER_VERSION, YAMLFixer
+
+
+STATE_FILENAME = "preprocess_state.json"  # Default location: next to the target directory
+
+# Result statuses
+FIXED = "fixed"
+SKIPPED = "skipped"  # Source unchanged since the last run
+FAILED = "failed"  # Its previous target (if any) was removed
+REMOVED = "removed"  # Source deleted - its target was removed
+
+
+@dataclass
+class PreprocessResult:
+    """Outcome for one source file (one line of the JSONL report)"""
+    filename: str
+    status: str
+    source_hash: Optional[str] = None
+    corrections: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    def to_record(self) -> Dict:
+        record = asdict(self)
+        record['seconds'] = round(self.seconds, 5)
+        if record['error'] is None:
+            del record['error']
+        return record
+
+
+class PreprocessState:
+    """Source hashes of the last run, stored as JSON next to the preprocessed files"""
+
+    VERSION = 1
+
+    def __init__(self, path: Path, fixer_version: int = FIXER_VERSION, files: Optional[Dict[str, Dict]] = None):
+        self.path = Path(path)
+        self.fixer_version = fixer_version
+        self.files: Dict[str, Dict] = files or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "PreprocessState":
+        """Load state, or return an empty one if missing, unreadable or another version"""
+
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return cls(path)
+
+        if data.get('version') != cls.VERSION:
+            return cls(path)
+        return cls(path, data.get('fixer_version'), data.get('files', {}))
+
+    def is_unchanged(self, filename: str, file_hash: str) -> bool:
+        entry = self.files.get(filename)
+        return entry is not None and entry.get('hash') == file_hash
+
+    def record(self, filename: str, file_hash: str):
+        self.files[filename] = {'hash': file_hash}
+
+    def remove(self, filename: str):
+        self.files.pop(filename, None)
+
+    def clear(self):
+        """Forget every source (all files are fixed again) and adopt the current fixer version"""
+        self.files = {}
+        self.fixer_version = FIXER_VERSION
+
+    def save(self):
+        """Write state atomically (temp file + rename)"""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.VERSION,
+                'fixer_version': self.fixer_version,
+                'files': self.files
+            }, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+
+
+def write_atomic(path: Path, text: str):
+    """
+    Write text to path via a temp file in the same directory + rename
+    Readers see either the old file or the complete new one.
+    """
+
+    tmp_path = path.with_name(path.name + '.tmp')  # Not *.md: never picked up as a source
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+# One fixer per process (workers reuse it across files)
+_fixer: Optional[YAMLFixer] = None
+
+
+def _get_fixer() -> YAMLFixer:
+    global _fixer
+    if _fixer is None:
+        _fixer = YAMLFixer()
+    return _fixer
+
+
+def fix_file(source: Path, target_dir: Path) -> PreprocessResult:
+    """Fix one source file and write it to target_dir (runs in worker processes)"""
+
+    start = time.perf_counter()
+    result = PreprocessResult(source.name, FIXED)
+    try:
+        raw = source.read_bytes()
+        # Hash of the bytes actually fixed, in case the file changes during the run
+        result.source_hash = hashlib.sha256(raw).hexdigest()
+        # Universal newlines, as text-mode reads (and parser.py) give
+        content = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        fixed_content, result.corrections = _get_fixer().fix_document(content)
+        write_atomic(target_dir / source.name, fixed_content)
+    except Exception as e:
+        result.status = FAILED
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _fix_files(sources: List[Path], target_dir: Path, workers: int) -> Iterator[PreprocessResult]:
+    """Results in source order - serially, or from a process pool"""
+
+    workers = min(workers, len(sources))
+    if workers <= 1:
+        yield from map(fix_file, sources, repeat(target_dir))
+        return
+
+    # Files are small: hand them out in batches to keep pickling overhead down
+    chunksize = max(1, min(32, len(sources) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fix_file, sources, repeat(target_dir), chunksize=chunksize)
+
+
+def preprocess_directory(
+    source_dir: Path,
+    target_dir: Path,
+    state_path: Optional[Path] = None,
+    workers: int = 0,
+    force: bool = False
+) -> Iterator[PreprocessResult]:
+    """
+    Fix the markdown files of source_dir into target_dir, yielding one result per file
+
+    Args:
+        state_path: State file (default: STATE_FILENAME next to target_dir)
+        workers: Processes running the fixer (0 = all CPU cores, 1 = serial)
+        force: Fix every file, even if unchanged since the last run
+
+    Skipped files are yielded first, then removed ones, then fixed/failed ones as
+    they complete. The state is saved when the generator finishes (or is closed),
+    so an interrupted run keeps the files it completed.
+    """
+
+    source_dir, target_dir = Path(source_dir), Path(target_dir)
+    state = PreprocessState.load(state_path or target_dir.parent / STATE_FILENAME)
+    sources = sorted(source_dir.glob("*.md"))
+    source_names = {source.name for source in sources}
+
+    # Taken before a forced run forgets the hashes - those targets must still go
+    orphans = sorted(set(state.files) - source_names)
+    if force or state.fixer_version != FIXER_VERSION:
+        state.clear()
+
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    pending = []
+    for source in sources:
+        if state.is_unchanged(source.name, hash_file(source)) and (target_dir / source.name).exists():
+            yield PreprocessResult(source.name, SKIPPED, state.files[source.name]['hash'])
+        else:
+            pending.append(source)
+
+    try:
+        for filename in orphans:
+            (target_dir / filename).unlink(missing_ok=True)
+            state.remove(filename)
+            yield PreprocessResult(filename, REMOVED)
+
+        if workers == 0:
+            workers = os.cpu_count() or 1
+
+        for result in _fix_files(pending, target_dir, workers):
+            if result.status == FIXED:
+                state.record(result.filename, result.source_hash)
+            else:
+                # Don't leave the previous run's output to be indexed as current
+                (target_dir / result.filename).unlink(missing_ok=True)
+                state.remove(result.filename)
+            yield result
+    finally:
+        state.save()
+
+
+def write_report(results: List[PreprocessResult], report_path: Path):
+    """One JSON object per file"""
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result.to_record(), ensure_ascii=False) + '\n')
@@ -0,0 +1,139 @@
+"""
+Template Schema Module
+Frontmatter key mapping compiled once from the input templates, so metadata
+written with Hebrew keys (input_template_hebrew.md) reads like the English one
+
+The templates' frontmatter blocks list the same fields in the same order:
+title ↔ כותרת, department ↔ מחלקה, documented_by ↔ תועד_על_ידי (and its
+nested name ↔ שם, email ↔ אימייל...). Keys are paired by position; the English
+key is the canonical one.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import yaml
+
+from parser import scan_frontmatter
+
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+CANONICAL_TEMPLATE = "input_template_english.md"
+ALIAS_TEMPLATES = ("input_template_hebrew.md",)
+
+
+@dataclass(frozen=True)
+class TemplateSchema:
+    """Key -> canonical key table for one mapping level of the frontmatter"""
+    fields: Tuple[str, ...] = ()  # Canonical keys, template order
+    aliases: Dict[str, str] = field(default_factory=dict)  # Any known key (canonical too) -> canonical key
+    nested: Dict[str, "TemplateSchema"] = field(default_factory=dict)  # Canonical key -> schema of its mapping
+
+    def canonical(self, key: str) -> str:
+        return self.aliases.get(key, key)
+
+    def names(self, canonical_key: str) -> Tuple[str, ...]:
+        """The canonical key and all its aliases"""
+        return (canonical_key,) + tuple(
+            key for key, target in self.aliases.items() if target == canonical_key and key != canonical_key
+        )
+
+    def normalize(self, data: Dict) -> Dict:
+        """
+        Copy of data with alias keys renamed to canonical ones (nested mappings too)
+        A value under the canonical key wins over one under an alias.
+        Returns data itself when nothing is renamed.
+        """
+
+        normalized: Dict = {}
+        changed = False
+        for key, value in data.items():
+            canonical = self.aliases.get(key, key) if isinstance(key, str) else key
+            if canonical != key:
+                changed = True
+                if canonical in data:
+                    continue
+            nested = self.nested.get(canonical)
+            if nested is not None and isinstance(value, dict):
+                normalized_value = nested.normalize(value)
+                changed = changed or normalized_value is not value
+                value = normalized_value
+            normalized[canonical] = value
+        return normalized if changed else data
+
+
+def _pair(canonical: Dict, alias: Dict, aliases: Dict[str, str], nested: Dict[str, Dict]):
+    """Pair the keys of two parallel template mappings by position"""
+
+    for canonical_key, alias_key in zip(canonical, alias):
+        aliases.setdefault(canonical_key, canonical_key)
+        aliases.setdefault(alias_key, canonical_key)
+        if isinstance(canonical[canonical_key], dict) and isinstance(alias[alias_key], dict):
+            nested.setdefault(canonical_key, []).append((canonical[canonical_key], alias[alias_key]))
+
+
+def compile_schema(canonical: Dict, alias_frontmatters: Iterable[Dict]) -> TemplateSchema:
+    """Schema from the canonical template's frontmatter and its translations"""
+
+    aliases: Dict[str, str] = {key: key for key in canonical}
+    nested_pairs: Dict[str, list] = {}
+    for alias in alias_frontmatters:
+        _pair(canonical, alias, aliases, nested_pairs)
+
+    nested = {
+        key: compile_schema(canonical[key], [alias for _, alias in pairs])
+        for key, pairs in nested_pairs.items()
+    }
+    return TemplateSchema(tuple(canonical), aliases, nested)
+
+
+def read_template_frontmatter(template_path: Path) -> Optional[Dict]:
+    """The template's frontmatter as a dict (None if missing or unreadable)"""
+
+    try:
+        with open(template_path, 'r', encoding='utf-8') as f:
+            scan = scan_frontmatter(f.read())
+        data = yaml.safe_load(scan.frontmatter) if scan.found else None
+    except (OSError, yaml.YAMLError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@lru_cache(maxsize=None)
+def load_template_schema(templates_dir: Path = TEMPLATES_DIR) -> TemplateSchema:
+    """
+    Schema compiled from the template files (once per process)
+    Empty schema (no aliases) if the canonical template can't be read.
+    """
+
+    canonical = read_template_frontmatter(Path(templates_dir) / CANONICAL_TEMPLATE)
+    if canonical is None:
+        return TemplateSchema()
+
+    alias_frontmatters = []
+    for name in ALIAS_TEMPLATES:
+        frontmatter = read_template_frontmatter(Path(templates_dir) / name)
+        if frontmatter is not None:
+            alias_frontmatters.append(frontmatter)
+    return compile_schema(canonical, alias_frontmatters)
+
+
+def main():
+    """Print the key mapping compiled from the templates"""
+
+    schema = load_template_schema()
+
+    def show(level: TemplateSchema, indent: str = ""):
+        for key in level.fields:
+            aliases = [name for name in level.names(key) if name != key]
+            print(f"{indent}{key}: {', '.join(aliases) if aliases else '-'}")
+            if key in level.nested:
+                show(level.nested[key], indent + "  ")
+
+    show(schema)
+
+
+if __name__ == "__main__":
+    main()
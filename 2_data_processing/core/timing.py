@@ -0,0 +1,139 @@
+"""
+Stage Timing Module
+Per-stage wall-time histograms for the indexing pipeline, plus a cProfile helper
+"""
+
+import bisect
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+
+# Histogram bucket upper bounds in seconds (log-spaced, 100µs .. 60s, then +inf)
+BUCKET_BOUNDS = [
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0,
+]
+
+
+class StageHistogram:
+    """Count, total, min/max and bucketed distribution of one stage's durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (capped at max), i.e. an upper estimate"""
+
+        if not self.count:
+            return 0.0
+
+        target = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 4),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'min_ms': round(self.min * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p95_ms': round(self.percentile(95) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            # Non-empty buckets only: "<=0.005s": 12
+            'histogram': {
+                (f"<={BUCKET_BOUNDS[i]}s" if i < len(BUCKET_BOUNDS) else f">{BUCKET_BOUNDS[-1]}s"): n
+                for i, n in enumerate(self.buckets) if n
+            }
+        }
+
+
+class StageTimings:
+    """
+    Named stage histograms for one run
+
+    Stages are recorded per unit of work (per file for parse/chunk/validate,
+    per batch for embed/write, once for run-level steps) and reported in
+    the order they were first seen.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageHistogram] = {}
+
+    def add(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = StageHistogram()
+        histogram.add(seconds)
+
+    def add_all(self, timings: Dict[str, float]):
+        """Record several stages at once (e.g. a file's {'parse': .., 'chunk': ..})"""
+        for stage, seconds in timings.items():
+            self.add(stage, seconds)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Dict]:
+        return {stage: histogram.to_dict() for stage, histogram in self.stages.items()}
+
+    def format_table(self) -> List[str]:
+        """
+        Summary rows for console output (stages sorted by total time)
+        Stages overlap ('prepare' contains parse/chunk/validate when serial), so totals don't add up.
+        """
+
+        lines = [f"  {'Stage':<16}{'Count':>8}{'Total s':>10}{'Mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'Max ms':>10}"]
+
+        for stage, histogram in sorted(self.stages.items(), key=lambda item: -item[1].total):
+            stats = histogram.to_dict()
+            lines.append(
+                f"  {stage:<16}{stats['count']:>8}{stats['total_seconds']:>10.2f}{stats['mean_ms']:>10.2f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+            )
+
+        return lines
+
+
+def write_profile(profiler: cProfile.Profile, path: Path, top: int = 20) -> str:
+    """
+    Save a cProfile run as a pstats dump and return the top functions by
+    cumulative time as text (inspect the dump later: python -m pstats <path>)
+    """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(path))
+
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(top)
+    return output.getvalue()
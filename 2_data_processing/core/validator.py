@@ -3,11 +3,16 @@ Chunk Validator Module
 Validates and enriches chunks before indexing
 """
 
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 from parser import ParsedDocument
-from chunker import Chunk
+from chunker import Chunk, record_label
+
+
+# Record fields (chunk_records) are stored as "field:<name>" metadata keys
+RECORD_FIELD_PREFIX = "field:"
 
 
 @dataclass
@@ -16,7 +21,21 @@ class ValidationResult:
     is_valid: bool
     severity: str  # 'info', 'warning', 'critical'
     issues: list
-    enriched_metadata: Dict
+    chunk_metadata: Dict  # This chunk's own fields only
+    document_metadata: Mapping[str, Any]  # Shared by all chunks of the file (DocumentValidation.metadata)
+
+    @property
+    def enriched_metadata(self) -> Dict:
+        """Document fields followed by the chunk's own (a new dict on every access)"""
+        return {**self.document_metadata, **self.chunk_metadata}
+
+
+@dataclass(frozen=True)
+class DocumentValidation:
+    """Document-level part of validation, computed once and shared by all chunks of a file"""
+    severity: str  # 'info' or 'warning'
+    issues: Tuple[str, ...]
+    metadata: Mapping[str, Any]  # Read-only: filename, doc_id, Tier 1 and Tier 2 fields
 
 
 class ChunkValidator:
@@ -33,20 +52,15 @@ class ChunkValidator:
             'frequency': ''
         }
 
-    def validate_chunk(
-        self,
-        chunk: Chunk,
-        parsed_doc: ParsedDocument
-    ) -> ValidationResult:
+    def validate_document_metadata(self, parsed_doc: ParsedDocument) -> DocumentValidation:
         """
-        Validate a chunk and enrich its metadata
+        Check the document's parse result and build the metadata shared by its chunks
 
         Args:
-            chunk: The chunk to validate
-            parsed_doc: Original parsed document with metadata
+            parsed_doc: Parsed document with metadata
 
         Returns:
-            ValidationResult with validation status and enriched metadata
+            DocumentValidation with document-level issues and metadata
         """
 
         issues = []
@@ -68,30 +82,21 @@ class ChunkValidator:
                 )
                 issues.append(f"Title extracted from content/filename")
 
-        # Validate chunk has content
-        if not chunk.content or len(chunk.content.strip()) < 10:
-            issues.append(f"Chunk {chunk.chunk_index} has insufficient content ({len(chunk.content)} chars)")
-            severity = 'warning'
-
         # Enrich metadata with defaults for missing fields
         for field, default_value in self.default_metadata.items():
             if field not in metadata or metadata[field] is None:
                 metadata[field] = default_value
 
-        # Add chunk-specific metadata
-        enriched_metadata = {
+        document_metadata = {
             'filename': parsed_doc.filename,
             'doc_id': parsed_doc.filepath.stem,
-            'chunk_index': chunk.chunk_index,
-            'header': chunk.header,
-            'chunk_type': chunk.chunk_type,
             # Tier 1: Document-level metadata (essential)
             'title': metadata.get('title', parsed_doc.filename),
-            'category': metadata.get('category', 'Unknown'),
-            'subcategory': metadata.get('subcategory', ''),
-            'priority': metadata.get('priority', ''),
-            'cluster': metadata.get('cluster', ''),
-            'frequency': metadata.get('frequency', ''),
+            'category': metadata['category'],
+            'subcategory': metadata['subcategory'],
+            'priority': metadata['priority'],
+            'cluster': metadata['cluster'],
+            'frequency': metadata['frequency'],
             # Tier 2: Extracted metadata (searchable via text enrichment)
             'contact_names': metadata.get('contact_names', ''),
             'contact_emails': metadata.get('contact_emails', ''),
@@ -99,9 +104,59 @@ class ChunkValidator:
             'related_doc_ids': metadata.get('related_doc_ids', ''),
         }
 
+        return DocumentValidation(severity, tuple(issues), MappingProxyType(document_metadata))
+
+    def validate_chunk(
+        self,
+        chunk: Chunk,
+        parsed_doc: ParsedDocument,
+        document: Optional[DocumentValidation] = None
+    ) -> ValidationResult:
+        """
+        Validate a chunk and build its own metadata (the document's is shared)
+
+        Args:
+            chunk: The chunk to validate
+            parsed_doc: Original parsed document with metadata
+            document: validate_document_metadata(parsed_doc), if already computed
+
+        Returns:
+            ValidationResult with validation status and enriched metadata
+        """
+
+        if document is None:
+            document = self.validate_document_metadata(parsed_doc)
+
+        issues = list(document.issues)
+        severity = document.severity
+
+        content_length = len(chunk.content.strip())
+
+        # Validate chunk has content
+        if content_length < 10:
+            issues.append(f"Chunk {chunk.chunk_index} has insufficient content ({len(chunk.content)} chars)")
+            severity = 'warning'
+
+        # Chunk-specific metadata; document-level fields stay in document.metadata
+        chunk_metadata = {
+            'chunk_index': chunk.chunk_index,
+            'header': chunk.header,
+            'chunk_type': chunk.chunk_type,
+            'header_path': chunk.header_path
+        }
+
+        # Template records: label, number and filled fields, for filtering
+        if chunk.fields:
+            record_type, record_number = record_label(chunk.header)
+            chunk_metadata['record_type'] = record_type
+            if record_number is not None:
+                chunk_metadata['record_number'] = record_number
+            for name, value in chunk.fields.items():
+                chunk_metadata[f"{RECORD_FIELD_PREFIX}{name}"] = value
+
         # Determine if chunk is valid for indexing
         # Currently, we index everything unless content is too short
-        is_valid = len(chunk.content.strip()) >= 10
+        is_valid = content_length >= 10
 
         if not is_valid:
             severity = 'critical'
@@ -110,9 +165,39 @@ class ChunkValidator:
             is_valid=is_valid,
             severity=severity,
             issues=issues,
-            enriched_metadata=enriched_metadata
+            chunk_metadata=chunk_metadata,
+            document_metadata=document.metadata
         )
 
+    def validate_document(
+        self,
+        parsed_doc: ParsedDocument,
+        chunks: Iterable[Chunk]
+    ) -> Iterator[Tuple[Chunk, ValidationResult]]:
+        """
+        Validate all chunks of a document (lazily, as chunks are produced)
+
+        Document-level checks and metadata are computed once and shared;
+        only the chunk-specific fields are built per chunk. They are computed
+        again if parse_success / parse_error change while the chunks are
+        produced (converters find read errors as they go).
+
+        Args:
+            parsed_doc: Original parsed document with metadata
+            chunks: The document's chunks (list or iterator)
+
+        Returns:
+            Iterator of (chunk, ValidationResult)
+        """
+
+        document = None
+        parse_state = None
+        for chunk in chunks:
+            if (parsed_doc.parse_success, parsed_doc.parse_error) != parse_state:
+                document = self.validate_document_metadata(parsed_doc)
+                parse_state = (parsed_doc.parse_success, parsed_doc.parse_error)
+            yield chunk, self.validate_chunk(chunk, parsed_doc, document)
+
     def _extract_title_from_content(self, content: str, filename: str) -> str:
         """
         Extract title from first markdown header or use filename
@@ -172,9 +257,7 @@ def main():
     # Validate each chunk
     validator = ChunkValidator()
 
-    for chunk in chunks:
-        result = validator.validate_chunk(chunk, parsed_doc)
-
+    for chunk, result in validator.validate_document(parsed_doc, chunks):
         print(f"Chunk {chunk.chunk_index}: {chunk.header}")
         print(f"  Valid: {result.is_valid}")
         print(f"  Severity: {result.severity}")
@@ -1,11 +1,80 @@
 """
 YAML Fixer Module
 Extracts and flattens YAML metadata into searchable fields
+Hebrew template keys (כותרת, מחלקה...) are read as their English names (template_schema.py)
 """
 
 import re
 import yaml
-from typing import Dict, Tuple, List
+from typing import Dict, Iterable, Tuple, List, Optional
+
+from template_schema import TemplateSchema, load_template_schema
+
+
+# Bump when fix_document's output changes - preprocessing then fixes every file again
+FIXER_VERSION = 1
+
+# libyaml bindings when compiled in (same results as the pure-Python ones for text
+# that passes _libyaml_compatible; PyYAML falls back to Python otherwise)
+SAFE_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+SAFE_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+ESSENTIAL_FIELDS = ('title', 'category', 'subcategory', 'priority', 'frequency', 'cluster')
+# Template fields written only when the document has them
+TEMPLATE_FIELDS = ('department', 'relevant_domains')
+
+# Frontmatter region
+CODE_BLOCK_OPENING = re.compile(r'^```ya?ml\s*\n')
+CODE_BLOCK_CLOSING = re.compile(r'\n```\s*\n')
+FRONTMATTER_PATTERN = re.compile(r'^---\s*\n(.*?)\n---\s*\n(.*)$', re.DOTALL)
+UNCLOSED_FRONTMATTER_PATTERN = re.compile(r'^---\s*\n(.*?)\n(#.*)$', re.DOTALL)
+
+# Text-level corrections
+EMAIL_VALUE_PATTERN = re.compile(r'(\s+email:\s+)([^\s"\']+@[^\s"\']+)')
+URL_VALUE_PATTERN = re.compile(r'(\s+url:\s+)(https?://[^\s"\']+)')
+MARKDOWN_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+
+
+def field_line_pattern(names: Iterable[str]) -> re.Pattern:
+    """
+    Every "name: value" line of the given keys, top-level (empty indent) or indented,
+    in one pass. Zero-width (lookahead), so a value that runs onto the next line
+    doesn't hide a field on that line - same matches as one search per key.
+    """
+
+    alternatives = '|'.join(re.escape(name) for name in names)
+    return re.compile(rf'^(?=(\s*)({alternatives}):\s*(.+)$)', re.MULTILINE)
+
+
+# Tier 2 extraction
+NAME_PATTERN = re.compile(r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')  # "John Doe (Role)"
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+SYSTEM_PATTERNS = (
+    re.compile(r'([A-Z][a-z]+(?:[A-Z][a-z]+)+)'),  # CamelCase: PermitTrack
+    re.compile(r'([A-Z]{2,})'),  # All caps: BH
+)
+UPPERCASE_PATTERN = re.compile(r'[A-Z]')
+RELATED_DOC_PATTERN = re.compile(r'(res_[a-z_]+_\d{3})')
+
+SYSTEM_NAME_EXCLUDE = frozenset({'None', 'Step', 'Section', 'Overview', 'Title', 'Code', 'High', 'Low'})
+
+
+def _libyaml_compatible(text: str, multiline: bool = True) -> bool:
+    """
+    libyaml and PyYAML's Python parser/emitter differ on tabs, non-printable
+    characters and characters outside the BMP - anything else gives identical results
+    """
+
+    if multiline:
+        if '\t' in text:
+            return False
+        text = text.replace('\n', '')
+    return text.isprintable() and (not text or max(text) < '\U00010000')
+
+
+def _unique(values: List[str]) -> List[str]:
+    """Distinct values in first-seen order (stable output across runs)"""
+    return list(dict.fromkeys(values))
 
 
 class YAMLFixer:
@@ -16,10 +85,20 @@ class YAMLFixer:
     - Tier 1: Essential fields (title, category, priority)
     - Tier 2: Extract values from complex nested structures
     - All data becomes searchable (embedded in text + stored in metadata)
+
+    Patterns are compiled once; the raw YAML is scanned once for all essential
+    fields, and each Tier 2 pattern only runs when its text can occur.
+    Keys are normalized with the template schema (either template language).
     """
 
-    def __init__(self):
+    def __init__(self, schema: Optional[TemplateSchema] = None):
         self.corrections_made = []
+        self.schema = schema if schema is not None else load_template_schema()
+
+        # Essential field -> its names in any template language (regex fallback)
+        self.field_names = {field: self.schema.names(field) for field in ESSENTIAL_FIELDS}
+        self.field_for_name = {name: field for field, names in self.field_names.items() for name in names}
+        self.field_line_pattern = field_line_pattern(self.field_for_name)
 
     def fix_document(self, content: str) -> Tuple[str, List[str]]:
         """
@@ -45,7 +124,8 @@ class YAMLFixer:
         flat_metadata = self._extract_all_fields(parsed_data, yaml_text)
 
         # Serialize to clean YAML
-        clean_yaml = yaml.dump(flat_metadata, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        dumper = SAFE_DUMPER if all(_libyaml_compatible(value, multiline=False) for value in flat_metadata.values()) else yaml.Dumper
+        clean_yaml = yaml.dump(flat_metadata, Dumper=dumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
 
         # Reconstruct
         fixed_content = f"---\n{clean_yaml}---\n\n{body}"
@@ -57,17 +137,20 @@ class YAMLFixer:
 
         # Remove code block wrapper
         if content.startswith('```yml') or content.startswith('```yaml'):
-            content = re.sub(r'^```ya?ml\s*\n', '', content)
-            content = re.sub(r'\n```\s*\n', '\n', content, count=1)
+            content = CODE_BLOCK_OPENING.sub('', content, count=1)
+            content = CODE_BLOCK_CLOSING.sub('\n', content, count=1)
             self.corrections_made.append("Removed code block wrapper")
 
+        if not content.startswith('---'):
+            return "", content, False
+
         # Try standard
-        match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
+        match = FRONTMATTER_PATTERN.match(content)
         if match:
             return match.group(1), match.group(2), True
 
         # Try missing closing
-        match = re.match(r'^---\s*\n(.*?)\n(#.*)$', content, re.DOTALL)
+        match = UNCLOSED_FRONTMATTER_PATTERN.match(content)
         if match:
             self.corrections_made.append("Added missing closing ---")
             return match.group(1), match.group(2), True
@@ -75,38 +158,33 @@ class YAMLFixer:
         return "", content, False
 
     def _clean_yaml_text(self, yaml_text: str) -> str:
-        """Apply text-level corrections"""
+        """Apply text-level corrections (each pass only if its key/marker occurs)"""
 
         # Quote emails
-        yaml_text = re.sub(
-            r'(\s+email:\s+)([^\s"\']+@[^\s"\']+)',
-            lambda m: f'{m.group(1)}"{m.group(2)}"',
-            yaml_text
-        )
+        if 'email:' in yaml_text:
+            yaml_text = EMAIL_VALUE_PATTERN.sub(lambda m: f'{m.group(1)}"{m.group(2)}"', yaml_text)
 
         # Quote URLs
-        yaml_text = re.sub(
-            r'(\s+url:\s+)(https?://[^\s"\']+)',
-            lambda m: f'{m.group(1)}"{m.group(2)}"',
-            yaml_text
-        )
+        if 'url:' in yaml_text:
+            yaml_text = URL_VALUE_PATTERN.sub(lambda m: f'{m.group(1)}"{m.group(2)}"', yaml_text)
 
         # Remove Markdown links [text](url) → "text"
-        yaml_text = re.sub(
-            r'\[([^\]]+)\]\([^\)]+\)',
-            lambda m: f'"{m.group(1)}"',
-            yaml_text
-        )
+        if '](' in yaml_text:
+            yaml_text = MARKDOWN_LINK_PATTERN.sub(lambda m: f'"{m.group(1)}"', yaml_text)
 
         return yaml_text
 
     def _safe_parse_yaml(self, yaml_text: str) -> Dict:
         """Try to parse YAML, return empty dict if fails"""
 
+        loader = SAFE_LOADER if _libyaml_compatible(yaml_text) else yaml.SafeLoader
         try:
-            parsed = yaml.safe_load(yaml_text)
+            parsed = yaml.load(yaml_text, Loader=loader)
             if isinstance(parsed, dict):
-                return parsed
+                normalized = self.schema.normalize(parsed)
+                if normalized is not parsed:
+                    self.corrections_made.append("Mapped template keys to English names")
+                return normalized
         except:
             self.corrections_made.append("YAML parsing failed, extracting with regex")
 
@@ -123,12 +201,23 @@ class YAMLFixer:
         flat = {}
 
         # Tier 1: Essential fields (try parsed first, then regex fallback)
-        flat['title'] = self._get_field(parsed, raw_yaml, 'title', '')
-        flat['category'] = self._get_field(parsed, raw_yaml, 'category', '')
-        flat['subcategory'] = self._get_field(parsed, raw_yaml, 'subcategory', '')
-        flat['priority'] = self._get_field(parsed, raw_yaml, 'priority', '')
-        flat['frequency'] = self._get_field(parsed, raw_yaml, 'frequency', '')
-        flat['cluster'] = self._get_field(parsed, raw_yaml, 'cluster', '')
+        field_lines = None
+        for field in ESSENTIAL_FIELDS:
+            value = self._get_parsed_field(parsed, field)
+            if value is None:
+                if not any(name in raw_yaml for name in self.field_names[field]):
+                    value = ''  # Key not in the text at all: nothing to scan for
+                else:
+                    if field_lines is None:
+                        field_lines = self._scan_field_lines(raw_yaml)
+                    value = self._get_raw_field(field_lines, field, '')
+            flat[field] = value
+
+        # Template fields (when present)
+        for field in TEMPLATE_FIELDS:
+            value = parsed.get(field)
+            if value is not None:
+                flat[field] = ', '.join(str(item) for item in value) if isinstance(value, list) else str(value)
 
         # Tier 2: Extract from nested structures
         flat['contact_names'] = self._extract_contact_names(parsed, raw_yaml)
@@ -138,35 +227,45 @@ class YAMLFixer:
 
         return flat
 
-    def _get_field(self, parsed: Dict, raw_yaml: str, field: str, default: str) -> str:
-        """Get field from parsed dict or extract with regex"""
+    def _get_parsed_field(self, parsed: Dict, field: str) -> Optional[str]:
+        """Field from the parsed dict, top-level or nested in responsibility_details"""
 
-        # Try parsed dict first
         if field in parsed:
             return str(parsed[field])
 
-        # Try nested in responsibility_details
         if 'responsibility_details' in parsed:
             details = parsed['responsibility_details']
             if isinstance(details, dict) and field in details:
                 return str(details[field])
 
-        # Fallback: regex extraction from raw YAML (handles both top-level and indented)
+        return None
+
+    def _scan_field_lines(self, raw_yaml: str) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Field -> (first top-level value, first indented value), in one pass over the raw YAML"""
+
+        found: Dict[str, List[Optional[str]]] = {}
+        for match in self.field_line_pattern.finditer(raw_yaml):
+            indent, name, value = match.groups()
+            slots = found.setdefault(self.field_for_name[name], [None, None])
+            slot = 1 if indent else 0
+            if slots[slot] is None:
+                slots[slot] = value
+        return {field: (top, indented) for field, (top, indented) in found.items()}
+
+    def _get_raw_field(self, field_lines: Dict[str, Tuple[Optional[str], Optional[str]]], field: str, default: str) -> str:
+        """Fallback: value from the raw YAML (handles both top-level and indented)"""
+
+        top, indented = field_lines.get(field, (None, None))
+
         # Try top-level first
-        pattern = rf'^{field}:\s*(.+)$'
-        match = re.search(pattern, raw_yaml, re.MULTILINE)
-        if match:
-            value = match.group(1).strip().strip('"\'')
+        if top is not None:
             self.corrections_made.append(f"Extracted '{field}' via regex")
-            return value
+            return top.strip().strip('"\'')
 
         # Try indented (under responsibility_details or other sections)
-        pattern = rf'^\s+{field}:\s*(.+)$'
-        match = re.search(pattern, raw_yaml, re.MULTILINE)
-        if match:
-            value = match.group(1).strip().strip('"\'')
+        if indented is not None:
             self.corrections_made.append(f"Extracted '{field}' via regex (indented)")
-            return value
+            return indented.strip().strip('"\'')
 
         return default
 
@@ -187,49 +286,51 @@ class YAMLFixer:
                         elif isinstance(contact, dict) and 'name' in contact:
                             names.append(contact['name'])
 
+        # The document's author (template documented_by / תועד_על_ידי)
+        documented_by = parsed.get('documented_by')
+        if not names and isinstance(documented_by, dict) and documented_by.get('name'):
+            names.append(str(documented_by['name']))
+
         # Fallback: regex to find name patterns
-        if not names:
+        if not names and UPPERCASE_PATTERN.search(raw_yaml):
             # Pattern: "John Doe (Role)" or just "John Doe"
-            name_pattern = r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
-            found_names = re.findall(name_pattern, raw_yaml)
-            names = list(set(found_names))[:5]  # Limit to 5 unique names
+            names = _unique(NAME_PATTERN.findall(raw_yaml))[:5]  # Limit to 5 unique names
 
         return ', '.join(names) if names else ''
 
     def _extract_contact_emails(self, raw_yaml: str) -> str:
         """Extract all email addresses"""
 
+        if '@' not in raw_yaml:
+            return ''
+
         # Find all email patterns
-        emails = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', raw_yaml)
-        return ', '.join(set(emails))  # Unique emails
+        return ', '.join(_unique(EMAIL_PATTERN.findall(raw_yaml)))  # Unique emails
 
     def _extract_system_names(self, parsed: Dict, raw_yaml: str) -> str:
         """Extract system names"""
 
-        systems = []
-
-        # Common system name patterns (CamelCase or capitalized)
-        system_patterns = [
-            r'([A-Z][a-z]+(?:[A-Z][a-z]+)+)',  # CamelCase: PermitTrack
-            r'([A-Z]{2,})',  # All caps: BH
-        ]
+        # Common system name patterns (CamelCase or capitalized) - need an uppercase letter
+        if not UPPERCASE_PATTERN.search(raw_yaml):
+            return ''
 
-        for pattern in system_patterns:
-            found = re.findall(pattern, raw_yaml)
-            systems.extend(found)
+        systems = []
+        for pattern in SYSTEM_PATTERNS:
+            systems.extend(pattern.findall(raw_yaml))
 
         # Filter out common words
-        exclude = {'None', 'Step', 'Section', 'Overview', 'Title', 'Code', 'High', 'Low'}
-        systems = [s for s in set(systems) if s not in exclude]
+        systems = [s for s in _unique(systems) if s not in SYSTEM_NAME_EXCLUDE]
 
         return ', '.join(systems[:10]) if systems else ''  # Limit to 10
 
     def _extract_related_docs(self, parsed: Dict, raw_yaml: str) -> str:
         """Extract related document IDs (res_*)"""
 
+        if 'res_' not in raw_yaml:
+            return ''
+
         # Find all res_* patterns
-        doc_ids = re.findall(r'(res_[a-z_]+_\d{3})', raw_yaml)
-        return ', '.join(set(doc_ids))  # Unique IDs
+        return ', '.join(_unique(RELATED_DOC_PATTERN.findall(raw_yaml)))  # Unique IDs
 
 
 def main():
@@ -4,14 +4,32 @@ Uses parser, chunker, validator, and logger modules
 """
 
 import sys
+import time
+import cProfile
+import argparse
+from datetime import datetime
+from collections import deque
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import chromadb
 from chromadb.config import Settings
 
+# Add core modules to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "core"))
+
 # Import our modules
-from parser import parse_markdown_with_frontmatter
-from chunker import chunk_by_headers
-from validator import ChunkValidator
+from pipeline import PreparedDocument, iter_prepared_documents, iter_source_files, list_source_files
+from manifest import IndexManifest, ManifestDiff, StreamingManifestWriter, hash_file
+from batcher import ChunkBatcher
+from embedding_cache import EmbeddingCache, CachedEmbeddingFunction
+from embeddings import EmbeddingProvider, load_embedding_provider
+from collection_alias import AliasLock, generation_name, read_alias, write_alias, garbage_collect_generations
+from timing import StageTimings, write_profile
+from memory_budget import MemoryBudget, current_rss_mb, peak_rss_mb
+from dedup import NearDuplicateIndex, DEFAULT_THRESHOLD, apply_alias_metadata, decode_signature, encode_signature
+from checkpoint import CheckpointJournal, reconcile
+from parse_cache import disable_parse_cache
+from chunker import CHUNKING_HEADERS, ChunkBudget, Chunking, HierarchyChunking, RecordChunking, chunking_descriptor
 from logger_config import StructuredLogger
 
 # Paths
@@ -19,22 +37,34 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DOCS_DIR = PROJECT_ROOT / "data/preprocessed/markdown"  # Use preprocessed files
 DB_PATH = PROJECT_ROOT / "database/chroma"
 LOG_DIR = PROJECT_ROOT / "outputs/logs"
+PROFILE_DIR = PROJECT_ROOT / "outputs/profiles"  # --profile dumps
+MANIFEST_PATH = PROJECT_ROOT / "database/index_manifest.json"  # Next to database/chroma
+CHECKPOINT_PATH = PROJECT_ROOT / "database/index_checkpoint.jsonl"  # Full rebuild in progress (--resume)
+COLLECTION_NAME = "municipality_docs"  # Alias; resolves to a versioned collection
 
+# Embedding/insert batch limits (chunks are gathered across files)
+BATCH_MAX_CHUNKS = 256
+BATCH_MAX_CHARS = 400_000
 
-def create_chromadb_collection(structured_logger: StructuredLogger):
-    """Initialize ChromaDB client and collection"""
+# Embedding cache (vectors keyed by model id + sha256 of chunk text)
+EMBEDDING_CACHE_PATH = PROJECT_ROOT / "database/embedding_cache.sqlite"
+EMBEDDING_CACHE_MAX_MB = 1024
 
-    structured_logger.log_structured(
-        event_type='db_init',
-        level='info',
-        message=f"Initializing ChromaDB at: {DB_PATH}"
-    )
+# Read-ahead threads for the serial path (file I/O overlaps parsing/embedding)
+IO_THREADS = 4
+
+# PDF/DOCX conversion processes for the serial path (a long PDF doesn't stall the writer)
+CONVERT_WORKERS = 2
+
+
+def open_chromadb_client():
+    """ChromaDB client for DB_PATH (created if missing)"""
 
     # Ensure directory exists
     DB_PATH.mkdir(parents=True, exist_ok=True)
 
     # Create ChromaDB client
-    client = chromadb.PersistentClient(
+    return chromadb.PersistentClient(
         path=str(DB_PATH),
         settings=Settings(
             anonymized_telemetry=False,
@@ -42,55 +72,421 @@ def create_chromadb_collection(structured_logger: StructuredLogger):
         )
     )
 
-    # Delete existing collection if exists (for fresh start)
-    try:
-        client.delete_collection(name="municipality_docs")
+
+def create_chromadb_collection(
+    structured_logger: StructuredLogger,
+    embedding_provider: EmbeddingProvider,
+    collection_name: Optional[str] = None,
+    chunking: Optional[Chunking] = None
+):
+    """
+    Initialize ChromaDB client and collection
+
+    Args:
+        embedding_provider: Embedding model for this collection (from models_config.yaml).
+                            Its model id is stored in the collection metadata so
+                            querying can verify it uses the same model.
+        collection_name: Existing collection to reuse in place (incremental mode).
+                         When None, a new versioned collection is created next to
+                         the live one (blue/green rebuild); the alias is not touched.
+        chunking: Chunking of the new collection, stored in its metadata (None = by headers)
+    """
+
+    structured_logger.log_structured(
+        event_type='db_init',
+        level='info',
+        message=f"Initializing ChromaDB at: {DB_PATH}"
+    )
+
+    client = open_chromadb_client()
+
+    if collection_name:
+        # Reuse existing (live) collection
+        collection = client.get_collection(
+            name=collection_name,
+            embedding_function=embedding_provider
+        )
+
         structured_logger.log_structured(
-            event_type='db_reset',
+            event_type='db_opened',
             level='info',
-            message="Deleted existing collection"
+            message=f"Opened collection {collection_name} ({collection.count()} chunks)"
         )
-    except:
-        pass
 
-    # Create new collection
+        return client, collection
+
+    # Create new generation (live collection keeps serving queries meanwhile)
     collection = client.create_collection(
-        name="municipality_docs",
-        metadata={"description": "Municipal departure documentation"}
+        name=generation_name(COLLECTION_NAME),
+        metadata={
+            "description": "Municipal departure documentation",
+            "embedding_model": embedding_provider.model_id,
+            "chunking": chunking_descriptor(chunking)
+        },
+        embedding_function=embedding_provider
     )
 
     structured_logger.log_structured(
         event_type='db_created',
         level='info',
-        message="ChromaDB collection created"
+        message=(f"ChromaDB collection {collection.name} created "
+                 f"(embedding model: {embedding_provider.model_id})")
     )
 
     return client, collection
 
 
-def index_all_documents(docs_dir: Path, collection, structured_logger: StructuredLogger):
+def validate_collection(collection, stats: dict, embedding_provider: EmbeddingProvider) -> List[str]:
     """
-    Index all markdown documents into ChromaDB using modular pipeline
-    Returns statistics
+    Sanity-check a freshly built collection before it goes live
+    Returns a list of problems (empty if the collection can be published)
     """
 
+    problems = []
+
+    count = collection.count()
+    if count != stats['indexed_chunks']:
+        problems.append(f"Collection has {count} chunks, expected {stats['indexed_chunks']}")
+
+    if stats['total_files'] and not count:
+        problems.append(f"No chunks indexed from {stats['total_files']} files")
+
+    if count:
+        results = collection.query(
+            query_embeddings=[embedding_provider.embed_query("test")],
+            n_results=1
+        )
+        if not results['ids'][0]:
+            problems.append("Sample query returned no results")
+
+    return problems
+
+
+def publish_collection(
+    client,
+    collection,
+    stats: dict,
+    embedding_provider: EmbeddingProvider,
+    structured_logger: StructuredLogger,
+    keep_previous: bool = True
+):
+    """
+    Validate a new generation, switch the alias to it, and delete old generations
+
+    Call with AliasLock held, so no in-place writer is using a generation being deleted.
+    Raises RuntimeError (alias unchanged) if validation fails.
+    """
+
+    problems = validate_collection(collection, stats, embedding_provider)
+    if problems:
+        for problem in problems:
+            structured_logger.log_structured(
+                event_type='db_validation_failed',
+                level='error',
+                message=problem,
+                collection=collection.name
+            )
+        raise RuntimeError(
+            f"Collection {collection.name} failed validation, alias not switched: "
+            + "; ".join(problems)
+        )
+
+    previous = read_alias(DB_PATH, COLLECTION_NAME)
+    write_alias(DB_PATH, COLLECTION_NAME, collection.name)
+
     structured_logger.log_structured(
-        event_type='indexing_start',
+        event_type='db_alias_switched',
         level='info',
-        message=f"Reading documents from: {docs_dir}"
+        message=f"Alias {COLLECTION_NAME} -> {collection.name} (was: {previous})",
+        collection=collection.name,
+        previous=previous
+    )
+
+    # Keep the previous generation for in-flight readers and rollback
+    keep = [collection.name]
+    if keep_previous and previous:
+        keep.append(previous)
+
+    deleted = garbage_collect_generations(client, COLLECTION_NAME, keep)
+    if deleted:
+        structured_logger.log_structured(
+            event_type='db_generations_deleted',
+            level='info',
+            message=f"Deleted {len(deleted)} old collection generations",
+            collections=deleted
+        )
+
+
+def index_document(
+    prepared: PreparedDocument,
+    batcher: ChunkBatcher,
+    structured_logger: StructuredLogger,
+    stats: dict,
+    dedup_index: Optional[NearDuplicateIndex] = None,
+    alias_updates: Optional[Dict[str, List[str]]] = None
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Log a prepared (parsed, chunked, validated) file and queue its valid chunks
+    All chunks of the file are queued together, after the whole file was prepared
+
+    With a dedup_index, near-duplicates of already queued chunks are not queued;
+    they are added to alias_updates (representative ID -> alias IDs) instead.
+
+    Returns (IDs of the queued chunks, alias chunk ID -> representative chunk ID)
+    """
+
+    # Log parsing result
+    structured_logger.log_file_parsing(
+        filename=prepared.filename,
+        parse_success=prepared.parse_success,
+        parse_error=prepared.parse_error,
+        metadata_fields=prepared.metadata_fields
     )
 
-    # Get all markdown files
-    md_files = list(docs_dir.glob("*.md"))
+    if not prepared.parse_success:
+        stats['parse_failures'] += 1
+
+    stats['total_chunks'] += prepared.total_chunks
+
+    for validation in prepared.validations:
+        # Log validation
+        structured_logger.log_chunk_validation(
+            filename=prepared.filename,
+            chunk_index=validation['chunk_index'],
+            header=validation['header'],
+            is_valid=validation['is_valid'],
+            severity=validation['severity'],
+            issues=validation['issues'],
+            metadata=validation['metadata'],
+            document_metadata=validation['document_metadata']
+        )
+
+        # Count warnings/errors
+        if validation['severity'] == 'warning':
+            stats['warnings'] += 1
+        elif validation['severity'] == 'critical':
+            stats['errors'] += 1
+
     structured_logger.log_structured(
-        event_type='files_found',
+        event_type='file_timing',
+        level='debug',
+        message=f"{prepared.filename}: " + ", ".join(
+            f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in prepared.timings.items()
+        ),
+        filename=prepared.filename,
+        **{f"{stage}_ms": round(seconds * 1000, 3) for stage, seconds in prepared.timings.items()}
+    )
+
+    # Queue chunks for this file (written in cross-file batches)
+    queued_ids = []
+    aliases = {}
+    for chunk in prepared.chunks:
+        if dedup_index is not None and chunk.signature is not None:
+            representative = dedup_index.find_or_add(chunk.chunk_id, chunk.signature)
+            if representative:
+                # Near-duplicate: embed once, remember where else the text appears
+                aliases[chunk.chunk_id] = representative
+                alias_updates.setdefault(representative, []).append(chunk.chunk_id)
+                stats['duplicate_chunks'] += 1
+                continue
+
+        batcher.add(chunk.chunk_id, chunk.text, chunk.metadata, chunk.document_metadata)
+        queued_ids.append(chunk.chunk_id)
+
+    return queued_ids, aliases
+
+
+def resume_checkpoint(
+    embedding_provider: EmbeddingProvider,
+    structured_logger: StructuredLogger,
+    chunking: Optional[Chunking] = None,
+    dedup_threshold: Optional[float] = None
+):
+    """
+    Reopen the checkpoint of an interrupted full rebuild and verify it against its collection
+
+    Returns (journal, verified entries), or (None, None) when there is nothing usable
+    to resume - the caller then starts a new build.
+    """
+
+    checkpoint = CheckpointJournal.load(CHECKPOINT_PATH)
+    if checkpoint is None:
+        structured_logger.log_structured(
+            event_type='resume_unavailable',
+            level='warning',
+            message=f"No checkpoint at {CHECKPOINT_PATH} - starting a new build"
+        )
+        return None, None
+
+    client = open_chromadb_client()
+    existing = [c.name for c in client.list_collections()]
+    reason = None
+    if checkpoint.collection not in existing:
+        reason = f"collection {checkpoint.collection} no longer exists"
+    elif checkpoint.collection == read_alias(DB_PATH, COLLECTION_NAME):
+        reason = f"collection {checkpoint.collection} was already published"
+    elif checkpoint.embedding_model != embedding_provider.model_id:
+        reason = (f"checkpoint was built with '{checkpoint.embedding_model}', "
+                  f"config uses '{embedding_provider.model_id}'")
+    elif checkpoint.dedup_threshold != dedup_threshold:
+        # Chunks aliased (or embedded) under one setting would be wrong under the other
+        reason = (f"checkpoint was built with dedup threshold {checkpoint.dedup_threshold}, "
+                  f"this run uses {dedup_threshold} (None = off)")
+    else:
+        collection = client.get_collection(name=checkpoint.collection, embedding_function=embedding_provider)
+        built_chunking = (collection.metadata or {}).get('chunking', CHUNKING_HEADERS)
+        if built_chunking != chunking_descriptor(chunking):
+            reason = (f"checkpoint was chunked with '{built_chunking}', "
+                      f"this run uses '{chunking_descriptor(chunking)}'")
+
+    if reason:
+        checkpoint.close()
+        structured_logger.log_structured(
+            event_type='resume_unavailable',
+            level='warning',
+            message=f"Can't resume: {reason} - starting a new build"
+        )
+        return None, None
+
+    result = reconcile(collection, checkpoint)
+
+    structured_logger.log_structured(
+        event_type='resume_verified',
         level='info',
-        message=f"Found {len(md_files)} markdown files",
-        file_count=len(md_files)
+        message=(f"Resuming {checkpoint.collection}: {len(result.entries)} files verified, "
+                 f"{len(result.dropped_files)} incomplete, {len(result.orphan_ids)} unjournaled chunks deleted"),
+        collection=checkpoint.collection,
+        verified_files=len(result.entries),
+        dropped_files=result.dropped_files,
+        orphan_chunks=len(result.orphan_ids)
     )
 
-    # Initialize validator
-    validator = ChunkValidator()
+    return checkpoint, result.entries
+
+
+def index_all_documents(
+    docs_dir: Path,
+    collection,
+    structured_logger: StructuredLogger,
+    manifest: Optional[IndexManifest] = None,
+    incremental: bool = False,
+    batch_max_chunks: int = BATCH_MAX_CHUNKS,
+    batch_max_chars: int = BATCH_MAX_CHARS,
+    workers: int = 1,
+    embedding_function=None,
+    paths: Optional[List[Path]] = None,
+    stream: bool = False,
+    memory_budget: Optional[MemoryBudget] = None,
+    dedup_threshold: Optional[float] = None,
+    checkpoint: Optional[CheckpointJournal] = None,
+    resumed: Optional[Dict[str, Dict]] = None,
+    io_threads: int = 0,
+    convert_workers: int = 0,
+    chunking: Optional[Chunking] = None
+):
+    """
+    Index all markdown documents into ChromaDB using modular pipeline
+    Returns statistics (stats['timings']: StageTimings with per-stage histograms)
+
+    Args:
+        manifest: File hash -> chunk IDs manifest, updated in place (not saved).
+                  A file is recorded only after all its chunks were written.
+        incremental: Only index new/changed files and delete chunks of
+                     changed/removed files. Requires a manifest.
+        batch_max_chunks: Max chunks per embedding/insert batch
+        batch_max_chars: Max total characters per embedding/insert batch
+        workers: Processes for parse/chunk/validate (1 = serial, 0 = all cores).
+                 A single writer (this process) embeds and writes to ChromaDB.
+        embedding_function: Optional texts -> vectors callable (provider, or cached provider);
+                            when None, ChromaDB embeds with the collection's function
+        paths: Only look at these files instead of listing docs_dir (watch mode).
+               Missing paths are treated as removed. Requires incremental.
+        stream: Bounded-memory full rebuild: files are listed lazily (directory
+                order), hashed just before preparing, and nothing is kept per file
+                once its chunks are written. Use with a StreamingManifestWriter.
+        memory_budget: Checked after every file (RSS sampled every 32 files, every
+                       file once past half the budget); over the soft limit the
+                       pending batch is flushed, over the hard limit the run stops.
+        dedup_threshold: Embed one representative per group of near-identical chunks
+                         (MinHash Jaccard >= threshold, compared within this run);
+                         the others are recorded as aliases. None = off.
+        checkpoint: Journal of files durably written, committed after every batch
+                    (full rebuilds; lets an interrupted run resume).
+        resumed: Verified journal entries of an interrupted run into the same collection:
+                 files with an unchanged hash are recorded without re-indexing, the
+                 chunks of changed or removed ones are deleted and they are indexed again.
+        io_threads: With workers=1, read and parse files ahead in this many threads
+                    (overlaps file I/O, e.g. on a network share). 0 = no read-ahead,
+                    1 = one reader thread.
+        convert_workers: With workers=1, convert PDF/DOCX files ahead in this many
+                         processes. 0 = convert in this process.
+        chunking: Markdown chunking strategy - ChunkBudget (chunk_by_tokens),
+                  HierarchyChunking (### records + ## parents) or RecordChunking
+                  (one chunk per template record); None = one chunk per header.
+                  Must match the collection's (see main()).
+    """
+
+    if paths is not None and not incremental:
+        raise ValueError("paths requires incremental mode")
+    if stream and (incremental or paths is not None):
+        raise ValueError("stream mode is for full rebuilds only")
+    if resumed and incremental:
+        raise ValueError("resume is for full rebuilds only")
+    if stream and dedup_threshold is not None:
+        raise ValueError("near-duplicate detection keeps an in-memory index; not available in stream mode")
+
+    structured_logger.log_structured(
+        event_type='indexing_start',
+        level='info',
+        message=f"Reading documents from: {docs_dir}"
+    )
+
+    # Per-stage wall time: per file (parse/chunk/validate/prepare), per batch
+    # (embed/write), per run (hash_files) and per stale file (delete_stale)
+    timings = StageTimings()
+
+    if manifest is None:
+        manifest = IndexManifest(MANIFEST_PATH)
+
+    if not incremental and not stream:
+        # Full rebuild: collection was recreated, start manifest from scratch
+        manifest.clear()
+
+    if stream:
+        # No listing or upfront diff: hashes are taken per file as it is read
+        md_files = []
+        diff = ManifestDiff()
+    elif paths is None:
+        # Get all markdown (and PDF/DOCX) files
+        md_files = list_source_files(docs_dir)
+        structured_logger.log_structured(
+            event_type='files_found',
+            level='info',
+            message=f"Found {len(md_files)} source files",
+            file_count=len(md_files)
+        )
+
+        # Compare against manifest (hashes every file once)
+        with timings.measure('hash_files'):
+            diff = manifest.diff(md_files)
+    else:
+        # Watch mode: hash only the reported files
+        with timings.measure('hash_files'):
+            diff = manifest.diff_paths(paths)
+        md_files = sorted(diff.new + diff.changed + diff.unchanged)
+
+    files_to_index = diff.to_index if incremental else md_files
+    file_hashes = diff.hashes  # Entries are dropped once the file is recorded
+
+    if stream:
+        def hashed_files():
+            # Hash before parsing, so the manifest never pairs new chunks with a newer hash
+            for filepath in iter_source_files(docs_dir):
+                file_hashes[filepath.name] = hash_file(filepath)
+                stats['total_files'] += 1
+                yield filepath
+
+        files_to_index = hashed_files()
 
     # Statistics
     stats = {
@@ -99,105 +495,244 @@ def index_all_documents(docs_dir: Path, collection, structured_logger: Structure
         'indexed_chunks': 0,
         'warnings': 0,
         'errors': 0,
-        'parse_failures': 0
+        'parse_failures': 0,
+        'new_files': len(diff.new),
+        'changed_files': len(diff.changed),
+        'skipped_files': len(diff.unchanged) if incremental else 0,
+        'removed_files': len(diff.removed),
+        'deleted_chunks': 0,
+        'batches': 0,
+        'duplicate_chunks': 0,
+        'dependent_files': 0,
+        'resumed_files': 0,
+        'timings': timings
     }
 
-    # Process each file
-    for md_file in sorted(md_files):
-        # Step 1: Parse
-        parsed_doc = parse_markdown_with_frontmatter(md_file)
-
-        # Log parsing result
-        structured_logger.log_file_parsing(
-            filename=parsed_doc.filename,
-            parse_success=parsed_doc.parse_success,
-            parse_error=parsed_doc.parse_error,
-            metadata_fields=len(parsed_doc.metadata)
+    # Near-duplicate aliases to record on representatives once everything is written
+    added_aliases: Dict[str, List[str]] = {}
+    removed_aliases: Dict[str, List[str]] = {}
+
+    if incremental:
+        structured_logger.log_structured(
+            event_type='incremental_plan',
+            level='info',
+            message=(f"Incremental: {len(diff.new)} new, {len(diff.changed)} changed, "
+                     f"{len(diff.unchanged)} unchanged, {len(diff.removed)} removed"),
+            new_files=len(diff.new),
+            changed_files=len(diff.changed),
+            unchanged_files=len(diff.unchanged),
+            removed_files=len(diff.removed)
         )
 
-        if not parsed_doc.parse_success:
-            stats['parse_failures'] += 1
+        # Drop stale chunks of changed and removed files before re-adding
+        stale_files = [f.name for f in diff.changed] + diff.removed
+        stale_chunk_ids = set()
+        for filename in stale_files:
+            stale_chunk_ids.update(manifest.chunk_ids(filename))
+
+        # Files whose near-duplicate aliases point at stale chunks lose their
+        # representative: re-index them too (repeat - they may represent others)
+        dependents = [name for name in manifest.dependent_files(stale_chunk_ids) if name not in stale_files]
+        while dependents:
+            for filename in dependents:
+                filepath = docs_dir / filename
+                stale_files.append(filename)
+                if filename not in diff.hashes:
+                    # Watch mode: not among the reported paths
+                    if not filepath.exists():
+                        continue
+                    diff.hashes[filename] = hash_file(filepath)
+                diff.unchanged = [f for f in diff.unchanged if f.name != filename]
+                diff.changed.append(filepath)
+                stale_chunk_ids.update(manifest.chunk_ids(filename))
+                stats['dependent_files'] += 1
+
+            dependents = [name for name in manifest.dependent_files(stale_chunk_ids) if name not in stale_files]
+
+        files_to_index = diff.to_index
+        stats['changed_files'] = len(diff.changed)
+        stats['skipped_files'] = len(diff.unchanged)
+
+        for filename in stale_files:
+            # Aliases of this file no longer exist - update surviving representatives
+            for alias, representative in manifest.aliases(filename).items():
+                if representative not in stale_chunk_ids:
+                    removed_aliases.setdefault(representative, []).append(alias)
 
-        # Step 2: Chunk
-        chunks = chunk_by_headers(
-            parsed_doc.content,
-            parsed_doc.metadata.get('title', 'Overview')
+            stale_ids = manifest.remove(filename)
+            if stale_ids:
+                with timings.measure('delete_stale'):
+                    collection.delete(ids=stale_ids)
+                stats['deleted_chunks'] += len(stale_ids)
+
+            structured_logger.log_structured(
+                event_type='chunks_deleted',
+                level='info',
+                message=f"Deleted {len(stale_ids)} stale chunks for {filename}",
+                filename=filename,
+                chunk_count=len(stale_ids)
+            )
+
+    # Resume: skip files the interrupted run already wrote (if unchanged since)
+    resumed = dict(resumed or {})
+    dropped_ids = set()
+    dedup_index = NearDuplicateIndex(dedup_threshold) if dedup_threshold is not None else None
+
+    def drop_resumed(filename):
+        stale_ids = resumed.pop(filename)['chunk_ids']
+        if stale_ids:
+            with timings.measure('delete_stale'):
+                collection.delete(ids=stale_ids)
+            stats['deleted_chunks'] += len(stale_ids)
+        dropped_ids.update(stale_ids)
+
+    def skip_resumed(files):
+        for filepath in files:
+            filename = filepath.name
+            entry = resumed.get(filename)
+            if entry is not None:
+                aliases = entry.get('aliases', {})
+                if entry['hash'] == file_hashes[filename] and dropped_ids.isdisjoint(aliases.values()):
+                    del resumed[filename]
+                    manifest.record(filename, file_hashes.pop(filename), entry['chunk_ids'], aliases)
+                    if dedup_index is not None:
+                        # Later files must find these chunks, as in an uninterrupted run
+                        for chunk_id, signature in zip(entry['chunk_ids'], entry.get('signatures', ())):
+                            if signature is not None:
+                                dedup_index.add(chunk_id, decode_signature(signature))
+                    if not checkpoint.alias_metadata_applied:
+                        for alias, representative in aliases.items():
+                            added_aliases.setdefault(representative, []).append(alias)
+                    stats['resumed_files'] += 1
+                    stats['indexed_chunks'] += len(entry['chunk_ids'])
+                    continue
+                # Changed since the checkpoint (or its representative did)
+                drop_resumed(filename)
+            yield filepath
+
+    if resumed:
+        if not stream:
+            # Files deleted since the checkpoint (stream mode finds them at the end)
+            for filename in [name for name in resumed if name not in file_hashes]:
+                drop_resumed(filename)
+        files_to_index = skip_resumed(files_to_index)
+
+    # Files whose chunks are queued but not yet written:
+    # (filename, chunk_ids, aliases, signatures for the checkpoint, batcher position after its last chunk)
+    pending_files = deque()
+
+    def on_flush(ids, documents, metadatas):
+        stats['indexed_chunks'] += len(ids)
+        stats['batches'] += 1
+        timings.add_all(batcher.last_timings)
+
+        structured_logger.log_structured(
+            event_type='batch_indexed',
+            level='info',
+            message=f"Indexed batch of {len(ids)} chunks",
+            chunk_count=len(ids),
+            char_count=sum(len(d) for d in documents),
+            **{f"{stage}_ms": round(seconds * 1000, 3) for stage, seconds in batcher.last_timings.items()}
         )
 
-        stats['total_chunks'] += len(chunks)
-
-        # Step 3: Validate and index each chunk
-        ids = []
-        documents = []
-        metadatas = []
-
-        for chunk in chunks:
-            # Validate chunk
-            validation_result = validator.validate_chunk(chunk, parsed_doc)
-
-            # Log validation
-            structured_logger.log_chunk_validation(
-                filename=parsed_doc.filename,
-                chunk_index=chunk.chunk_index,
-                header=chunk.header,
-                is_valid=validation_result.is_valid,
-                severity=validation_result.severity,
-                issues=validation_result.issues,
-                metadata=validation_result.enriched_metadata
+        # Log indexed chunks
+        for chunk_id, metadata in zip(ids, metadatas):
+            structured_logger.log_chunk_indexed(
+                filename=metadata['filename'],
+                chunk_index=metadata['chunk_index'],
+                chunk_id=chunk_id
             )
 
-            # Count warnings/errors
-            if validation_result.severity == 'warning':
-                stats['warnings'] += 1
-            elif validation_result.severity == 'critical':
-                stats['errors'] += 1
+        commit_written_files()
 
-            # Skip invalid chunks
-            if not validation_result.is_valid:
-                continue
+    def commit_written_files():
+        # Batches are written in order, so every file queued before the
+        # flushed position is now fully in the collection
+        while pending_files and pending_files[0][4] <= batcher.flushed_count:
+            filename, chunk_ids, aliases, signatures, _ = pending_files.popleft()
+            file_hash = file_hashes.pop(filename)
+            manifest.record(filename, file_hash, chunk_ids, aliases)
+            if checkpoint:
+                checkpoint.record(filename, file_hash, chunk_ids, aliases, signatures)
+        if checkpoint:
+            checkpoint.commit()
 
-            # Prepare for indexing
-            chunk_id = f"{md_file.stem}_chunk_{chunk.chunk_index}"
-
-            # Enrich chunk text with Tier 2 metadata for better embedding
-            # This makes contacts, emails, systems searchable via semantic search
-            metadata_context = []
-            meta = validation_result.enriched_metadata
-
-            if meta.get('contact_names'):
-                metadata_context.append(f"Contacts: {meta['contact_names']}")
-            if meta.get('contact_emails'):
-                metadata_context.append(f"Emails: {meta['contact_emails']}")
-            if meta.get('system_names'):
-                metadata_context.append(f"Systems: {meta['system_names']}")
-            if meta.get('related_doc_ids'):
-                metadata_context.append(f"Related: {meta['related_doc_ids']}")
-
-            # Combine: header + content + metadata context
-            chunk_text = f"{chunk.header}\n\n{chunk.content}"
-            if metadata_context:
-                chunk_text += "\n\n[Metadata: " + " | ".join(metadata_context) + "]"
-
-            ids.append(chunk_id)
-            documents.append(chunk_text)
-            metadatas.append(validation_result.enriched_metadata)
-
-        # Index chunks for this file
-        if documents:
-            collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
+    batcher = ChunkBatcher(
+        collection,
+        max_chunks=batch_max_chunks,
+        max_chars=batch_max_chars,
+        on_flush=on_flush,
+        embedding_function=embedding_function
+    )
+
+    # Process each file (pending batch is flushed at the end, or on error)
+    # Parsing/chunking/validation may run in worker processes; results arrive
+    # in file order, so the writer sees exactly what the serial path would
+    # 'prepare' is the writer's wait for each prepared file: serial ≈ parse+chunk+validate,
+    # with workers it shows whether the writer is starved by the pool
+    with batcher:
+        prepared_documents = iter_prepared_documents(
+            files_to_index,
+            workers=workers,
+            # Streaming: keep the pool-to-writer queue short
+            max_pending=2 * max(workers, 1) if stream else None,
+            signatures=dedup_index is not None,
+            io_threads=io_threads,
+            convert_workers=convert_workers,
+            chunking=chunking
+        )
+        while True:
+            start = time.perf_counter()
+            prepared = next(prepared_documents, None)
+            if prepared is None:
+                break
+            timings.add('prepare', time.perf_counter() - start)
+            timings.add_all(prepared.timings)
+
+            chunk_ids, aliases = index_document(
+                prepared, batcher, structured_logger, stats, dedup_index, added_aliases
             )
-            stats['indexed_chunks'] += len(documents)
-
-            # Log indexed chunks
-            for chunk_id in ids:
-                structured_logger.log_chunk_indexed(
-                    filename=parsed_doc.filename,
-                    chunk_index=int(chunk_id.split('_chunk_')[1]),
-                    chunk_id=chunk_id
-                )
+            signatures = None
+            if checkpoint and dedup_index is not None:
+                queued = set(chunk_ids)
+                signatures = [
+                    encode_signature(chunk.signature) if chunk.signature is not None else None
+                    for chunk in prepared.chunks if chunk.chunk_id in queued
+                ]
+            pending_files.append((prepared.filename, chunk_ids, aliases, signatures, batcher.added_count))
+            commit_written_files()
+            del prepared
+
+            if memory_budget:
+                memory_budget.check(relieve=batcher.flush)
+
+    for filename in list(resumed):
+        drop_resumed(filename)
+
+    if added_aliases or removed_aliases:
+        with timings.measure('alias_metadata'):
+            # Every listed alias's file is recorded by now (dedup is off in stream mode)
+            updated = apply_alias_metadata(collection, added_aliases, removed_aliases, manifest.alias_files())
+        structured_logger.log_structured(
+            event_type='duplicates_recorded',
+            level='info',
+            message=(f"{stats['duplicate_chunks']} near-duplicate chunks aliased, "
+                     f"{updated} representatives updated"),
+            duplicate_chunks=stats['duplicate_chunks'],
+            removed_aliases=sum(len(aliases) for aliases in removed_aliases.values()),
+            representatives_updated=updated
+        )
+        if checkpoint:
+            checkpoint.mark_alias_metadata()
+
+    structured_logger.log_structured(
+        event_type='stage_timings',
+        level='info',
+        message="Per-stage timings: " + ", ".join(
+            f"{stage} {histogram.total:.2f}s" for stage, histogram in timings.stages.items()
+        ),
+        stages=timings.summary()
+    )
 
     return stats
 
@@ -205,13 +740,174 @@ def index_all_documents(docs_dir: Path, collection, structured_logger: Structure
 def main():
     """Main indexing function"""
 
+    arg_parser = argparse.ArgumentParser(description="Index processed documents into ChromaDB")
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only index new/changed files and remove chunks of deleted files (uses index manifest)"
+    )
+    arg_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_MAX_CHUNKS,
+        help=f"Max chunks per embedding/insert batch (default: {BATCH_MAX_CHUNKS})"
+    )
+    arg_parser.add_argument(
+        "--batch-max-chars",
+        type=int,
+        default=BATCH_MAX_CHARS,
+        help=f"Max total characters per embedding/insert batch (default: {BATCH_MAX_CHARS})"
+    )
+    arg_parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Always recompute embeddings (skip the on-disk embedding cache)"
+    )
+    arg_parser.add_argument(
+        "--embedding-cache-mb",
+        type=int,
+        default=EMBEDDING_CACHE_MAX_MB,
+        help=f"Embedding cache size limit in MB, LRU-evicted (default: {EMBEDDING_CACHE_MAX_MB})"
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for parse/chunk/validate (default: 1 = serial, 0 = all CPU cores)"
+    )
+    arg_parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=IO_THREADS,
+        help=f"With --workers 1: threads reading and parsing files ahead (default: {IO_THREADS}, 0 = off)"
+    )
+    arg_parser.add_argument(
+        "--convert-workers",
+        type=int,
+        default=CONVERT_WORKERS,
+        help=f"With --workers 1: processes converting PDF/DOCX files ahead (default: {CONVERT_WORKERS}, 0 = in-process)"
+    )
+    arg_parser.add_argument(
+        "--full-logs",
+        action="store_true",
+        help="Write every per-chunk log event (default: routine chunk events are sampled)"
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"cProfile the indexing run and save a pstats dump to {PROFILE_DIR} "
+             "(main process only; use --workers 1 to include parsing)"
+    )
+    arg_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Bounded-memory full rebuild for very large corpora (lazy file listing, "
+             "manifest spilled to disk, files processed in directory order)"
+    )
+    arg_parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=0,
+        help="Hard RSS limit: flush early near the limit, stop cleanly above it (default: 0 = none)"
+    )
+    arg_parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Embed every chunk, even near-identical ones (dedup is always off with --stream)"
+    )
+    arg_parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Min estimated Jaccard similarity for chunks to count as near-duplicates (default: {DEFAULT_THRESHOLD})"
+    )
+    arg_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"Continue an interrupted full rebuild from its checkpoint ({CHECKPOINT_PATH.name}) "
+             "instead of starting a new collection"
+    )
+    arg_parser.add_argument(
+        "--chunking",
+        choices=["headers", "tokens", "hierarchy", "records"],
+        default="headers",
+        help="headers: one chunk per #-### section (default); tokens: merge/split sections "
+             "to a token budget; hierarchy: ### records searched, expanded to their ## section "
+             "at query time; records: one compact chunk per template record, fields in the "
+             "metadata, empty fields dropped. Changing it requires a full rebuild"
+    )
+    arg_parser.add_argument(
+        "--chunk-target-tokens",
+        type=int,
+        default=ChunkBudget.target_tokens,
+        help=f"--chunking tokens: target chunk size (default: {ChunkBudget.target_tokens})"
+    )
+    arg_parser.add_argument(
+        "--chunk-min-tokens",
+        type=int,
+        default=ChunkBudget.min_tokens,
+        help=f"--chunking tokens: smaller sections are merged with neighbours (default: {ChunkBudget.min_tokens})"
+    )
+    arg_parser.add_argument(
+        "--chunk-max-tokens",
+        type=int,
+        default=ChunkBudget.max_tokens,
+        help=f"--chunking tokens: larger sections are split (default: {ChunkBudget.max_tokens})"
+    )
+    arg_parser.add_argument(
+        "--chunk-overlap-tokens",
+        type=int,
+        default=ChunkBudget.overlap_tokens,
+        help=f"--chunking tokens: overlap between parts of a split section (default: {ChunkBudget.overlap_tokens})"
+    )
+    arg_parser.add_argument(
+        "--tokenizer",
+        default=ChunkBudget.tokenizer,
+        help="--chunking tokens: 'approx' (word count, default) or 'hf:<model>' (Hugging Face tokenizer)"
+    )
+    arg_parser.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="Parse every file's YAML again (skip the on-disk parse cache)"
+    )
+    args = arg_parser.parse_args()
+
+    if args.no_parse_cache:
+        # Before the worker pool starts, so workers inherit it
+        disable_parse_cache()
+
+    if args.stream and args.incremental:
+        arg_parser.error("--stream is a full rebuild; it can't be combined with --incremental")
+    if args.resume and args.incremental:
+        arg_parser.error("--resume continues a full rebuild; it can't be combined with --incremental")
+
+    chunking = None
+    if args.chunking == "tokens":
+        try:
+            chunking = ChunkBudget(
+                target_tokens=args.chunk_target_tokens,
+                min_tokens=args.chunk_min_tokens,
+                max_tokens=args.chunk_max_tokens,
+                overlap_tokens=args.chunk_overlap_tokens,
+                tokenizer=args.tokenizer
+            )
+        except ValueError as e:
+            arg_parser.error(str(e))
+    elif args.chunking == "hierarchy":
+        chunking = HierarchyChunking()
+    elif args.chunking == "records":
+        chunking = RecordChunking()
+
     print("="*80)
     print("Municipality RAG - Modular Document Indexing")
     print("="*80)
     print()
 
-    # Initialize structured logger
-    structured_logger = StructuredLogger(LOG_DIR)
+    # Initialize structured logger (background writer; per-chunk events sampled)
+    structured_logger = StructuredLogger(LOG_DIR, sample_rates={} if args.full_logs else None)
+
+    # Serializes alias switches / GC against in-place writers (watch mode, --incremental)
+    alias_lock = AliasLock(DB_PATH)
 
     try:
         # Check if documents exist
@@ -225,11 +921,162 @@ def main():
             print("Run generate_documents.py first to create documents")
             sys.exit(1)
 
-        # Create ChromaDB collection
-        client, collection = create_chromadb_collection(structured_logger)
+        if args.incremental:
+            # Live collection must not be replaced or deleted while we write to it
+            alias_lock.acquire()
+
+        # Load manifest of previously indexed files (only incremental runs read it)
+        manifest = IndexManifest.load(MANIFEST_PATH) if args.incremental else IndexManifest(MANIFEST_PATH)
+        live_collection = read_alias(DB_PATH, COLLECTION_NAME)
+        incremental = args.incremental
+
+        if incremental and (not live_collection or manifest.collection != live_collection
+                            or not manifest.files):
+            # Without a manifest we can't tell which chunks belong to which file
+            structured_logger.log_structured(
+                event_type='incremental_fallback',
+                level='warning',
+                message="No usable index manifest for the live collection - running full rebuild"
+            )
+            incremental = False
+
+        # Embedding model from models_config.yaml (querying uses the same config)
+        embedding_provider = load_embedding_provider()
+        print(f"Embedding model: {embedding_provider.model_id}")
+
+        if incremental:
+            # Update the live collection in place
+            client, collection = create_chromadb_collection(
+                structured_logger,
+                embedding_provider,
+                collection_name=live_collection
+            )
+
+            indexed_model = (collection.metadata or {}).get('embedding_model')
+            if indexed_model != embedding_provider.model_id:
+                # Vectors from different models can't share a collection
+                structured_logger.log_structured(
+                    event_type='incremental_fallback',
+                    level='warning',
+                    message=(f"Collection was built with '{indexed_model}', config uses "
+                             f"'{embedding_provider.model_id}' - running full rebuild")
+                )
+                incremental = False
+
+            indexed_chunking = (collection.metadata or {}).get('chunking', CHUNKING_HEADERS)
+            if incremental and indexed_chunking != chunking_descriptor(chunking):
+                # Changed files would get differently sized chunks than the rest
+                structured_logger.log_structured(
+                    event_type='incremental_fallback',
+                    level='warning',
+                    message=(f"Collection was chunked with '{indexed_chunking}', this run uses "
+                             f"'{chunking_descriptor(chunking)}' - running full rebuild")
+                )
+                incremental = False
+
+        if not incremental:
+            # Full rebuilds only need the lock to publish
+            alias_lock.release()
+
+        # Dedup keeps every representative's signature in memory
+        dedup_threshold = None if args.no_dedup or args.stream else args.dedup_threshold
+
+        checkpoint = None
+        resumed = None
+        if not incremental and args.resume:
+            checkpoint, resumed = resume_checkpoint(embedding_provider, structured_logger, chunking, dedup_threshold)
+            if checkpoint:
+                client, collection = create_chromadb_collection(
+                    structured_logger,
+                    embedding_provider,
+                    collection_name=checkpoint.collection
+                )
+
+        if not incremental and not checkpoint:
+            # Blue/green: build a new generation, publish it only when complete
+            client, collection = create_chromadb_collection(structured_logger, embedding_provider, chunking=chunking)
+            # Journal of written files, committed after every batch (for --resume)
+            checkpoint = CheckpointJournal.start(
+                CHECKPOINT_PATH, collection.name, embedding_provider.model_id, dedup_threshold
+            )
+
+        if not incremental:
+            # Streaming: manifest entries go to a spill file instead of memory
+            manifest = StreamingManifestWriter(MANIFEST_PATH) if args.stream else IndexManifest(MANIFEST_PATH)
+
+        manifest.collection = collection.name
+
+        if incremental and collection.count() == 0:
+            # Collection was emptied but manifest survived - treat every file as new
+            manifest.clear()
+
+        # Precompute embeddings through the on-disk cache (unchanged text is free)
+        embedding_cache = None
+        embedding_function = embedding_provider
+        if not args.no_embedding_cache:
+            embedding_cache = EmbeddingCache(
+                EMBEDDING_CACHE_PATH,
+                max_bytes=args.embedding_cache_mb * 1024 * 1024
+            )
+            embedding_function = CachedEmbeddingFunction(
+                embedding_provider,
+                embedding_provider.model_id,
+                embedding_cache
+            )
 
         # Index all documents
-        stats = index_all_documents(DOCS_DIR, collection, structured_logger)
+        # Incremental: live collection changes in place, so the manifest is saved
+        # even if indexing fails midway. Full rebuild: saved once the new
+        # generation is published (old manifest still matches the live collection).
+        profiler = cProfile.Profile() if args.profile else None
+        if profiler:
+            profiler.enable()
+
+        memory_budget = MemoryBudget(args.memory_budget_mb) if args.memory_budget_mb else None
+
+        try:
+            stats = index_all_documents(
+                DOCS_DIR,
+                collection,
+                structured_logger,
+                manifest=manifest,
+                incremental=incremental,
+                batch_max_chunks=args.batch_size,
+                batch_max_chars=args.batch_max_chars,
+                workers=args.workers,
+                embedding_function=embedding_function,
+                stream=args.stream,
+                memory_budget=memory_budget,
+                dedup_threshold=dedup_threshold,
+                checkpoint=checkpoint,
+                resumed=resumed,
+                io_threads=args.io_threads,
+                convert_workers=args.convert_workers,
+                chunking=chunking
+            )
+
+            if not incremental:
+                # Validate, switch alias atomically, garbage-collect old generations
+                with alias_lock:
+                    publish_collection(client, collection, stats, embedding_provider, structured_logger)
+                    manifest.save()
+                checkpoint.remove()
+        except Exception:
+            if args.stream:
+                # New generation was not published; the old manifest stays valid
+                manifest.discard()
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            if incremental:
+                manifest.save()
+                alias_lock.release()
+            if checkpoint:
+                # Kept on disk if the build did not finish: run again with --resume
+                checkpoint.close()
+            if embedding_cache:
+                embedding_cache.close()
 
         # Log summary
         structured_logger.log_summary(
@@ -240,11 +1087,52 @@ def main():
             errors=stats['errors']
         )
 
+        # Where the time went
+        print()
+        print("Stage Timings:")
+        for line in stats['timings'].format_table():
+            print(line)
+
+        if profiler:
+            profile_path = PROFILE_DIR / f"indexing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pstats"
+            top_functions = write_profile(profiler, profile_path)
+            structured_logger.log_structured(
+                event_type='profile_saved',
+                level='info',
+                message=f"cProfile dump saved: {profile_path}",
+                path=str(profile_path)
+            )
+            print()
+            print(f"Profile: {profile_path} (inspect: python -m pstats {profile_path})")
+            print(top_functions)
+
         # Additional stats
         print()
         print("Additional Statistics:")
         print(f"  Parse failures: {stats['parse_failures']}")
+        print(f"  Insert batches: {stats['batches']}")
+        if stats['resumed_files']:
+            print(f"  Resumed files:  {stats['resumed_files']} (already indexed before the interruption)")
+        if stats['duplicate_chunks']:
+            print(f"  Near-duplicate chunks: {stats['duplicate_chunks']} (aliased, not embedded)")
+        if memory_budget:
+            max_rss = max(memory_budget.max_rss_mb, peak_rss_mb() or 0.0)
+            print(f"  Memory: max RSS {max_rss:.0f} MB of {args.memory_budget_mb} MB budget "
+                  f"({memory_budget.relief_count} early flushes)")
+        elif args.stream and current_rss_mb() is not None:
+            print(f"  Memory: RSS {current_rss_mb():.0f} MB")
+        if embedding_cache:
+            print(f"  Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses")
+        if incremental:
+            print(f"  New files:      {stats['new_files']}")
+            print(f"  Changed files:  {stats['changed_files']}")
+            print(f"  Skipped files:  {stats['skipped_files']} (unchanged)")
+            print(f"  Removed files:  {stats['removed_files']} ({stats['deleted_chunks']} chunks deleted)")
+            if stats['dependent_files']:
+                print(f"  Re-indexed:     {stats['dependent_files']} (their near-duplicate representative changed)")
         print(f"  Database location: {DB_PATH}")
+        print(f"  Collection: {collection.name} (alias: {COLLECTION_NAME})")
+        print(f"  Manifest: {MANIFEST_PATH}")
         print(f"  Log files: {LOG_DIR}")
         print()
 
@@ -255,7 +1143,7 @@ def main():
 
         test_query = "How do I process a building permit?"
         results = collection.query(
-            query_texts=[test_query],
+            query_embeddings=[embedding_provider.embed_query(test_query)],
             n_results=3
         )
 
@@ -274,6 +1162,7 @@ def main():
             print()
 
     finally:
+        alias_lock.release()
         # Close logger
         structured_logger.close()
 
@@ -1,24 +1,40 @@
 """
 Preprocessing Pipeline
 Applies YAML fixes to all markdown files and saves to preprocessed directory
+
+Files are fixed in a process pool; sources unchanged since the last run are
+skipped (preprocessor.py). Prints a summary and writes a per-file JSONL report.
 """
 
 import sys
+import time
+import argparse
+from collections import Counter
 from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Add core modules to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "core"))
 
-from rag_system.yaml_fixer import YAMLFixer
+from preprocessor import FAILED, FIXED, REMOVED, SKIPPED, STATE_FILENAME, preprocess_directory, write_report
 
 
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 SOURCE_DIR = PROJECT_ROOT / "data/generated/markdown"
 TARGET_DIR = PROJECT_ROOT / "data/preprocessed/markdown"
+REPORT_PATH = PROJECT_ROOT / "outputs/logs/preprocessing_report.jsonl"
+
+TOP_CORRECTIONS = 10  # Most frequent corrections shown in the summary
+MAX_LISTED_FAILURES = 20
 
 
-def preprocess_all_documents():
+def preprocess_all_documents(
+    source_dir: Path = SOURCE_DIR,
+    target_dir: Path = TARGET_DIR,
+    report_path: Path = REPORT_PATH,
+    workers: int = 0,
+    force: bool = False
+) -> dict:
     """
     Apply YAML fixes to all markdown documents
     Save corrected versions to preprocessed directory
@@ -30,80 +46,92 @@ def preprocess_all_documents():
     print()
 
     # Check source directory
-    if not SOURCE_DIR.exists():
-        print(f"[ERROR] Source directory not found: {SOURCE_DIR}")
+    if not source_dir.exists():
+        print(f"[ERROR] Source directory not found: {source_dir}")
         sys.exit(1)
 
-    # Get all markdown files
-    md_files = sorted(SOURCE_DIR.glob("*.md"))
-    print(f"Found {len(md_files)} markdown files in: {SOURCE_DIR}")
+    print(f"Source directory: {source_dir}")
+    print(f"Output directory: {target_dir}")
     print()
 
-    # Create target directory
-    TARGET_DIR.mkdir(parents=True, exist_ok=True)
-    print(f"Output directory: {TARGET_DIR}")
-    print()
+    start = time.perf_counter()
+    results = list(preprocess_directory(source_dir, target_dir, workers=workers, force=force))
+    elapsed = time.perf_counter() - start
 
-    # Initialize fixer
-    fixer = YAMLFixer()
+    write_report(results, report_path)
 
     # Statistics
+    statuses = Counter(result.status for result in results)
+    corrections = Counter(correction for result in results for correction in result.corrections)
     stats = {
-        'total_files': len(md_files),
-        'successful': 0,
-        'failed': 0,
-        'total_corrections': 0
+        'total_files': len(results) - statuses[REMOVED],
+        'fixed': statuses[FIXED],
+        'skipped': statuses[SKIPPED],
+        'failed': statuses[FAILED],
+        'removed': statuses[REMOVED],
+        'total_corrections': sum(corrections.values())
     }
 
-    # Process each file
+    # Summary
     print("="*80)
-    print("PROCESSING FILES")
+    print("PREPROCESSING SUMMARY")
     print("="*80)
-    print()
-
-    for md_file in md_files:
-        print(f"Processing: {md_file.name}")
-
-        try:
-            # Read original
-            with open(md_file, 'r', encoding='utf-8') as f:
-                original_content = f.read()
-
-            # Fix YAML
-            fixed_content, corrections = fixer.fix_document(original_content)
-
-            # Write to preprocessed directory
-            target_file = TARGET_DIR / md_file.name
-            with open(target_file, 'w', encoding='utf-8') as f:
-                f.write(fixed_content)
-
-            # Report
-            print(f"  [OK] {len(corrections)} corrections applied")
-            for correction in corrections:
-                print(f"       - {correction}")
-
-            stats['successful'] += 1
-            stats['total_corrections'] += len(corrections)
-
-        except Exception as e:
-            print(f"  [FAIL] {e}")
-            stats['failed'] += 1
+    print(f"Total files:         {stats['total_files']}")
+    print(f"Fixed:               {stats['fixed']}")
+    print(f"Skipped (unchanged): {stats['skipped']}")
+    print(f"Failed:              {stats['failed']}" + (" (previous output removed)" if stats['failed'] else ""))
+    if stats['removed']:
+        print(f"Removed (no source): {stats['removed']}")
+    print(f"Total corrections:   {stats['total_corrections']}")
+    if stats['fixed']:
+        print(f"Average per fixed:   {stats['total_corrections'] / stats['fixed']:.1f}")
+    print(f"Time:                {elapsed:.2f}s")
+
+    if corrections:
+        print()
+        print("Most frequent corrections:")
+        for correction, count in corrections.most_common(TOP_CORRECTIONS):
+            print(f"  {count:>6}  {correction}")
 
+    failures = [result for result in results if result.status == FAILED]
+    if failures:
         print()
+        print("Failed files:")
+        for result in failures[:MAX_LISTED_FAILURES]:
+            print(f"  [FAIL] {result.filename}: {result.error}")
+        if len(failures) > MAX_LISTED_FAILURES:
+            print(f"  ... and {len(failures) - MAX_LISTED_FAILURES} more (see report)")
 
-    # Summary
-    print("="*80)
-    print("PREPROCESSING SUMMARY")
-    print("="*80)
-    print(f"Total files:        {stats['total_files']}")
-    print(f"Successfully fixed: {stats['successful']}")
-    print(f"Failed:             {stats['failed']}")
-    print(f"Total corrections:  {stats['total_corrections']}")
-    print(f"Average per file:   {stats['total_corrections'] / stats['total_files']:.1f}")
     print()
-    print(f"Preprocessed files saved to: {TARGET_DIR}")
+    print(f"Preprocessed files saved to: {target_dir}")
+    print(f"Per-file report: {report_path}")
     print()
 
+    return stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Apply YAML fixes to markdown documents")
+    arg_parser.add_argument("--source", type=Path, default=SOURCE_DIR, help=f"Source directory (default: {SOURCE_DIR})")
+    arg_parser.add_argument("--target", type=Path, default=TARGET_DIR, help=f"Output directory (default: {TARGET_DIR})")
+    arg_parser.add_argument("--report", type=Path, default=REPORT_PATH, help=f"JSONL report path (default: {REPORT_PATH})")
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Processes running the fixer (default: 0 = all CPU cores, 1 = serial)"
+    )
+    arg_parser.add_argument(
+        "--force",
+        action="store_true",
+        help=f"Fix every file, ignoring the hashes in {STATE_FILENAME} (next to the output directory)"
+    )
+    args = arg_parser.parse_args()
+
+    stats = preprocess_all_documents(args.source, args.target, args.report, args.workers, args.force)
+    if stats['failed']:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
-    preprocess_all_documents()
+    main()
@@ -4,10 +4,13 @@ Checks that all YAML parses correctly after preprocessing
 """
 
 import sys
-import yaml
-import re
 from pathlib import Path
 
+# Add core modules to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "core"))
+
+from parser import parse_many
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 PREPROCESSED_DIR = PROJECT_ROOT / "data/preprocessed/markdown"
@@ -50,54 +53,39 @@ def validate_all_files():
     print("="*80)
     print()
 
-    for md_file in md_files:
+    # Same parser (and parse cache) as indexing; files are read ahead in threads
+    for parsed in parse_many(md_files):
+        md_file = parsed.filepath
         print(f"Validating: {md_file.name}")
 
-        # Read file
-        with open(md_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Extract YAML
-        match = re.match(r'^---\s*\n(.*?)\n---\s*\n', content, re.DOTALL)
-
-        if not match:
-            print(f"  [WARNING] No YAML frontmatter found")
-            stats['no_yaml'] += 1
+        if not parsed.parse_success:
+            if parsed.parse_error.startswith("No YAML frontmatter"):
+                print(f"  [WARNING] No YAML frontmatter found")
+                stats['no_yaml'] += 1
+            else:
+                print(f"  [FAIL] {parsed.parse_error[:100]}")
+                stats['invalid_yaml'] += 1
             print()
             continue
 
-        yaml_text = match.group(1)
+        metadata = parsed.metadata
 
-        # Try to parse
-        try:
-            metadata = yaml.safe_load(yaml_text)
-
-            if not isinstance(metadata, dict):
-                print(f"  [FAIL] YAML did not parse to dictionary")
-                stats['invalid_yaml'] += 1
-                print()
-                continue
-
-            # Check fields
-            field_count = len(metadata)
-            missing = [f for f in required_fields if not metadata.get(f)]
-
-            if missing:
-                print(f"  [WARNING] {field_count} fields, missing: {', '.join(missing)}")
-                stats['missing_fields'].append((md_file.name, missing))
-            else:
-                print(f"  [OK] Valid YAML with {field_count} fields")
+        # Check fields
+        field_count = len(metadata)
+        missing = [f for f in required_fields if not metadata.get(f)]
 
-            # Show key fields
-            print(f"       title: {metadata.get('title', 'N/A')}")
-            print(f"       category: {metadata.get('category', 'N/A')}")
-            print(f"       contact_emails: {metadata.get('contact_emails', 'N/A')}")
+        if missing:
+            print(f"  [WARNING] {field_count} fields, missing: {', '.join(missing)}")
+            stats['missing_fields'].append((md_file.name, missing))
+        else:
+            print(f"  [OK] Valid YAML with {field_count} fields")
 
-            stats['valid_yaml'] += 1
+        # Show key fields
+        print(f"       title: {metadata.get('title', 'N/A')}")
+        print(f"       category: {metadata.get('category', 'N/A')}")
+        print(f"       contact_emails: {metadata.get('contact_emails', 'N/A')}")
 
-        except yaml.YAMLError as e:
-            print(f"  [FAIL] YAML parsing error: {str(e)[:100]}")
-            stats['invalid_yaml'] += 1
+        stats['valid_yaml'] += 1
 
         print()
 
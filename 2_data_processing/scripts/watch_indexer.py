@@ -0,0 +1,522 @@
+"""
+Watching Indexer
+Long-running incremental indexer: watches the preprocessed documents directory and
+indexes new/changed/removed files into the live collection within seconds
+
+Uses watchdog (inotify on Linux) when installed, otherwise polls the directory.
+"""
+
+import sys
+import json
+import os
+import queue
+import time
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Tuple
+
+# Add core modules to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "core"))
+
+# Import our modules
+from manifest import IndexManifest
+from pipeline import is_source_file
+from chunker import parse_chunking
+from embedding_cache import EmbeddingCache, CachedEmbeddingFunction
+from embeddings import load_embedding_provider
+from collection_alias import AliasLock, read_alias
+from dedup import DEFAULT_THRESHOLD
+from logger_config import StructuredLogger
+from indexing import (
+    PROJECT_ROOT, DOCS_DIR, DB_PATH, LOG_DIR, MANIFEST_PATH, COLLECTION_NAME,
+    BATCH_MAX_CHUNKS, BATCH_MAX_CHARS, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB,
+    create_chromadb_collection, index_all_documents
+)
+
+# Metrics (rewritten after every batch)
+METRICS_PATH = PROJECT_ROOT / "outputs/metrics/watch_indexer.json"
+
+# Event batching
+DEBOUNCE_SECONDS = 2.0  # Index once no new events arrived for this long
+MAX_DELAY_SECONDS = 30.0  # ...but never hold a file back longer than this
+POLL_INTERVAL_SECONDS = 1.0  # Polling fallback scan interval
+RETRY_DELAY_SECONDS = 10.0  # Wait before retrying a failed batch
+
+
+def is_document(path: Path) -> bool:
+    """Markdown/PDF/DOCX source files only (skip editor swap files and temp files)"""
+    return is_source_file(path.name) and not path.name.startswith('.')
+
+
+class PollingWatcher:
+    """
+    Detects created/modified/deleted files by comparing (mtime, size) snapshots
+    Fallback for systems without watchdog/inotify (or network filesystems)
+    """
+
+    def __init__(self, directory: Path, events: queue.Queue, interval: float = POLL_INTERVAL_SECONDS):
+        self.directory = directory
+        self.events = events
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="polling-watcher", daemon=True)
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and is_document(Path(entry.name)):
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = self._scan()
+            detected_at = time.time()
+
+            for name in set(current) | set(self._snapshot):
+                if current.get(name) != self._snapshot.get(name):
+                    self.events.put((self.directory / name, detected_at))
+
+            self._snapshot = current
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def create_watchdog_watcher(directory: Path, events: queue.Queue):
+    """
+    inotify-backed watcher via watchdog (None if watchdog is not installed)
+    Returns an object with start()/stop()
+    """
+
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            detected_at = time.time()
+            # Moves report both ends (atomic writes land as temp file -> .md rename)
+            for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+                if path and is_document(Path(path)):
+                    events.put((Path(path), detected_at))
+
+    observer = Observer()
+    observer.schedule(Handler(), str(directory), recursive=False)
+
+    class WatchdogWatcher:
+        def start(self):
+            observer.start()
+
+        def stop(self):
+            observer.stop()
+            observer.join()
+
+    return WatchdogWatcher()
+
+
+class LagMetrics:
+    """
+    Indexing lag: time from a file landing in the directory until its chunks are
+    searchable. Written as JSON to METRICS_PATH after every batch.
+    """
+
+    def __init__(self, path: Path, watcher_type: str):
+        self.path = path
+        self.data = {
+            'watcher': watcher_type,
+            'started': datetime.now().isoformat(),
+            'batches': 0,
+            'failed_batches': 0,
+            'files_indexed': 0,
+            'files_removed': 0,
+            'chunks_indexed': 0,
+            'pending_files': 0,
+            'last_batch': None,
+            'last_lag_seconds': None,
+            'max_lag_seconds': None,
+            'mean_lag_seconds': None
+        }
+        self._lag_total = 0.0
+
+    def record_batch(self, stats: dict, lag_seconds: float):
+        data = self.data
+        data['batches'] += 1
+        data['files_indexed'] += stats['new_files'] + stats['changed_files']
+        data['files_removed'] += stats['removed_files']
+        data['chunks_indexed'] += stats['indexed_chunks']
+        data['last_batch'] = datetime.now().isoformat()
+        data['last_lag_seconds'] = round(lag_seconds, 3)
+        data['max_lag_seconds'] = round(max(lag_seconds, data['max_lag_seconds'] or 0.0), 3)
+
+        self._lag_total += lag_seconds
+        data['mean_lag_seconds'] = round(self._lag_total / data['batches'], 3)
+        self.save()
+
+    def record_failure(self):
+        self.data['failed_batches'] += 1
+        self.save()
+
+    def save(self):
+        """Write metrics atomically (temp file + rename)"""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def landed_at(path: Path, first_seen: float, poll_interval: float) -> float:
+    """
+    When a file arrived: its mtime if that falls within the detection window
+    (polling notices files up to one interval late), otherwise the first event time.
+    Copies that preserve an old mtime (cp -p, rsync -a) fall back to the event time.
+    """
+
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return first_seen
+
+    if first_seen - poll_interval <= mtime <= first_seen:
+        return mtime
+    return first_seen
+
+
+class WatchIndexer:
+    """Keeps the live collection, its manifest and the embedding cache open between batches"""
+
+    def __init__(self, structured_logger: StructuredLogger, args):
+        self.structured_logger = structured_logger
+        self.args = args
+        self.embedding_provider = load_embedding_provider()
+        self.collection = None
+        self.manifest = None
+        self.chunking = None  # From the live collection's metadata
+        # Same setting as indexing.py, so watched files dedup like a full rebuild
+        self.dedup_threshold = None if args.no_dedup else args.dedup_threshold
+        # Held per batch: a full rebuild can't switch/delete the collection mid-write
+        self.alias_lock = AliasLock(DB_PATH)
+
+        self.embedding_cache = None
+        self.embedding_function = self.embedding_provider
+        if not args.no_embedding_cache:
+            self.embedding_cache = EmbeddingCache(
+                EMBEDDING_CACHE_PATH,
+                max_bytes=args.embedding_cache_mb * 1024 * 1024
+            )
+            self.embedding_function = CachedEmbeddingFunction(
+                self.embedding_provider,
+                self.embedding_provider.model_id,
+                self.embedding_cache
+            )
+
+    def open_live_collection(self) -> bool:
+        """
+        (Re)open the collection the alias points to, with its manifest
+        Called before every batch (with the alias lock held): a full rebuild by
+        indexing.py may have switched the alias to a new generation in the meantime.
+        Returns True if it did (the previous collection was replaced).
+        """
+
+        live_collection = read_alias(DB_PATH, COLLECTION_NAME)
+        if self.collection is not None and self.collection.name == live_collection:
+            return False
+
+        manifest = IndexManifest.load(MANIFEST_PATH)
+        if not live_collection or manifest.collection != live_collection or not manifest.files:
+            raise RuntimeError(
+                "No usable index manifest for the live collection - "
+                "run indexing.py once before starting the watcher"
+            )
+
+        _, collection = create_chromadb_collection(
+            self.structured_logger,
+            self.embedding_provider,
+            collection_name=live_collection
+        )
+
+        indexed_model = (collection.metadata or {}).get('embedding_model')
+        if indexed_model != self.embedding_provider.model_id:
+            raise RuntimeError(
+                f"Collection was built with '{indexed_model}', config uses "
+                f"'{self.embedding_provider.model_id}' - run a full rebuild with indexing.py"
+            )
+
+        # Re-chunk changed files the way the live collection was built
+        self.chunking = parse_chunking((collection.metadata or {}).get('chunking'))
+        switched = self.collection is not None
+        self.collection = collection
+        self.manifest = manifest
+        return switched
+
+    def index(self, paths=None) -> dict:
+        """Incrementally index the given paths (None = whole directory)"""
+
+        with self.alias_lock:
+            if self.open_live_collection():
+                # The rebuild may have missed files changed while it ran: diff them all
+                paths = None
+
+            try:
+                return index_all_documents(
+                    DOCS_DIR,
+                    self.collection,
+                    self.structured_logger,
+                    manifest=self.manifest,
+                    incremental=True,
+                    batch_max_chunks=self.args.batch_size,
+                    batch_max_chars=self.args.batch_max_chars,
+                    workers=self.args.workers,
+                    embedding_function=self.embedding_function,
+                    dedup_threshold=self.dedup_threshold,
+                    paths=paths,
+                    chunking=self.chunking
+                )
+            finally:
+                # Live collection changes in place: keep the manifest in step
+                self.manifest.save()
+
+    def close(self):
+        if self.embedding_cache:
+            self.embedding_cache.close()
+
+
+def watch(indexer: WatchIndexer, events: queue.Queue, metrics: LagMetrics, args):
+    """
+    Main loop: collect events, index once the directory is quiet for `debounce`
+    seconds (or the oldest event waited `max_delay` seconds)
+    """
+
+    structured_logger = indexer.structured_logger
+    pending: Dict[Path, float] = {}  # path -> first event time
+    last_event = 0.0
+    retry_at = 0.0
+
+    while True:
+        # Wait briefly for an event, then drain what's queued - the batch check below
+        # must run during a continuous burst too, or max_delay is never reached
+        try:
+            path, detected_at = events.get(timeout=0.2)
+            while True:
+                pending.setdefault(path, detected_at)
+                last_event = time.time()
+                path, detected_at = events.get_nowait()
+        except queue.Empty:
+            pass
+
+        if not pending:
+            continue
+
+        now = time.time()
+        oldest = min(pending.values())
+        if now < retry_at:
+            continue
+        if now - last_event < args.debounce and now - oldest < args.max_delay:
+            continue
+
+        batch, pending = pending, {}
+        metrics.data['pending_files'] = len(batch)
+
+        try:
+            stats = indexer.index(list(batch))
+        except Exception as e:
+            metrics.record_failure()
+            structured_logger.log_structured(
+                event_type='watch_batch_failed',
+                level='error',
+                message=f"Indexing {len(batch)} files failed, retrying in {args.retry_delay}s: {e}",
+                file_count=len(batch)
+            )
+            # Keep original event times so the lag metric covers the outage
+            for path, first_seen in batch.items():
+                pending.setdefault(path, first_seen)
+            retry_at = time.time() + args.retry_delay
+            continue
+
+        finished = time.time()
+        lag_seconds = max(
+            finished - landed_at(path, first_seen, args.poll_interval)
+            for path, first_seen in batch.items()
+        )
+        metrics.data['pending_files'] = len(pending)
+        metrics.record_batch(stats, lag_seconds)
+
+        structured_logger.log_structured(
+            event_type='watch_batch_indexed',
+            level='info',
+            message=(f"{stats['new_files']} new, {stats['changed_files']} changed, "
+                     f"{stats['removed_files']} removed, {stats['indexed_chunks']} chunks "
+                     f"(lag {lag_seconds:.2f}s)"),
+            file_count=len(batch),
+            new_files=stats['new_files'],
+            changed_files=stats['changed_files'],
+            removed_files=stats['removed_files'],
+            indexed_chunks=stats['indexed_chunks'],
+            deleted_chunks=stats['deleted_chunks'],
+            lag_seconds=round(lag_seconds, 3)
+        )
+        print(f"[{datetime.now():%H:%M:%S}] Indexed {stats['new_files'] + stats['changed_files']} files, "
+              f"removed {stats['removed_files']} ({stats['indexed_chunks']} chunks, lag {lag_seconds:.2f}s)")
+
+
+def main():
+    """Run the watching indexer until interrupted"""
+
+    arg_parser = argparse.ArgumentParser(
+        description="Watch the preprocessed documents directory and index changes continuously"
+    )
+    arg_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEBOUNCE_SECONDS,
+        help=f"Seconds without new events before a batch is indexed (default: {DEBOUNCE_SECONDS})"
+    )
+    arg_parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=MAX_DELAY_SECONDS,
+        help=f"Max seconds a changed file waits during a continuous burst (default: {MAX_DELAY_SECONDS})"
+    )
+    arg_parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Use directory polling even if watchdog (inotify) is available"
+    )
+    arg_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=POLL_INTERVAL_SECONDS,
+        help=f"Polling interval in seconds (default: {POLL_INTERVAL_SECONDS})"
+    )
+    arg_parser.add_argument(
+        "--retry-delay",
+        type=float,
+        default=RETRY_DELAY_SECONDS,
+        help=f"Seconds to wait before retrying a failed batch (default: {RETRY_DELAY_SECONDS})"
+    )
+    arg_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_MAX_CHUNKS,
+        help=f"Max chunks per embedding/insert batch (default: {BATCH_MAX_CHUNKS})"
+    )
+    arg_parser.add_argument(
+        "--batch-max-chars",
+        type=int,
+        default=BATCH_MAX_CHARS,
+        help=f"Max total characters per embedding/insert batch (default: {BATCH_MAX_CHARS})"
+    )
+    arg_parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Always recompute embeddings (skip the on-disk embedding cache)"
+    )
+    arg_parser.add_argument(
+        "--embedding-cache-mb",
+        type=int,
+        default=EMBEDDING_CACHE_MAX_MB,
+        help=f"Embedding cache size limit in MB, LRU-evicted (default: {EMBEDDING_CACHE_MAX_MB})"
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for parse/chunk/validate (default: 1 = serial, 0 = all CPU cores)"
+    )
+    arg_parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Embed every chunk, even near-identical ones"
+    )
+    arg_parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Min estimated Jaccard similarity for chunks to count as near-duplicates (default: {DEFAULT_THRESHOLD})"
+    )
+    args = arg_parser.parse_args()
+
+    print("="*80)
+    print("Municipality RAG - Watching Indexer")
+    print("="*80)
+    print()
+
+    if not DOCS_DIR.exists():
+        print(f"Error: Documents directory not found: {DOCS_DIR}")
+        sys.exit(1)
+
+    structured_logger = StructuredLogger(LOG_DIR, name="watch_indexer")
+    indexer = None
+    watcher = None
+
+    try:
+        indexer = WatchIndexer(structured_logger, args)
+
+        # Start watching before the catch-up run so nothing lands unseen in between
+        events = queue.Queue()
+        watcher = None if args.poll else create_watchdog_watcher(DOCS_DIR, events)
+        watcher_type = 'inotify' if watcher else 'polling'
+        if watcher is None:
+            watcher = PollingWatcher(DOCS_DIR, events, interval=args.poll_interval)
+        watcher.start()
+
+        metrics = LagMetrics(METRICS_PATH, watcher_type)
+        metrics.save()
+
+        # Catch up on files that changed while the watcher was not running
+        try:
+            stats = indexer.index()
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+        structured_logger.log_structured(
+            event_type='watch_start',
+            level='info',
+            message=(f"Watching {DOCS_DIR} ({watcher_type}); catch-up indexed "
+                     f"{stats['new_files'] + stats['changed_files']} files, "
+                     f"removed {stats['removed_files']}"),
+            watcher=watcher_type,
+            collection=indexer.collection.name
+        )
+
+        print(f"Watching: {DOCS_DIR} ({watcher_type})")
+        print(f"Collection: {indexer.collection.name} (alias: {COLLECTION_NAME})")
+        print(f"Embedding model: {indexer.embedding_provider.model_id}")
+        print(f"Lag metrics: {METRICS_PATH}")
+        print("Press Ctrl+C to stop")
+        print()
+
+        watch(indexer, events, metrics, args)
+
+    except KeyboardInterrupt:
+        print("\nStopping watcher")
+
+    finally:
+        if watcher:
+            watcher.stop()
+        if indexer:
+            indexer.close()
+        structured_logger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Shared test setup: core/ and scripts/ importable by bare module name (like the scripts do)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "core"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+
+@pytest.fixture(autouse=True)
+def no_parse_cache(monkeypatch):
+    """Tests parse for real instead of reading the shared on-disk parse cache"""
+    monkeypatch.setenv("PARSE_CACHE", "off")
@@ -0,0 +1,88 @@
+"""
+scan_frontmatter must split files exactly like the regexes it replaced
+"""
+
+import random
+import re
+
+import pytest
+
+from parser import scan_frontmatter
+
+
+def regex_split(content: str):
+    """
+    Former parser: _strip_code_block_wrapper, then the frontmatter regex
+    Returns (found, frontmatter, body); body is the whole (unwrapped) text if not found.
+    """
+
+    if content.startswith('```yml\n') or content.startswith('```yaml\n'):
+        content = re.sub(r'^```ya?ml\n', '', content)
+        match = re.match(r'^(---\s*\n.*?\n---)\s*\n```\s*\n(.*)$', content, re.DOTALL)
+        if match:
+            content = f"{match.group(1)}\n\n{match.group(2)}"
+
+    match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
+    if not match:
+        return False, '', content
+    return True, match.group(1), match.group(2)
+
+
+def scanner_split(text: str):
+    scan = scan_frontmatter(text)
+    if scan.found:
+        return True, scan.frontmatter, scan.body
+    return False, '', scan.body if scan.wrapped else text
+
+
+CASES = [
+    '',
+    'no frontmatter\n# Title\n',
+    '---\ntitle: "Doc"\n---\n# Title\n\nBody\n',
+    '---\ntitle: x\n---\n\n\n## Section\n',  # blank lines after the closing ---
+    '---  \ntitle: x\n---\t\n# Title\n',
+    '---\ntitle: x\n---',  # closing --- without a newline
+    '---\na: 1\n---x\nb: 2\n---\nbody\n',  # "---x" does not close
+    '---\n\n---\nbody\n',
+    '```yml\n---\ntitle: x\n---\n```\n# Title\n',
+    '```yaml\n---\ntitle: x\n---\n\n```\n\nBody\n',
+    '```yml\n---\ntitle: x\n---\n# no closing fence\n',
+    '```yml\nnot frontmatter\n```\n# Title\n',
+    '```yml\n---\n---\n```\n---\nafter\n',  # whitespace-only fenced frontmatter
+    '```yml\n---\n \n---\n```\nbody\n---\nmore\n',
+    '---\r\ntitle: x\r\n---\r\nbody\r\n',
+    '---\ntitle: x\n---\x0c\n\x85body\n',
+]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_known_cases(text):
+    assert scanner_split(text) == regex_split(text)
+
+
+ATOMS = ['---', '\n', '\n', ' ', '\t', '```', '```yml\n', '```yaml\n', 'a: 1', 'x', '#', '-', '\r', ' \n', '\x0c', '\x85']
+OPENINGS = ['```yml\n', '```yaml\n', '---\n', '---', '']
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_texts(seed):
+    rnd = random.Random(seed)
+    for _ in range(5000):
+        text = rnd.choice(OPENINGS) + ''.join(rnd.choice(ATOMS) for _ in range(rnd.randint(0, 16)))
+        assert scanner_split(text) == regex_split(text), repr(text)
+
+
+def test_fenced_structures():
+    """Fence / frontmatter / closing-fence shapes, with whitespace runs between them"""
+
+    whitespace = [' ', '\n', '\t', '\n\n', ' \n', '\x0c', '\x1c', '\x85']
+    parts = ['---', '---x', '```', 'a: 1', 'title: x', '#h', '\n---', '\n---\n']
+    rnd = random.Random(15)
+
+    def ws():
+        return ''.join(rnd.choice(whitespace) for _ in range(rnd.randint(0, 4)))
+
+    for _ in range(20000):
+        text = (rnd.choice(['```yml\n', '```yaml\n']) + '---' + ws() + '---' + ws() + '```' + ws()
+                + ''.join(rnd.choice(parts) + ws() for _ in range(rnd.randint(0, 5))))
+        assert scanner_split(text) == regex_split(text), repr(text)
@@ -0,0 +1,76 @@
+"""
+iter_chunks_by_headers must yield the chunks of chunk_by_headers("\n" + text)
+"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+from chunker import chunk_by_headers, iter_chunks_by_headers
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+
+def as_tuples(chunks):
+    return [(c.header, c.content, c.chunk_index, c.chunk_type) for c in chunks]
+
+
+def assert_same_chunks(text: str, default_header: str = "Overview"):
+    expected = as_tuples(chunk_by_headers("\n" + text, default_header))
+    assert as_tuples(iter_chunks_by_headers(text, default_header)) == expected, repr(text)
+
+
+@pytest.mark.parametrize("template", sorted(TEMPLATES_DIR.glob("*.md")), ids=lambda p: p.name)
+def test_templates(template):
+    assert_same_chunks(template.read_text(encoding="utf-8"))
+
+
+CASES = [
+    '',
+    '   \n\n',
+    'text only, no headers',
+    '# Title\nintro\n## Section\nbody\n',
+    'before\n# Title\n\n\nbody\n\n',
+    '#\n\nfoo\nbar\n',  # "\s+" runs across blank lines: "#\n\nfoo" is one header
+    'x\n## a\n## b\ntext\n',  # back-to-back headers: "## b\ntext" is taken as a header
+    '#### too deep\ntext\n## ok\nbody',
+    '##no space\ntext\n',
+    '## empty section\n## next\n\nbody\n',
+    '## last header, no newline',
+    '# ראשי\n\n## ממשקי עבודה ואנשי קשר\n\n### איש קשר 1\n- שם: דנה\n',
+    '## header\r\nbody\r\n',
+    'intro\n#\ttab header\nbody\n',
+]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_known_cases(text):
+    assert_same_chunks(text)
+
+
+def test_default_header():
+    assert_same_chunks('before any header\n## Section\nbody\n', default_header="Intro")
+
+
+LINES = ['# Title', '## Section', '### Record 1', '#### deep', '#', '##', '- field: value', 'text', '', '  ', '\t',
+         '#no space', 'שורה בעברית', '```', '---']
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_documents(seed):
+    rnd = random.Random(seed)
+    for _ in range(3000):
+        text = '\n'.join(rnd.choice(LINES) for _ in range(rnd.randint(0, 14)))
+        if rnd.random() < 0.5:
+            text += '\n'
+        assert_same_chunks(text)
+
+
+def test_chunks_are_offsets_into_the_source():
+    text = '# Title\nintro\n## Section\nbody\n'
+    chunks = list(iter_chunks_by_headers(text))
+    for chunk in chunks:
+        assert chunk.source is text
+        assert text[chunk.content_span[0]:chunk.content_span[1]] == chunk.content
+    assert chunks[1].to_chunk() == chunk_by_headers("\n" + text)[1]
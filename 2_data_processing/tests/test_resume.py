@@ -0,0 +1,111 @@
+"""
+An interrupted full rebuild resumed with --resume must give the same collection as a clean build
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+
+import embeddings
+import indexing
+from collection_alias import read_alias
+
+
+SHARED_CONTACTS = """## ממשקי עבודה ואנשי קשר
+
+### איש קשר 1
+- שם ארגון: משרד הפנים
+- שם פרטי: יוסי
+- תפקיד: רכז רישוי עסקים
+- טלפון: 03-5555555
+"""
+
+
+class Interrupted(Exception):
+    """Stands in for a kill in the middle of indexing"""
+
+
+def write_corpus(docs_dir: Path, count: int = 40):
+    """Departure documents; most share a contacts section (near-duplicate chunks)"""
+
+    docs_dir.mkdir()
+    for i in range(1, count + 1):
+        contacts = SHARED_CONTACTS if i % 4 else SHARED_CONTACTS.replace("יוסי", f"דנה {i}")
+        (docs_dir / f"doc_{i:03d}.md").write_text(
+            f'---\ntitle: "Document {i}"\ncategory: "Category {i % 3}"\n---\n\n'
+            f"# Document {i}\n\nIntro text for document {i}, long enough to be indexed.\n\n"
+            f"{contacts}\n"
+            f"## Procedures\n\nStep one of procedure {i}.\nStep two of procedure {i}.\n",
+            encoding="utf-8"
+        )
+
+
+def run_indexing(monkeypatch, root: Path, docs_dir: Path, argv, interrupt_at: int = 0):
+    """indexing.main() against a database under root; optionally stop at the nth indexed file"""
+
+    monkeypatch.setattr(indexing, "DOCS_DIR", docs_dir)
+    monkeypatch.setattr(indexing, "DB_PATH", root / "chroma")
+    monkeypatch.setattr(indexing, "MANIFEST_PATH", root / "index_manifest.json")
+    monkeypatch.setattr(indexing, "CHECKPOINT_PATH", root / "index_checkpoint.jsonl")
+    monkeypatch.setattr(indexing, "EMBEDDING_CACHE_PATH", root / "embedding_cache.sqlite")
+    monkeypatch.setattr(indexing, "LOG_DIR", root / "logs")
+    monkeypatch.setattr(indexing, "PROFILE_DIR", root / "profiles")
+    monkeypatch.setattr(
+        indexing, "load_embedding_provider",
+        lambda: embeddings.create_embedding_provider({'provider': 'hash'})
+    )
+    monkeypatch.setattr(sys, "argv", ["indexing.py", "--batch-size", "8"] + argv)
+
+    if interrupt_at:
+        index_document = indexing.index_document
+        calls = [0]
+
+        def interrupting(*args, **kwargs):
+            calls[0] += 1
+            if calls[0] == interrupt_at:
+                raise Interrupted()
+            return index_document(*args, **kwargs)
+
+        monkeypatch.setattr(indexing, "index_document", interrupting)
+        with pytest.raises(Interrupted):
+            indexing.main()
+        monkeypatch.setattr(indexing, "index_document", index_document)
+    else:
+        indexing.main()
+
+
+def live_rows(db_path: Path):
+    """{chunk id: (document, metadata)} of the collection the alias points to"""
+
+    client = chromadb.PersistentClient(path=str(db_path))
+    collection = client.get_collection(name=read_alias(db_path, indexing.COLLECTION_NAME))
+    rows = collection.get(include=["documents", "metadatas"])
+    return {
+        chunk_id: (document, metadata)
+        for chunk_id, document, metadata in zip(rows['ids'], rows['documents'], rows['metadatas'])
+    }
+
+
+@pytest.mark.parametrize("interrupt_at, workers", [(5, 1), (23, 1), (13, 2)])
+def test_resume_matches_clean_build(tmp_path, monkeypatch, interrupt_at, workers):
+    docs_dir = tmp_path / "docs"
+    write_corpus(docs_dir)
+    options = ["--workers", str(workers), "--no-embedding-cache"]
+
+    run_indexing(monkeypatch, tmp_path / "clean", docs_dir, options)
+
+    resumed_root = tmp_path / "resumed"
+    run_indexing(monkeypatch, resumed_root, docs_dir, options, interrupt_at=interrupt_at)
+    assert read_alias(resumed_root / "chroma", indexing.COLLECTION_NAME) is None
+    assert (resumed_root / "index_checkpoint.jsonl").exists()
+
+    run_indexing(monkeypatch, resumed_root, docs_dir, options + ["--resume"])
+    assert not (resumed_root / "index_checkpoint.jsonl").exists()
+
+    clean = live_rows(tmp_path / "clean" / "chroma")
+    resumed = live_rows(resumed_root / "chroma")
+    assert any(metadata.get('duplicate_count') for _, metadata in clean.values())
+    assert resumed == clean
@@ -12,9 +12,14 @@ from chromadb.config import Settings
 import ollama
 from loguru import logger
 
-# Add project root to path
+# Add project root and core processing modules to path
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "2_data_processing/core"))
+
+from embeddings import EmbeddingProvider, load_embedding_provider
+from collection_alias import resolve_collection_name
+from chunker import CHUNKING_HIERARCHY, approximate_token_count
 
 # Configure logger
 logger.remove()
@@ -22,13 +27,20 @@ logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | <level>{level: <
 
 # Paths
 DB_PATH = PROJECT_ROOT / "database/chroma"
+COLLECTION_NAME = "municipality_docs"  # Alias, resolved to the live versioned collection
 
 # Ollama settings
 OLLAMA_MODEL = "llama3.1"
 
+# Hierarchical indexes: context sent to the LLM after expanding matches to their sections
+CONTEXT_BUDGET_TOKENS = 1500
+
 
 def load_collection():
-    """Load ChromaDB collection"""
+    """
+    Load ChromaDB collection and the embedding provider from models_config.yaml
+    Exits if the index was built with a different embedding model
+    """
 
     logger.info(f"Loading ChromaDB from: {DB_PATH}")
 
@@ -45,26 +57,60 @@ def load_collection():
         )
     )
 
-    # Get collection
-    collection = client.get_collection(name="municipality_docs")
+    # Same embedding config as indexing.py
+    embedding_provider = load_embedding_provider()
+
+    # Get live collection (alias is switched atomically after each rebuild)
+    collection_name = resolve_collection_name(DB_PATH, COLLECTION_NAME)
+    collection = client.get_collection(
+        name=collection_name,
+        embedding_function=embedding_provider
+    )
+
+    indexed_model = (collection.metadata or {}).get('embedding_model')
+    if indexed_model != embedding_provider.model_id:
+        logger.error(f"Index was built with embedding model '{indexed_model}', "
+                     f"but models_config.yaml selects '{embedding_provider.model_id}'")
+        logger.error("Re-run indexing.py (full rebuild) or restore the embedding config")
+        sys.exit(1)
 
-    logger.success(f"Loaded collection with {collection.count()} chunks")
+    logger.success(f"Loaded collection {collection_name} with {collection.count()} chunks "
+                   f"(embedding model: {embedding_provider.model_id})")
 
-    return collection
+    return collection, embedding_provider
 
 
-def retrieve_relevant_chunks(query: str, collection, n_results: int = 5) -> List[Dict]:
+def retrieve_relevant_chunks(
+    query: str,
+    collection,
+    embedding_provider: EmbeddingProvider,
+    n_results: int = 5,
+    expand_parents: bool = True,
+    context_budget_tokens: int = CONTEXT_BUDGET_TOKENS
+) -> List[Dict]:
     """
     Retrieve relevant chunks from ChromaDB
+    The query is embedded with the same provider that built the index
     Returns list of chunks with metadata
+
+    Hierarchical indexes (indexing.py --chunking hierarchy): only records and
+    plain sections are matched; with expand_parents, matched records are then
+    replaced by their parent section (see expand_to_parents)
     """
 
     logger.info(f"Searching for: '{query}'")
 
+    hierarchical = (collection.metadata or {}).get('chunking') == CHUNKING_HIERARCHY
+    query_filter = {}
+    if hierarchical:
+        # Parent sections are only fetched by ID, never matched directly
+        query_filter['where'] = {"chunk_type": {"$ne": "parent"}}
+
     # Query ChromaDB
     results = collection.query(
-        query_texts=[query],
-        n_results=n_results
+        query_embeddings=[embedding_provider.embed_query(query)],
+        n_results=n_results,
+        **query_filter
     )
 
     # Format results
@@ -85,9 +131,72 @@ def retrieve_relevant_chunks(query: str, collection, n_results: int = 5) -> List
 
     logger.success(f"Found {len(chunks)} relevant chunks")
 
+    if hierarchical and expand_parents:
+        chunks = expand_to_parents(chunks, collection, context_budget_tokens)
+
     return chunks
 
 
+def expand_to_parents(chunks: List[Dict], collection, context_budget_tokens: int) -> List[Dict]:
+    """
+    Replace matched records by their parent section, in rank order
+
+    - Each parent is included once, at the rank of its best matching record
+      (`matched_ids` lists the records it covers)
+    - A parent that doesn't fit the remaining budget falls back to the record itself
+    - Lower-ranked chunks that don't fit at all are dropped (the top one is always kept)
+    """
+
+    parent_ids = list(dict.fromkeys(
+        chunk['metadata']['parent_id'] for chunk in chunks if chunk['metadata'].get('parent_id')
+    ))
+    parents = {}
+    if parent_ids:
+        fetched = collection.get(ids=parent_ids, include=['documents', 'metadatas'])
+        parents = {
+            parent_id: (document, metadata)
+            for parent_id, document, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas'])
+        }
+
+    expanded = []
+    included_parents = {}
+    used_tokens = 0
+
+    for chunk in chunks:
+        parent_id = chunk['metadata'].get('parent_id')
+        if parent_id in included_parents:
+            included_parents[parent_id]['matched_ids'].append(chunk['id'])
+            continue
+
+        if parent_id in parents:
+            document, metadata = parents[parent_id]
+            tokens = approximate_token_count(document)
+            if used_tokens + tokens <= context_budget_tokens:
+                entry = {
+                    'id': parent_id,
+                    'content': document,
+                    'metadata': metadata,
+                    'distance': chunk['distance'],
+                    'rank': len(expanded) + 1,
+                    'matched_ids': [chunk['id']]
+                }
+                included_parents[parent_id] = entry
+                expanded.append(entry)
+                used_tokens += tokens
+                continue
+
+        tokens = approximate_token_count(chunk['content'])
+        if expanded and used_tokens + tokens > context_budget_tokens:
+            continue
+        expanded.append({**chunk, 'rank': len(expanded) + 1, 'matched_ids': [chunk['id']]})
+        used_tokens += tokens
+
+    logger.info(f"Expanded to {len(expanded)} sections/records (~{used_tokens} tokens, "
+                f"{len(included_parents)} parent sections)")
+
+    return expanded
+
+
 def synthesize_answer(query: str, chunks: List[Dict]) -> str:
     """
     Use Ollama to synthesize an answer from retrieved chunks
@@ -168,12 +277,15 @@ def display_results(query: str, answer: str, chunks: List[Dict]):
             print(f"   Category: {chunk['metadata']['category']}")
             if chunk['metadata'].get('priority'):
                 print(f"   Priority: {chunk['metadata']['priority']}")
+            if chunk['metadata'].get('duplicate_files'):
+                # Near-identical text indexed once (see indexing dedup)
+                print(f"   Also in: {chunk['metadata']['duplicate_files'].replace(',', ', ')}")
 
     print("\n" + "="*80)
 
 
-def interactive_mode(collection):
-    """Run interactive query mode"""
+def interactive_mode(collection, embedding_provider: EmbeddingProvider, **retrieval_options):
+    """Run interactive query mode (retrieval_options: see retrieve_relevant_chunks)"""
 
     print("\n" + "="*80)
     print("MUNICIPALITY RAG - Interactive Query System")
@@ -194,7 +306,7 @@ def interactive_mode(collection):
                 break
 
             # Retrieve relevant chunks
-            chunks = retrieve_relevant_chunks(query, collection, n_results=5)
+            chunks = retrieve_relevant_chunks(query, collection, embedding_provider, n_results=5, **retrieval_options)
 
             # Synthesize answer
             answer = synthesize_answer(query, chunks)
@@ -212,11 +324,11 @@ def interactive_mode(collection):
             print(f"\nError: {e}\n")
 
 
-def single_query_mode(query: str, collection):
+def single_query_mode(query: str, collection, embedding_provider: EmbeddingProvider, **retrieval_options):
     """Run a single query and exit"""
 
     # Retrieve relevant chunks
-    chunks = retrieve_relevant_chunks(query, collection, n_results=5)
+    chunks = retrieve_relevant_chunks(query, collection, embedding_provider, n_results=5, **retrieval_options)
 
     # Synthesize answer
     answer = synthesize_answer(query, chunks)
@@ -242,17 +354,33 @@ def main():
         default=True,
         help="Run in interactive mode (default)"
     )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=CONTEXT_BUDGET_TOKENS,
+        help=f"Hierarchical indexes: max context after expanding matches to their sections "
+             f"(default: {CONTEXT_BUDGET_TOKENS})"
+    )
+    parser.add_argument(
+        "--no-expand",
+        action="store_true",
+        help="Hierarchical indexes: send the matched records only, not their parent sections"
+    )
 
     args = parser.parse_args()
+    retrieval_options = {
+        'expand_parents': not args.no_expand,
+        'context_budget_tokens': args.context_tokens
+    }
 
     # Load collection
-    collection = load_collection()
+    collection, embedding_provider = load_collection()
 
     # Run query mode
     if args.query:
-        single_query_mode(args.query, collection)
+        single_query_mode(args.query, collection, embedding_provider, **retrieval_options)
     else:
-        interactive_mode(collection)
+        interactive_mode(collection, embedding_provider, **retrieval_options)
 
 
 if __name__ == "__main__":